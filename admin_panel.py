@@ -4,12 +4,21 @@ Admin Panel for Movie Info App
 """
 
 from flask import Blueprint, render_template, request, jsonify, session, redirect, url_for
-from security_middleware import security_middleware, rate_limiter
+from security_middleware import security_middleware
+from security_store import security_state_store
+from security_gate import security_gate
+from ip_ranges import read_ranges
 from update_manager import MovieUpdateManager
+from tmdb_client import get_tmdb_client
+from poster_prefetcher import poster_prefetcher
+from provider_logos import provider_logo_manifest
+from fragment_cache import movie_card_cache
+from search_cache import search_result_cache
+from search_index import search_index, suggest_index
+from batch_importer import batch_import_jobs, normalize_tmdb_ids, BATCH_IMPORT_WORKERS, BATCH_IMPORT_CHUNK_SIZE
 import os
 import json
-import time
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 
 admin_bp = Blueprint('admin', __name__, url_prefix='/admin')
 
@@ -53,26 +62,17 @@ def dashboard():
     """หน้า dashboard หลัก"""
     # สถิติการใช้งาน
     stats = {
-        'total_requests': len(rate_limiter.requests),
+        'total_requests': security_gate.tracked_clients(),
         'blacklisted_ips': len(security_middleware.ip_blacklist),
         'whitelisted_ips': len(security_middleware.ip_whitelist),
         'suspicious_ips': len(security_middleware.suspicious_ips)
     }
     
-    # IP ที่ใช้งานล่าสุด
-    recent_ips = []
-    current_time = time.time()
-    for ip, requests in rate_limiter.requests.items():
-        if requests:
-            recent_requests = [r for r in requests if current_time - r < 3600]  # 1 ชั่วโมง
-            if recent_requests:
-                recent_ips.append({
-                    'ip': ip,
-                    'requests_count': len(recent_requests),
-                    'last_request': datetime.fromtimestamp(max(recent_requests))
-                })
-    
-    recent_ips.sort(key=lambda x: x['last_request'], reverse=True)
+    # IP ที่ใช้งานล่าสุด (จากตัวนับ rate limit ของ security gate, 1 ชั่วโมง)
+    recent_ips = [
+        dict(client, last_request=datetime.fromtimestamp(client['last_request']))
+        for client in security_gate.active_clients('per_hour')
+    ]
     
     # สร้าง update manager
     try:
@@ -81,7 +81,21 @@ def dashboard():
     except Exception as e:
         update_stats = {}
     
-    return render_template('admin/dashboard.html', stats=stats, recent_ips=recent_ips[:10], update_stats=update_stats)
+    # สถิติคิวดาวน์โหลด poster
+    poster_stats = poster_prefetcher.stats()
+    
+    # สถิติ cache ผลค้นหา
+    search_cache_stats = search_result_cache.stats()
+    
+    # ขนาดและการลบข้อมูลติดตาม IP
+    security_state_stats = security_state_store.stats()
+    
+    # request ที่ถูกปฏิเสธก่อนเข้า route
+    security_gate_stats = security_gate.stats()
+    
+    return render_template('admin/dashboard.html', stats=stats, recent_ips=recent_ips[:10], update_stats=update_stats,
+                         poster_stats=poster_stats, search_cache_stats=search_cache_stats,
+                         security_state_stats=security_state_stats, security_gate_stats=security_gate_stats)
 
 @admin_bp.route('/security')
 @require_admin_auth
@@ -99,61 +113,96 @@ def security():
                          whitelisted_ips=whitelisted_ips,
                          suspicious_ips=suspicious_ips)
 
+def _add_ip_ranges(ip_list, list_name: str):
+    """เพิ่มหลายรายการจาก JSON {'ranges': [...]} หรือไฟล์ที่อัปโหลด (field 'file')"""
+    upload = request.files.get('file')
+    if upload:
+        ranges = read_ranges(upload.read().decode('utf-8', errors='replace').splitlines())
+    else:
+        ranges = (request.get_json(silent=True) or {}).get('ranges') or []
+        if isinstance(ranges, str):
+            ranges = read_ranges(ranges.splitlines())
+    
+    if not ranges:
+        return jsonify({'success': False, 'message': 'IP addresses or CIDR ranges required'})
+    
+    added, invalid = ip_list.add_many(ranges)
+    return jsonify({
+        'success': bool(added),
+        'message': f'{len(added)} entries added to {list_name}',
+        'added': len(added),
+        'invalid': invalid
+    })
+
 @admin_bp.route('/api/blacklist', methods=['POST'])
 @require_admin_auth
 def add_to_blacklist():
-    """เพิ่ม IP ลงใน blacklist"""
+    """เพิ่ม IP หรือช่วง CIDR (เช่น 203.0.113.0/24) ลงใน blacklist"""
     data = request.get_json()
     ip_address = data.get('ip')
     
     if not ip_address:
         return jsonify({'success': False, 'message': 'IP address required'})
     
-    security_middleware.add_to_blacklist(ip_address)
-    return jsonify({'success': True, 'message': f'IP {ip_address} added to blacklist'})
+    try:
+        entry = security_middleware.add_to_blacklist(ip_address)
+    except ValueError:
+        return jsonify({'success': False, 'message': f'Invalid IP address or CIDR range: {ip_address}'})
+    return jsonify({'success': True, 'message': f'IP {entry} added to blacklist'})
+
+@admin_bp.route('/api/blacklist/bulk', methods=['POST'])
+@require_admin_auth
+def bulk_add_to_blacklist():
+    """เพิ่ม IP / ช่วง CIDR หลายรายการลงใน blacklist"""
+    return _add_ip_ranges(security_middleware.ip_blacklist, 'blacklist')
 
-@admin_bp.route('/api/blacklist/<ip>', methods=['DELETE'])
+@admin_bp.route('/api/blacklist/<path:ip>', methods=['DELETE'])
 @require_admin_auth
 def remove_from_blacklist(ip):
-    """ลบ IP ออกจาก blacklist"""
+    """ลบ IP หรือช่วง CIDR ออกจาก blacklist"""
     security_middleware.remove_from_blacklist(ip)
     return jsonify({'success': True, 'message': f'IP {ip} removed from blacklist'})
 
 @admin_bp.route('/api/whitelist', methods=['POST'])
 @require_admin_auth
 def add_to_whitelist():
-    """เพิ่ม IP ลงใน whitelist"""
+    """เพิ่ม IP หรือช่วง CIDR ลงใน whitelist"""
     data = request.get_json()
     ip_address = data.get('ip')
     
     if not ip_address:
         return jsonify({'success': False, 'message': 'IP address required'})
     
-    security_middleware.add_to_whitelist(ip_address)
-    return jsonify({'success': True, 'message': f'IP {ip_address} added to whitelist'})
+    try:
+        entry = security_middleware.add_to_whitelist(ip_address)
+    except ValueError:
+        return jsonify({'success': False, 'message': f'Invalid IP address or CIDR range: {ip_address}'})
+    return jsonify({'success': True, 'message': f'IP {entry} added to whitelist'})
+
+@admin_bp.route('/api/whitelist/bulk', methods=['POST'])
+@require_admin_auth
+def bulk_add_to_whitelist():
+    """เพิ่ม IP / ช่วง CIDR หลายรายการลงใน whitelist"""
+    return _add_ip_ranges(security_middleware.ip_whitelist, 'whitelist')
 
-@admin_bp.route('/api/whitelist/<ip>', methods=['DELETE'])
+@admin_bp.route('/api/whitelist/<path:ip>', methods=['DELETE'])
 @require_admin_auth
 def remove_from_whitelist(ip):
-    """ลบ IP ออกจาก whitelist"""
-    security_middleware.ip_whitelist.discard(ip)
+    """ลบ IP หรือช่วง CIDR ออกจาก whitelist"""
+    security_middleware.remove_from_whitelist(ip)
     return jsonify({'success': True, 'message': f'IP {ip} removed from whitelist'})
 
 @admin_bp.route('/api/stats')
 @require_admin_auth
 def get_stats():
     """ดึงสถิติการใช้งาน"""
-    current_time = time.time()
-    
     # สถิติ rate limiting
     rate_limit_stats = {}
-    for ip, requests in rate_limiter.requests.items():
-        requests_last_hour = [r for r in requests if current_time - r < 3600]
-        if requests_last_hour:
-            rate_limit_stats[ip] = {
-                'requests_last_hour': len(requests_last_hour),
-                'last_request': datetime.fromtimestamp(max(requests_last_hour))
-            }
+    for client in security_gate.active_clients('per_hour'):
+        rate_limit_stats[client['ip']] = {
+            'requests_last_hour': client['requests_count'],
+            'last_request': datetime.fromtimestamp(client['last_request'])
+        }
     
     # สถิติความปลอดภัย
     security_stats = {
@@ -163,10 +212,24 @@ def get_stats():
         'failed_attempts': len(security_middleware.failed_attempts)
     }
     
+    # สถิติ TMDB cache และ request ที่ถูกรวม (single-flight)
+    tmdb_client = get_tmdb_client()
+    cache_stats = tmdb_client.cache.stats() if tmdb_client.cache else {}
+    
     return jsonify({
         'success': True,
         'rate_limit_stats': rate_limit_stats,
-        'security_stats': security_stats
+        'security_stats': security_stats,
+        'tmdb_cache_stats': cache_stats,
+        'tmdb_request_stats': tmdb_client.single_flight.stats(),
+        'poster_prefetch_stats': poster_prefetcher.stats(),
+        'provider_logo_stats': provider_logo_manifest.stats(),
+        'movie_card_cache_stats': movie_card_cache.stats(),
+        'search_index_stats': search_index.stats(),
+        'suggest_index_stats': suggest_index.stats(),
+        'search_cache_stats': search_result_cache.stats(),
+        'security_state_stats': security_state_store.stats(),
+        'security_gate_stats': security_gate.stats()
     })
 
 @admin_bp.route('/api/clear_suspicious/<ip>', methods=['POST'])
@@ -196,20 +259,56 @@ def updates():
     except Exception as e:
         return render_template('admin/updates.html', stats={}, error=str(e))
 
+def _job_started(job_id: str, message: str):
+    """response 202 ของงานที่รันเบื้องหลัง (ตรวจสถานะที่ status_url)"""
+    return jsonify({
+        'success': True,
+        'message': message,
+        'job_id': job_id,
+        'status_url': url_for('admin.job_status', job_id=job_id)
+    }), 202
+
 @admin_bp.route('/api/update/all', methods=['POST'])
 @require_admin_auth
 def update_all_movies():
-    """API สำหรับอัปเดตหนังทั้งหมด"""
+    """API สำหรับอัปเดตหนังทั้งหมด (รันเบื้องหลัง ตรวจสถานะด้วย job id)"""
     try:
-        force_update = request.json.get('force_update', False)
-        days_threshold = request.json.get('days_threshold', 7)
+        data = request.get_json(silent=True) or {}
+        force_update = bool(data.get('force_update', False))
+        days_threshold = int(data.get('days_threshold', 7))
         
-        update_manager = MovieUpdateManager()
-        result = update_manager.update_all_movies(force_update=force_update, days_threshold=days_threshold)
+        job_id = batch_import_jobs.run_in_background(
+            'update_all',
+            lambda on_progress: MovieUpdateManager().update_all_movies(
+                force_update=force_update, days_threshold=days_threshold, on_progress=on_progress
+            )
+        )
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'})
+    
+    return _job_started(job_id, 'Update started')
+
+@admin_bp.route('/api/update/changes', methods=['POST'])
+@require_admin_auth
+def update_changed_movies():
+    """API สำหรับอัปเดตเฉพาะหนังที่เปลี่ยนแปลงบน TMDB (รันเบื้องหลัง ตรวจสถานะด้วย job id)"""
+    try:
+        since = (request.get_json(silent=True) or {}).get('since')
+        if since:
+            date.fromisoformat(str(since)[:10])
         
-        return jsonify(result)
+        job_id = batch_import_jobs.run_in_background(
+            'update_changes',
+            lambda on_progress: MovieUpdateManager().update_changed_movies(since=since, on_progress=on_progress)
+        )
+    except ValueError as e:
+        return jsonify({'success': False, 'message': f'Invalid since date: {str(e)}'}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': f'Error: {str(e)}'})
+    
+    return _job_started(job_id, 'Update started')
 
 @admin_bp.route('/api/update/single', methods=['POST'])
 @require_admin_auth
@@ -238,18 +337,48 @@ def update_single_movie():
 @admin_bp.route('/api/update/ids', methods=['POST'])
 @require_admin_auth
 def update_movies_by_ids():
-    """API สำหรับอัปเดตหนังตาม IDs"""
+    """API สำหรับอัปเดตหนังตาม IDs (รันเบื้องหลัง ตรวจสถานะด้วย job id)"""
     try:
-        tmdb_ids = request.json.get('tmdb_ids', [])
-        if not tmdb_ids:
-            return jsonify({'success': False, 'message': 'TMDB IDs required'})
-        
-        update_manager = MovieUpdateManager()
-        result = update_manager.update_movies_by_ids(tmdb_ids)
-        
-        return jsonify(result)
+        tmdb_ids = normalize_tmdb_ids((request.get_json(silent=True) or {}).get('tmdb_ids', []))
+        job_id = batch_import_jobs.run_in_background(
+            'update_ids',
+            lambda on_progress: MovieUpdateManager().update_movies_by_ids(tmdb_ids, on_progress=on_progress),
+            total=len(tmdb_ids)
+        )
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         return jsonify({'success': False, 'message': f'Error: {str(e)}'})
+    
+    return _job_started(job_id, 'Update started')
+
+@admin_bp.route('/api/import/batch', methods=['POST'])
+@require_admin_auth
+def import_movies_batch():
+    """API สำหรับนำเข้าหนังหลายเรื่องพร้อมกัน (รันเบื้องหลัง ตรวจสถานะด้วย job id)"""
+    try:
+        data = request.json or {}
+        job_id = batch_import_jobs.submit(
+            data.get('tmdb_ids', []),
+            workers=data.get('workers', BATCH_IMPORT_WORKERS),
+            chunk_size=data.get('chunk_size', BATCH_IMPORT_CHUNK_SIZE)
+        )
+    except (ValueError, TypeError) as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'Error: {str(e)}'})
+    
+    return _job_started(job_id, 'Import started')
+
+@admin_bp.route('/api/import/batch/<job_id>')
+@admin_bp.route('/api/jobs/<job_id>')
+@require_admin_auth
+def job_status(job_id):
+    """API สำหรับดูความคืบหน้าของงานนำเข้า/อัปเดตที่รันเบื้องหลัง"""
+    job = batch_import_jobs.get(job_id)
+    if job is None:
+        return jsonify({'success': False, 'message': 'Job not found'}), 404
+    return jsonify({'success': True, 'job': job})
 
 @admin_bp.route('/api/update/stats')
 @require_admin_auth
@@ -1,17 +1,27 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, make_response
 from flask_cors import CORS
+from markupsafe import Markup
 import os
 from supabase import create_client, Client
 from dotenv import load_dotenv
 import requests
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 import json
 from datetime import datetime, timedelta
 import time
-from collections import defaultdict
 import re
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
 from admin_panel import admin_bp
-from utils import get_poster_url, download_and_save_poster, format_streaming_providers, format_genres, format_cast, format_year
+from security_gate import security_gate, get_client_ip
+from tmdb_client import get_tmdb_client
+from movie_store import upsert_movie, upsert_movies
+from poster_prefetcher import poster_prefetcher
+from fragment_cache import movie_card_cache
+from search_index import SEARCH_INDEX_ENABLED, SUGGEST_INDEX_ENABLED, search_index, suggest_index
+from search_cache import search_key, search_result_cache
+from http_cache import cacheable, latest_timestamp
+from pagination import MOVIES_PAGE_SIZE, build_page, clamp_page_size, decode_cursor, keyset_filter
+from utils import get_poster_url, format_streaming_providers, get_display_fields
 
 # Load environment variables
 load_dotenv()
@@ -22,45 +32,15 @@ app.secret_key = 'your-secret-key-here'
 # Enable CORS for all routes
 CORS(app, origins=['chrome-extension://*', 'https://www.themoviedb.org'])
 
-# Rate limiting storage
-rate_limit_storage = defaultdict(list)
-MAX_REQUESTS_PER_MINUTE = 10  # จำกัด 10 ครั้งต่อนาที
-MAX_REQUESTS_PER_HOUR = 100   # จำกัด 100 ครั้งต่อชั่วโมง
+# เวลาสูงสุดที่หน้า /search รอผลจาก TMDB (วินาที) ถ้าเกินจะแสดงเฉพาะผลจากฐานข้อมูล
+SEARCH_TMDB_DEADLINE = float(os.getenv('SEARCH_TMDB_DEADLINE', '2'))
+SEARCH_TMDB_WORKERS = int(os.getenv('SEARCH_TMDB_WORKERS', '4'))
 
-def check_rate_limit(ip_address):
-    """ตรวจสอบ rate limit สำหรับ IP address"""
-    current_time = time.time()
-    
-    # ลบข้อมูลเก่าออก (เกิน 1 ชั่วโมง)
-    rate_limit_storage[ip_address] = [
-        req_time for req_time in rate_limit_storage[ip_address]
-        if current_time - req_time < 3600
-    ]
-    
-    # ตรวจสอบจำนวนการเรียกใน 1 นาที
-    requests_last_minute = len([
-        req_time for req_time in rate_limit_storage[ip_address]
-        if current_time - req_time < 60
-    ])
-    
-    # ตรวจสอบจำนวนการเรียกใน 1 ชั่วโมง
-    requests_last_hour = len(rate_limit_storage[ip_address])
-    
-    if requests_last_minute >= MAX_REQUESTS_PER_MINUTE:
-        return False, "เกินจำนวนการเรียก API ต่อนาที (10 ครั้ง)"
-    
-    if requests_last_hour >= MAX_REQUESTS_PER_HOUR:
-        return False, "เกินจำนวนการเรียก API ต่อชั่วโมง (100 ครั้ง)"
-    
-    # เพิ่มการเรียกปัจจุบัน
-    rate_limit_storage[ip_address].append(current_time)
-    return True, "OK"
+# ค้นหา TMDB ใน thread แยก ขนานกับการค้นในฐานข้อมูล
+tmdb_search_executor = ThreadPoolExecutor(max_workers=SEARCH_TMDB_WORKERS, thread_name_prefix='tmdb-search')
 
-def get_client_ip():
-    """ดึง IP address ของผู้ใช้"""
-    if request.headers.get('X-Forwarded-For'):
-        return request.headers.get('X-Forwarded-For').split(',')[0]
-    return request.remote_addr
+# ตรวจ IP, User-Agent และ rate limit ก่อนเข้า route (ดู security_gate.py)
+security_gate.init_app(app)
 
 def validate_movie_id(movie_id):
     """ตรวจสอบความถูกต้องของ Movie ID"""
@@ -90,21 +70,15 @@ class SupabaseMovieManager:
             raise ValueError("Missing required environment variables")
         
         self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
-        self.tmdb_base_url = "https://api.themoviedb.org/3"
+        self.tmdb = get_tmdb_client(self.tmdb_api_key)
+        
+        # ปิดเองอัตโนมัติถ้าฐานข้อมูลยังไม่มี function search_movies_ranked
+        self.ranked_search_available = True
     
     def get_movie_from_tmdb(self, movie_id: int) -> Dict:
         """ดึงข้อมูลหนังจาก TMDB API"""
         try:
-            url = f"{self.tmdb_base_url}/movie/{movie_id}"
-            params = {
-                'api_key': self.tmdb_api_key,
-                'append_to_response': 'credits,videos'
-            }
-            
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            
-            return response.json()
+            return self.tmdb.get_movie(movie_id)
             
         except requests.exceptions.RequestException as e:
             print(f"Error fetching movie data: {e}")
@@ -148,8 +122,8 @@ class SupabaseMovieManager:
         # ดึง poster path
         poster_path = movie_data.get('poster_path', '')
         
-        # ดึง streaming providers (ถ้ามี)
-        streaming_providers = self.get_streaming_providers(movie_data.get('id'))
+        # ดึง streaming providers (มาพร้อมข้อมูลหนังผ่าน append_to_response)
+        streaming_providers = self.get_streaming_providers_for_movie(movie_data)
         
         return {
             'tmdb_id': movie_data.get('id'),
@@ -167,95 +141,39 @@ class SupabaseMovieManager:
     def get_streaming_providers(self, movie_id: int) -> Dict:
         """ดึงข้อมูล streaming providers จาก TMDB"""
         try:
-            url = f"{self.tmdb_base_url}/movie/{movie_id}/watch/providers"
-            params = {
-                'api_key': self.tmdb_api_key
-            }
-            
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            
-            data = response.json()
-            providers = {}
-            
-            # ดึง providers จากประเทศไทย (TH)
-            th_providers = data.get('results', {}).get('TH', {})
+            return self.tmdb.get_streaming_providers(movie_id)
             
-            # ดึง streaming providers
-            streaming = th_providers.get('flatrate', [])
-            if streaming:
-                providers['streaming'] = [
-                    {
-                        'provider_name': provider.get('provider_name', ''),
-                        'logo_path': provider.get('logo_path', ''),
-                        'provider_id': provider.get('provider_id', '')
-                    }
-                    for provider in streaming[:5]  # จำกัด 5 providers
-                ]
-            
-            # ดึง rent providers
-            rent = th_providers.get('rent', [])
-            if rent:
-                providers['rent'] = [
-                    {
-                        'provider_name': provider.get('provider_name', ''),
-                        'logo_path': provider.get('logo_path', ''),
-                        'provider_id': provider.get('provider_id', '')
-                    }
-                    for provider in rent[:5]
-                ]
-            
-            # ดึง buy providers
-            buy = th_providers.get('buy', [])
-            if buy:
-                providers['buy'] = [
-                    {
-                        'provider_name': provider.get('provider_name', ''),
-                        'logo_path': provider.get('logo_path', ''),
-                        'provider_id': provider.get('provider_id', '')
-                    }
-                    for provider in buy[:5]
-                ]
-            
-            return providers
+        except Exception as e:
+            print(f"Error fetching streaming providers: {e}")
+            return {}
+    
+    def get_streaming_providers_for_movie(self, movie_data: Dict) -> Dict:
+        """ดึง streaming providers จากข้อมูลหนังที่ดึงมาแล้ว (append_to_response)"""
+        try:
+            return self.tmdb.get_streaming_providers_for_movie(movie_data)
             
         except Exception as e:
             print(f"Error fetching streaming providers: {e}")
             return {}
     
     def save_movie_to_database(self, movie_data: Dict) -> Optional[int]:
-        """บันทึกข้อมูลหนังลง Supabase"""
+        """บันทึกข้อมูลหนังลง Supabase (upsert ตาม tmdb_id)"""
         try:
-            # ตรวจสอบว่ามีหนังนี้ในฐานข้อมูลแล้วหรือไม่
-            existing = self.supabase.table('movies').select('id').eq('tmdb_id', movie_data['tmdb_id']).execute()
-            
-            movie_record = {
-                'tmdb_id': movie_data['tmdb_id'],
-                'title': movie_data['title'],
-                'original_title': movie_data['original_title'],
-                'year': movie_data['year'],
-                'genres': movie_data['genres'],
-                'trailer_id': movie_data['trailer_id'],
-                'director': movie_data['director'],
-                'cast_data': movie_data['cast_data'],
-                'poster_path': movie_data.get('poster_path', ''),
-                'streaming_providers': movie_data.get('streaming_providers', {})
-            }
-            
-            if existing.data:
-                # อัพเดทข้อมูล
-                movie_id = existing.data[0]['id']
-                self.supabase.table('movies').update(movie_record).eq('id', movie_id).execute()
-                return movie_id
-            else:
-                # เพิ่มข้อมูลใหม่
-                result = self.supabase.table('movies').insert(movie_record).execute()
-                return result.data[0]['id']
+            return upsert_movie(self.supabase, movie_data)
             
         except Exception as e:
             print(f"Error saving movie to database: {e}")
             return None
     
+    def save_movies_to_database(self, movies: List[Dict]) -> Dict[int, int]:
+        """บันทึกข้อมูลหนังหลายเรื่องลง Supabase ในคำสั่งเดียว"""
+        try:
+            return upsert_movies(self.supabase, movies)
+            
+        except Exception as e:
+            print(f"Error saving movies to database: {e}")
+            return {}
+    
     def import_movie(self, movie_id: int) -> Dict:
         """นำเข้าข้อมูลหนังครบถ้วน"""
         try:
@@ -300,18 +218,19 @@ class SupabaseMovieManager:
                     'poster_path': row['poster_path'],
                     'trailer_id': row.get('trailer_id'),
                     'tmdb_id': row['tmdb_id'],
-                    'streaming_providers': row.get('streaming_providers')
+                    'streaming_providers': row.get('streaming_providers'),
+                    'updated_at': row.get('updated_at')
                 })()
                 
-                # จัดรูปแบบข้อมูล
-                movie.formatted_year = format_year(movie.year) if movie.year else None
-                movie.formatted_genres = format_genres(movie.genres) if movie.genres else None
-                movie.formatted_cast = format_cast(movie.cast_data) if movie.cast_data else None
+                # ใช้ค่าที่จัดรูปแบบไว้ตอนบันทึก
+                display = get_display_fields(row)
+                movie.formatted_year = display['formatted_year'] if movie.year else None
+                movie.formatted_genres = display['formatted_genres'] if movie.genres else None
+                movie.formatted_cast = display['formatted_cast'] if movie.cast_data else None
                 movie.formatted_providers = format_streaming_providers(movie.streaming_providers) if movie.streaming_providers else None
                 
-                # สร้าง poster URL
-                if movie.poster_path:
-                    movie.poster_url = url_for('static', filename=movie.poster_path, _external=True)
+                # poster URL (ไฟล์ในเครื่องถ้ามี ไม่เช่นนั้น TMDB CDN และดาวน์โหลดเบื้องหลัง)
+                movie.poster_url = poster_prefetcher.poster_url(movie.poster_path, movie.tmdb_id)
                 
                 return movie
             
@@ -322,27 +241,46 @@ class SupabaseMovieManager:
             return None
     
     def list_all_movies(self, limit: int = 50) -> List[Dict]:
-        """แสดงรายการหนังทั้งหมดในฐานข้อมูล"""
+        """แสดงรายการหนังล่าสุดในฐานข้อมูล"""
+        return self.list_movies_page(limit)['movies']
+    
+    def list_movies_page(self, page_size: int = MOVIES_PAGE_SIZE, cursor: Optional[Tuple[str, int, str]] = None) -> Dict:
+        """
+        ดึงรายการหนังทีละหน้าด้วย keyset pagination บน (created_at, id)
+        
+        Args:
+            page_size: จำนวนหนังต่อหน้า
+            cursor: (created_at, id, direction) จาก decode_cursor หรือ None สำหรับหน้าแรก
+        
+        Returns:
+            dict {'movies', 'next_cursor', 'prev_cursor'}
+        """
         try:
-            movies = self.supabase.table('movies').select(
-                'id, tmdb_id, title, year, director, genres, created_at, poster_path, streaming_providers'
-            ).order('created_at', desc=True).limit(limit).execute()
+            query = self.supabase.table('movies').select(
+                'id, tmdb_id, title, year, director, genres, created_at, updated_at, poster_path, '
+                'streaming_providers, display_year, display_genres'
+            )
+            
+            direction = None
+            if cursor:
+                created_at, row_id, direction = cursor
+                query = query.or_(keyset_filter(created_at, row_id, direction))
             
-            return movies.data
+            # หน้าก่อนหน้าดึงจากเก่าไปใหม่แล้วค่อยกลับลำดับ
+            descending = direction != 'prev'
+            movies = query.order('created_at', desc=descending).order('id', desc=descending).limit(page_size + 1).execute()
+            
+            return build_page(movies.data, page_size, direction)
             
         except Exception as e:
             print(f"Error listing movies: {e}")
-            return []
+            return {'movies': [], 'next_cursor': None, 'prev_cursor': None}
     
     def search_movies(self, query: str, limit: int = 10) -> List[Dict]:
         """ค้นหาหนังในฐานข้อมูล"""
         try:
-            response = self.supabase.table('movies').select(
-                'id, tmdb_id, title, year, director, genres, cast_data, poster_path, streaming_providers'
-            ).ilike('title', f'%{query}%').limit(limit).execute()
-            
             movies = []
-            for row in response.data:
+            for row in self.search_movie_rows(query, limit):
                 movie = type('Movie', (), {
                     'id': row['id'],
                     'title': row['title'],
@@ -355,10 +293,11 @@ class SupabaseMovieManager:
                     'tmdb_id': row['tmdb_id']
                 })()
                 
-                # จัดรูปแบบข้อมูล
-                movie.formatted_year = format_year(movie.year) if movie.year else None
-                movie.formatted_genres = format_genres(movie.genres) if movie.genres else None
-                movie.formatted_cast = format_cast(movie.cast_data) if movie.cast_data else None
+                # ใช้ค่าที่จัดรูปแบบไว้ตอนบันทึก
+                display = get_display_fields(row)
+                movie.formatted_year = display['formatted_year'] if movie.year else None
+                movie.formatted_genres = display['formatted_genres'] if movie.genres else None
+                movie.formatted_cast = display['formatted_cast'] if movie.cast_data else None
                 
                 movies.append(movie)
             
@@ -368,26 +307,125 @@ class SupabaseMovieManager:
             print(f"Error searching movies: {e}")
             return []
     
-    def search_tmdb_movies(self, query: str) -> List[Dict]:
-        """ค้นหาหนังใน TMDB"""
+    def search_movie_rows(self, query: str, limit: int = 10) -> List[Dict]:
+        """ค้นหาหนังในฐานข้อมูล (อ่านจาก search_result_cache ก่อนถ้ามี)"""
+        # ใช้คำค้นรูปเดียวกับ key ของ cache ทั้งกับ search index และฐานข้อมูล
+        query = search_key(query)
+        if not query:
+            return []
+        
+        rows = search_result_cache.get('local', query, limit)
+        if rows is not None:
+            return rows
+        
+        generation = search_result_cache.local_generation
+        rows = self._query_movie_rows(query, limit)
+        search_result_cache.set('local', query, rows, limit, generation)
+        return rows
+    
+    def _query_movie_rows(self, query: str, limit: int = 10) -> List[Dict]:
+        """
+        ค้นหาจาก search index ในหน่วยความจำ ถ้ายังไม่พร้อมจะใช้ search_movies_ranked
+        (pg_trgm index บน search_text เรียงตามความใกล้เคียง)
+        
+        ถ้าฐานข้อมูลยังไม่ได้รัน migration จะใช้ ilike บน title แทน
+        """
+        if SEARCH_INDEX_ENABLED:
+            search_index.start(self.supabase)
+            rows = search_index.search(query, limit)
+            if rows is not None:
+                return rows
+        
+        if self.ranked_search_available:
+            try:
+                response = self.supabase.rpc(
+                    'search_movies_ranked', {'search_query': query, 'max_results': limit}
+                ).execute()
+                return response.data
+            except Exception as e:
+                # PGRST202: ไม่มี function นี้ในฐานข้อมูล
+                if 'PGRST202' in str(e):
+                    self.ranked_search_available = False
+                print(f"Error searching movies (ranked): {e}")
+        
+        response = self.supabase.table('movies').select(
+            'id, tmdb_id, title, year, director, genres, cast_data, poster_path, streaming_providers, '
+            'display_year, display_genres, display_cast'
+        ).ilike('title', f'%{query}%').limit(limit).execute()
+        return response.data
+    
+    def suggest_movies(self, query: str, limit: int = 8) -> List[Dict]:
+        """ชื่อหนังที่ขึ้นต้นด้วยคำค้น (จาก prefix index ในหน่วยความจำ หรือฐานข้อมูลถ้ายังไม่พร้อม)"""
+        if SUGGEST_INDEX_ENABLED:
+            suggest_index.start(self.supabase)
+            suggestions = suggest_index.suggest(query, limit)
+            if suggestions is not None:
+                return suggestions
+        
         try:
-            url = f"{self.tmdb_base_url}/search/movie"
-            params = {
-                'api_key': self.tmdb_api_key,
-                'query': query,
-                'page': 1
-            }
+            escaped = query.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            response = self.supabase.table('movies').select('id, title, year') \
+                .ilike('title', f'{escaped}%').order('title').limit(limit).execute()
+            return response.data
             
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            
-            data = response.json()
-            return data.get('results', [])[:10]  # 10 ผลลัพธ์แรก
+        except Exception as e:
+            print(f"Error suggesting movies: {e}")
+            return []
+    
+    def search_tmdb_movies(self, query: str) -> List[Dict]:
+        """ค้นหาหนังใน TMDB (อ่านจาก search_result_cache ก่อนถ้ามี)"""
+        query = search_key(query)
+        if not query:
+            return []
+        
+        results = search_result_cache.get('tmdb', query)
+        if results is not None:
+            return results
+        
+        return self._fetch_tmdb_movies(query)
+    
+    def _fetch_tmdb_movies(self, query: str) -> List[Dict]:
+        """ค้นหาใน TMDB แล้วเก็บผลลง cache (ไม่เก็บเมื่อเกิดข้อผิดพลาด)"""
+        try:
+            results = self.tmdb.search_movies(query)  # 10 ผลลัพธ์แรก
+            search_result_cache.set('tmdb', query, results)
+            return results
             
         except Exception as e:
             print(f"Error searching TMDB: {e}")
             return []
     
+    def search_all(self, query: str) -> Tuple[List[Dict], List[Dict], bool]:
+        """
+        ค้นหาในฐานข้อมูลและ TMDB พร้อมกัน
+
+        Returns:
+            (ผลจากฐานข้อมูล, ผลจาก TMDB, TMDB ตอบไม่ทัน SEARCH_TMDB_DEADLINE หรือไม่)
+        """
+        query = search_key(query)
+        if not query:
+            return [], [], False
+        
+        # ผล TMDB ที่อยู่ใน cache ไม่ต้องส่งไป thread pool
+        tmdb_results = search_result_cache.get('tmdb', query)
+        if tmdb_results is not None:
+            return self.search_movies(query), tmdb_results, False
+        
+        deadline = time.monotonic() + SEARCH_TMDB_DEADLINE
+        tmdb_future = tmdb_search_executor.submit(self._fetch_tmdb_movies, query)
+        
+        db_movies = self.search_movies(query)
+        
+        try:
+            tmdb_results = tmdb_future.result(timeout=max(0, deadline - time.monotonic()))
+            return db_movies, tmdb_results, False
+            
+        except FuturesTimeoutError:
+            # request ไปยัง TMDB ยังทำต่อใน background จนหมด timeout ของ client
+            tmdb_future.cancel()
+            print(f"TMDB search timed out after {SEARCH_TMDB_DEADLINE}s: {query}")
+            return db_movies, [], True
+    
     def get_movie_by_tmdb_id(self, tmdb_id: int) -> Optional[Dict]:
         """ตรวจสอบว่าหนังมีอยู่ในฐานข้อมูลแล้วหรือไม่"""
         try:
@@ -409,6 +447,43 @@ except Exception as e:
     print(f"Failed to initialize movie manager: {e}")
     movie_manager = None
 
+# สร้าง search / suggest index ในหน่วยความจำเบื้องหลัง (ใช้ฐานข้อมูลจนกว่าจะพร้อม)
+if movie_manager and SEARCH_INDEX_ENABLED:
+    search_index.start(movie_manager.supabase)
+if movie_manager and SUGGEST_INDEX_ENABLED:
+    suggest_index.start(movie_manager.supabase)
+
+def render_movie_card(movie: Dict) -> Markup:
+    """render movie card (ใช้ fragment cache ตาม id, updated_at และ poster URL)"""
+    # ใช้ poster ในเครื่องถ้ามี ไม่เช่นนั้นใช้ TMDB CDN และดาวน์โหลดเบื้องหลัง
+    poster_url = poster_prefetcher.poster_url(movie.get('poster_path', ''), movie.get('tmdb_id', 0))
+    cache_key = (movie.get('id'), movie.get('updated_at'), poster_url)
+    
+    card_html = movie_card_cache.get(cache_key)
+    if card_html is not None:
+        return card_html
+    
+    try:
+        movie['poster_url'] = poster_url
+        movie.update(get_display_fields(movie))
+        
+        # จัดรูปแบบ streaming providers
+        providers_data = movie.get('streaming_providers', {})
+        movie['formatted_providers'] = format_streaming_providers(providers_data)
+    except Exception as e:
+        print(f"Error processing movie {movie.get('title', 'Unknown')}: {e}")
+        # ใช้ค่าเริ่มต้นหากเกิดข้อผิดพลาด (ไม่เก็บลง cache)
+        movie['poster_url'] = '/static/images/no-poster.jpg'
+        movie['formatted_genres'] = 'ไม่ระบุประเภท'
+        movie['formatted_cast'] = 'ไม่ระบุนักแสดง'
+        movie['formatted_year'] = 'ไม่ระบุปี'
+        movie['formatted_providers'] = {'streaming': [], 'rent': [], 'buy': [], 'has_providers': False}
+        return Markup(render_template('partials/movie_card.html', movie=movie))
+    
+    card_html = Markup(render_template('partials/movie_card.html', movie=movie))
+    movie_card_cache.set(cache_key, card_html)
+    return card_html
+
 @app.route('/')
 def index():
     """หน้าแรก"""
@@ -418,29 +493,9 @@ def index():
     try:
         movies = movie_manager.list_all_movies(10)
         
-        # เพิ่มข้อมูล poster และ providers สำหรับแต่ละหนัง
+        # ใช้ card ที่ render ไว้แล้วถ้าหนังยังไม่ถูกอัปเดต
         for movie in movies:
-            try:
-                # ดาวน์โหลดและบันทึก poster
-                movie['poster_url'] = download_and_save_poster(
-                    movie.get('poster_path', ''), 
-                    movie.get('tmdb_id', 0)
-                )
-                movie['formatted_genres'] = format_genres(movie.get('genres', []))
-                movie['formatted_cast'] = format_cast(movie.get('cast_data', []))
-                movie['formatted_year'] = format_year(movie.get('year', ''))
-                
-                # จัดรูปแบบ streaming providers
-                providers_data = movie.get('streaming_providers', {})
-                movie['formatted_providers'] = format_streaming_providers(providers_data)
-            except Exception as e:
-                print(f"Error processing movie {movie.get('title', 'Unknown')}: {e}")
-                # ใช้ค่าเริ่มต้นหากเกิดข้อผิดพลาด
-                movie['poster_url'] = '/static/images/no-poster.jpg'
-                movie['formatted_genres'] = 'ไม่ระบุประเภท'
-                movie['formatted_cast'] = 'ไม่ระบุนักแสดง'
-                movie['formatted_year'] = 'ไม่ระบุปี'
-                movie['formatted_providers'] = {'streaming': [], 'rent': [], 'buy': [], 'has_providers': False}
+            movie['card_html'] = render_movie_card(movie)
         
         return render_template('index.html', movies=movies)
     except Exception as e:
@@ -453,33 +508,25 @@ def movies():
         return render_template('error.html', message="Failed to connect to database")
     
     try:
-        movies = movie_manager.list_all_movies(50)
+        # cursor ที่ไม่ถูกต้องจะกลับไปหน้าแรก
+        page = movie_manager.list_movies_page(
+            clamp_page_size(request.args.get('limit')),
+            decode_cursor(request.args.get('cursor', ''))
+        )
+        movies = page['movies']
         
-        # เพิ่มข้อมูล poster และ providers สำหรับแต่ละหนัง
+        # ใช้ card ที่ render ไว้แล้วถ้าหนังยังไม่ถูกอัปเดต
         for movie in movies:
-            try:
-                # ดาวน์โหลดและบันทึก poster
-                movie['poster_url'] = download_and_save_poster(
-                    movie.get('poster_path', ''), 
-                    movie.get('tmdb_id', 0)
-                )
-                movie['formatted_genres'] = format_genres(movie.get('genres', []))
-                movie['formatted_cast'] = format_cast(movie.get('cast_data', []))
-                movie['formatted_year'] = format_year(movie.get('year', ''))
-                
-                # จัดรูปแบบ streaming providers
-                providers_data = movie.get('streaming_providers', {})
-                movie['formatted_providers'] = format_streaming_providers(providers_data)
-            except Exception as e:
-                print(f"Error processing movie {movie.get('title', 'Unknown')}: {e}")
-                # ใช้ค่าเริ่มต้นหากเกิดข้อผิดพลาด
-                movie['poster_url'] = '/static/images/no-poster.jpg'
-                movie['formatted_genres'] = 'ไม่ระบุประเภท'
-                movie['formatted_cast'] = 'ไม่ระบุนักแสดง'
-                movie['formatted_year'] = 'ไม่ระบุปี'
-                movie['formatted_providers'] = {'streaming': [], 'rent': [], 'buy': [], 'has_providers': False}
-        
-        return render_template('movies.html', movies=movies)
+            movie['card_html'] = render_movie_card(movie)
+        
+        response = make_response(render_template(
+            'movies.html',
+            movies=movies,
+            next_cursor=page['next_cursor'],
+            prev_cursor=page['prev_cursor'],
+            page_size=request.args.get('limit', type=int)
+        ))
+        return cacheable(response, 'list', latest_timestamp(movie.get('updated_at') for movie in movies))
     except Exception as e:
         return render_template('error.html', message=f"Error loading movies: {str(e)}")
 
@@ -494,20 +541,9 @@ def movie_detail(movie_id):
         if not movie:
             return render_template('error.html', message="Movie not found")
         
-        # เพิ่มข้อมูล poster และ providers
-        movie['poster_url'] = download_and_save_poster(
-            movie.get('poster_path', ''), 
-            movie.get('tmdb_id', 0)
-        )
-        movie['formatted_genres'] = format_genres(movie.get('genres', []))
-        movie['formatted_cast'] = format_cast(movie.get('cast_data', []))
-        movie['formatted_year'] = format_year(movie.get('year', ''))
-        
-        # จัดรูปแบบ streaming providers
-        providers_data = movie.get('streaming_providers', {})
-        movie['formatted_providers'] = format_streaming_providers(providers_data)
-        
-        return render_template('movie_detail.html', movie=movie)
+        # get_movie_from_database จัดรูปแบบข้อมูลและ poster URL ไว้ให้แล้ว
+        response = make_response(render_template('movie_detail.html', movie=movie))
+        return cacheable(response, 'detail', movie.updated_at)
     except Exception as e:
         return render_template('error.html', message=f"Error loading movie: {str(e)}")
 
@@ -522,13 +558,11 @@ def search():
         return render_template('error.html', message="Failed to connect to database")
     
     try:
-        # ค้นหาในฐานข้อมูล
-        db_movies = movie_manager.search_movies(query)
-        
-        # ค้นหาใน TMDB
-        tmdb_results = movie_manager.search_tmdb_movies(query)
+        # ค้นหาในฐานข้อมูลและ TMDB พร้อมกัน
+        db_movies, tmdb_results, tmdb_timed_out = movie_manager.search_all(query)
         
-        return render_template('search.html', movies=db_movies, tmdb_results=tmdb_results, query=query)
+        return render_template('search.html', movies=db_movies, tmdb_results=tmdb_results, query=query,
+                               tmdb_timed_out=tmdb_timed_out)
     except Exception as e:
         return render_template('error.html', message=f"Error searching: {str(e)}")
 
@@ -568,18 +602,9 @@ def import_movie():
 @app.route('/api/import/<int:movie_id>')
 def api_import_movie(movie_id):
     """API สำหรับนำเข้าข้อมูล"""
+    # IP, User-Agent และ rate limit ถูกตรวจแล้วใน security_gate (before_request)
     try:
-        # 1. ตรวจสอบ Rate Limit
-        client_ip = get_client_ip()
-        rate_limit_ok, rate_limit_msg = check_rate_limit(client_ip)
-        if not rate_limit_ok:
-            return jsonify({
-                'success': False,
-                'message': f'Rate limit exceeded: {rate_limit_msg}',
-                'error_type': 'rate_limit'
-            }), 429
-        
-        # 2. ตรวจสอบความถูกต้องของ Movie ID
+        # 1. ตรวจสอบความถูกต้องของ Movie ID
         if not validate_movie_id(movie_id):
             return jsonify({
                 'success': False,
@@ -587,16 +612,7 @@ def api_import_movie(movie_id):
                 'error_type': 'invalid_id'
             }), 400
         
-        # 3. ตรวจสอบ User-Agent (ป้องกัน bot)
-        user_agent = request.headers.get('User-Agent', '')
-        if not user_agent or 'bot' in user_agent.lower():
-            return jsonify({
-                'success': False,
-                'message': 'Invalid request',
-                'error_type': 'invalid_agent'
-            }), 403
-        
-        # 4. ตรวจสอบการเชื่อมต่อ database
+        # 2. ตรวจสอบการเชื่อมต่อ database
         if not movie_manager:
             return jsonify({
                 'success': False,
@@ -604,7 +620,7 @@ def api_import_movie(movie_id):
                 'error_type': 'database_error'
             }), 500
         
-        # 5. ตรวจสอบว่าหนังซ้ำหรือไม่
+        # 3. ตรวจสอบว่าหนังซ้ำหรือไม่
         existing_movie = movie_manager.get_movie_by_tmdb_id(movie_id)
         if existing_movie:
             return jsonify({
@@ -613,17 +629,18 @@ def api_import_movie(movie_id):
                 'error_type': 'duplicate'
             }), 409
         
-        # 6. นำเข้าข้อมูล
+        # 4. นำเข้าข้อมูล
         result = movie_manager.import_movie(movie_id)
         
         if result['success']:
+            request_counts = security_gate.rate_limit_counts('import', get_client_ip())
             return jsonify({
                 'success': True,
                 'message': result['message'],
                 'movie_id': result.get('movie_id'),
                 'rate_limit_info': {
-                    'requests_this_minute': len([t for t in rate_limit_storage[client_ip] if time.time() - t < 60]),
-                    'requests_this_hour': len(rate_limit_storage[client_ip])
+                    'requests_this_minute': request_counts['per_minute'],
+                    'requests_this_hour': request_counts['per_hour']
                 }
             })
         else:
@@ -648,9 +665,24 @@ def api_movies():
     if not movie_manager:
         return jsonify({'success': False, 'message': 'Failed to connect to database'})
     
+    cursor = None
+    if request.args.get('cursor'):
+        cursor = decode_cursor(request.args['cursor'])
+        if not cursor:
+            return jsonify({'success': False, 'message': 'Invalid cursor'}), 400
+    
     try:
-        movies = movie_manager.list_all_movies(50)
-        return jsonify({'success': True, 'movies': movies})
+        page_size = clamp_page_size(request.args.get('limit'))
+        page = movie_manager.list_movies_page(page_size, cursor)
+        movies = page['movies']
+        response = jsonify({
+            'success': True,
+            'movies': movies,
+            'page_size': page_size,
+            'next_cursor': page['next_cursor'],
+            'prev_cursor': page['prev_cursor']
+        })
+        return cacheable(response, 'list', latest_timestamp(movie.get('updated_at') for movie in movies))
     except Exception as e:
         return jsonify({'success': False, 'message': f'Error: {str(e)}'})
 
@@ -694,6 +726,21 @@ def api_search():
             'error': str(e)
         }), 500
 
+@app.route('/api/suggest')
+def api_suggest():
+    """API สำหรับ autocomplete ชื่อหนัง (คืนเฉพาะ id, title, year)"""
+    query = request.args.get('q', '').strip()
+    if not query:
+        return jsonify({'success': True, 'suggestions': []})
+    
+    if not movie_manager:
+        return jsonify({'success': False, 'message': 'Failed to connect to database'})
+    
+    limit = max(1, min(request.args.get('limit', 8, type=int), 20))
+    suggestions = movie_manager.suggest_movies(query, limit)
+    response = jsonify({'success': True, 'suggestions': suggestions})
+    return cacheable(response, 'suggest')
+
 @app.route('/api/movie/<int:movie_id>')
 def api_movie_detail(movie_id):
     """API สำหรับดึงข้อมูลหนังรายละเอียด"""
@@ -727,10 +774,11 @@ def api_movie_detail(movie_id):
             'formatted_providers': movie.formatted_providers
         }
         
-        return jsonify({
+        response = jsonify({
             'success': True,
             'movie': formatted_movie
         })
+        return cacheable(response, 'detail', movie.updated_at)
         
     except Exception as e:
         return jsonify({
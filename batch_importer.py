@@ -0,0 +1,243 @@
+"""
+Batch Importer for Movie Info App
+นำเข้าหนังจาก TMDB ทีละหลายเรื่องพร้อมกัน และบันทึกลง Supabase ทีละ chunk
+"""
+
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from movie_store import upsert_movies
+from security_store import StoredMap, security_state_store
+from update_manager import MovieUpdateManager
+
+BATCH_IMPORT_WORKERS = int(os.getenv('BATCH_IMPORT_WORKERS', '8'))
+BATCH_IMPORT_CHUNK_SIZE = int(os.getenv('BATCH_IMPORT_CHUNK_SIZE', '100'))
+
+# ขีดจำกัดของงานที่สั่งผ่านหน้า admin
+BATCH_IMPORT_MAX_IDS = int(os.getenv('BATCH_IMPORT_MAX_IDS', '5000'))
+BATCH_IMPORT_MAX_WORKERS = 32
+BATCH_IMPORT_MAX_CHUNK_SIZE = 500
+
+# สถานะงานเก็บไว้นานเท่านี้ (วินาที) และเก็บรายการที่ล้มเหลวไม่เกินจำนวนนี้ต่องาน
+BATCH_JOB_TTL = 86400
+BATCH_JOB_MAX_FAILURES = 100
+
+
+class BatchImporter:
+    """
+    นำเข้าหนังหลายเรื่องด้วย thread pool
+
+    จำนวน request ไป TMDB ถูกควบคุมโดย TMDBRateGovernor ที่ใช้ร่วมกันทุก process
+    """
+
+    def __init__(self, manager: Optional[MovieUpdateManager] = None,
+                 workers: int = BATCH_IMPORT_WORKERS, chunk_size: int = BATCH_IMPORT_CHUNK_SIZE):
+        self.manager = manager or MovieUpdateManager()
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+
+    def fetch_movie(self, tmdb_id: int) -> Dict:
+        """ดึงและแปลงข้อมูลหนัง 1 เรื่องจาก TMDB"""
+        try:
+            movie_data = self.manager.get_movie_from_tmdb(tmdb_id)
+            if not movie_data:
+                return {'tmdb_id': tmdb_id, 'success': False, 'message': 'Failed to fetch data from TMDB'}
+
+            return {'tmdb_id': tmdb_id, 'success': True, 'data': self.manager.extract_movie_data(movie_data)}
+
+        except Exception as e:
+            return {'tmdb_id': tmdb_id, 'success': False, 'message': f'Error fetching movie: {str(e)}'}
+
+    def save_chunk(self, movies: List[Dict]) -> Dict[int, int]:
+        """บันทึกหนังทั้ง chunk ด้วย upsert ครั้งเดียว คืนค่า {tmdb_id: database id}"""
+        return upsert_movies(self.manager.supabase, movies)
+
+    def import_ids(self, tmdb_ids: List[int], on_progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        นำเข้าหนังตาม TMDB IDs และคืนผลลัพธ์รายเรื่อง
+
+        Args:
+            on_progress: เรียกหลังบันทึกแต่ละ chunk ด้วย {'done', 'imported', 'failed'}
+        """
+        start_time = time.perf_counter()
+
+        # ตัด ID ซ้ำออกโดยคงลำดับเดิม
+        tmdb_ids = list(dict.fromkeys(int(tmdb_id) for tmdb_id in tmdb_ids))
+
+        results = []
+        imported_count = 0
+        failed_count = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for offset in range(0, len(tmdb_ids), self.chunk_size):
+                chunk = tmdb_ids[offset:offset + self.chunk_size]
+                fetched = list(executor.map(self.fetch_movie, chunk))
+
+                movies = [item['data'] for item in fetched if item['success']]
+                saved_ids = {}
+                save_error = None
+                if movies:
+                    try:
+                        saved_ids = self.save_chunk(movies)
+                    except Exception as e:
+                        save_error = f'Failed to save movie to database: {str(e)}'
+
+                for item in fetched:
+                    tmdb_id = item['tmdb_id']
+                    title = item['data']['title'] if item['success'] else None
+
+                    if not item['success']:
+                        result = {'success': False, 'message': item['message']}
+                    elif tmdb_id in saved_ids:
+                        result = {
+                            'success': True,
+                            'message': f'Successfully imported: {title}',
+                            'movie_id': saved_ids[tmdb_id]
+                        }
+                    else:
+                        result = {'success': False, 'message': save_error or 'Failed to save movie to database'}
+
+                    if result['success']:
+                        imported_count += 1
+                    else:
+                        failed_count += 1
+
+                    results.append({'tmdb_id': tmdb_id, 'title': title, 'result': result})
+
+                print(f"📦 Chunk {offset // self.chunk_size + 1}: "
+                      f"{len(saved_ids)}/{len(chunk)} saved ({imported_count + failed_count}/{len(tmdb_ids)} done)")
+                if on_progress:
+                    on_progress({'done': imported_count + failed_count, 'imported': imported_count, 'failed': failed_count})
+
+        elapsed = time.perf_counter() - start_time
+        items_per_sec = round(len(tmdb_ids) / elapsed, 2) if elapsed > 0 else 0
+
+        return {
+            'success': True,
+            'message': f'Import completed: {imported_count} imported, {failed_count} failed ({items_per_sec} items/sec)',
+            'summary': {
+                'total': len(tmdb_ids),
+                'imported': imported_count,
+                'failed': failed_count,
+                'elapsed_seconds': round(elapsed, 2),
+                'items_per_sec': items_per_sec
+            },
+            'results': results
+        }
+
+
+def normalize_tmdb_ids(tmdb_ids) -> List[int]:
+    """
+    แปลง TMDB IDs เป็น int และตัด ID ซ้ำออกโดยคงลำดับเดิม
+
+    Raises:
+        ValueError: ถ้าไม่มี ID, ID ไม่ใช่ตัวเลข หรือเกิน BATCH_IMPORT_MAX_IDS
+    """
+    tmdb_ids = list(dict.fromkeys(int(tmdb_id) for tmdb_id in tmdb_ids or []))
+    if not tmdb_ids:
+        raise ValueError('TMDB IDs required')
+    if len(tmdb_ids) > BATCH_IMPORT_MAX_IDS:
+        raise ValueError(f'Too many TMDB IDs: {len(tmdb_ids)} (max {BATCH_IMPORT_MAX_IDS})')
+    return tmdb_ids
+
+
+class BatchImportJobs:
+    """
+    รันงานนำเข้า/อัปเดตหนังของหน้า admin ใน thread เบื้องหลัง (ทีละงาน) เพื่อไม่ให้ request
+    ถูก gunicorn ตัดเมื่อเกิน timeout
+
+    สถานะงานเก็บใน security store ที่ทุก worker ใช้ร่วมกัน จึงถามสถานะจาก worker ใดก็ได้
+    """
+
+    def __init__(self, store=None, importer_factory: Callable[..., BatchImporter] = BatchImporter):
+        self.jobs = StoredMap(store or security_state_store, 'batch_import_jobs', dict, ttl=BATCH_JOB_TTL)
+        self.importer_factory = importer_factory
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='batch-import')
+
+    def submit(self, tmdb_ids: List[int], workers: int = BATCH_IMPORT_WORKERS,
+               chunk_size: int = BATCH_IMPORT_CHUNK_SIZE) -> str:
+        """
+        เพิ่มงานนำเข้าเข้าคิว
+
+        Returns:
+            job id สำหรับ get()
+
+        Raises:
+            ValueError: ถ้าไม่มี ID, ID ไม่ใช่ตัวเลข หรือเกิน BATCH_IMPORT_MAX_IDS
+        """
+        tmdb_ids = normalize_tmdb_ids(tmdb_ids)
+        workers = min(max(1, int(workers)), BATCH_IMPORT_MAX_WORKERS)
+        chunk_size = min(max(1, int(chunk_size)), BATCH_IMPORT_MAX_CHUNK_SIZE)
+
+        def run(on_progress):
+            importer = self.importer_factory(workers=workers, chunk_size=chunk_size)
+            return importer.import_ids(tmdb_ids, on_progress=on_progress)
+
+        return self.run_in_background(
+            'import',
+            run,
+            total=len(tmdb_ids),
+            imported=0,
+            failed=0,
+            workers=workers,
+            chunk_size=chunk_size
+        )
+
+    def run_in_background(self, kind: str, func: Callable[[Callable[[Dict], None]], Dict], **fields) -> str:
+        """
+        เพิ่มงานใดก็ได้เข้าคิวเดียวกับการนำเข้า (ใช้ quota ของ TMDB ร่วมกัน จึงรันทีละงาน)
+
+        Args:
+            kind: ประเภทงาน (แสดงในสถานะ)
+            func: รับ on_progress(dict) และคืนผลลัพธ์รูปแบบเดียวกับ MovieUpdateManager
+                  ({'success', 'message', 'summary', 'results' หรือ 'failures'})
+            fields: ค่าเริ่มต้นของสถานะงาน เช่น total
+
+        Returns:
+            job id สำหรับ get()
+        """
+        job_id = uuid.uuid4().hex
+        self._update(job_id, kind=kind, status='queued', done=0, created_at=time.time(), **fields)
+        self._executor.submit(self._run, job_id, func)
+        return job_id
+
+    def _update(self, job_id: str, **changes):
+        self.jobs.update(job_id, lambda job: (dict(job or {}, **changes), None))
+
+    def _run(self, job_id: str, func: Callable):
+        self._update(job_id, status='running', started_at=time.time())
+        try:
+            result = func(lambda progress: self._update(job_id, **progress))
+        except Exception as e:
+            print(f"Error running batch job {job_id}: {e}")
+            self._update(job_id, status='failed', message=f'Error: {str(e)}', finished_at=time.time())
+            return
+
+        if not result.get('success'):
+            self._update(job_id, status='failed', message=result.get('message'), finished_at=time.time())
+            return
+
+        failures = result.get('failures')
+        if failures is None:
+            failures = [item for item in result.get('results', []) if not item['result']['success']]
+        self._update(
+            job_id,
+            status='completed',
+            message=result['message'],
+            summary=result.get('summary'),
+            failures=failures[:BATCH_JOB_MAX_FAILURES],
+            finished_at=time.time()
+        )
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        """สถานะของงาน (None ถ้าไม่มีหรือหมดอายุ)"""
+        if job_id not in self.jobs:
+            return None
+        return dict(self.jobs[job_id], job_id=job_id)
+
+
+# Global instance
+batch_import_jobs = BatchImportJobs()
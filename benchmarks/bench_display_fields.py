@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Display Fields
+เปรียบเทียบเวลาต่อแถวของหน้า /movies ระหว่างแถวที่ต้องจัดรูปแบบตอน render (แบบเดิม)
+กับแถวที่มี display fields ที่คำนวณไว้ตอนบันทึกแล้ว
+
+ใช้ข้อมูลจำลองแทน Supabase จึงวัดเฉพาะงานใน process ของแอป
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault('SUPABASE_URL', 'http://127.0.0.1:9')
+os.environ.setdefault('SUPABASE_ANON_KEY', 'bench')
+os.environ.setdefault('TMDB_API_KEY', 'bench')
+os.environ.setdefault('TMDB_BASE_URL', 'http://127.0.0.1:9/3')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as movie_app
+from utils import build_display_fields, get_display_fields
+
+GENRES = ['Drama', 'Thriller', 'Crime', 'Mystery']
+
+
+def make_rows(count, precomputed):
+    """สร้างแถวจำลองแบบเดียวกับที่ list_all_movies คืนค่า"""
+    rows = []
+    for i in range(count):
+        row = {
+            'id': i + 1,
+            'tmdb_id': 1000 + i,
+            'title': f'Movie {i}',
+            'year': str(1990 + i % 30),
+            'director': 'Director',
+            # แถวเก่าบางส่วนเก็บ genres เป็น JSON string
+            'genres': json.dumps(GENRES) if i % 2 else list(GENRES),
+            'created_at': '2025-01-01T00:00:00+00:00',
+            'poster_path': None,
+            'streaming_providers': {'streaming': [{'provider_id': 8, 'provider_name': 'Netflix', 'logo_path': ''}]}
+        }
+        if precomputed:
+            display = build_display_fields(row)
+            row['display_year'] = display['display_year']
+            row['display_genres'] = display['display_genres']
+        rows.append(row)
+    return rows
+
+
+def run_route(client, rows, iterations):
+    """เวลาต่อแถวของ GET /movies (µs)"""
+    movie_app.movie_manager.list_all_movies = lambda limit=50: [dict(row) for row in rows]
+
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        response = client.get('/movies')
+        samples.append((time.perf_counter() - start) * 1e6 / len(rows))
+        assert response.status_code == 200
+    return samples
+
+
+def run_formatting(rows, iterations):
+    """เวลาต่อแถวของขั้นตอนจัดรูปแบบอย่างเดียว (µs)"""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        for row in rows:
+            get_display_fields(row)
+        samples.append((time.perf_counter() - start) * 1e6 / len(rows))
+    return samples
+
+
+def report(label, samples):
+    print(f"{label:<34} median={statistics.median(samples):8.2f} µs/row   mean={statistics.mean(samples):8.2f} µs/row")
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark /movies rendering with and without precomputed display fields')
+    parser.add_argument('--rows', type=int, default=50, help='Rows per page (default: 50)')
+    parser.add_argument('--iterations', type=int, default=300, help='Number of page renders (default: 300)')
+    args = parser.parse_args()
+
+    if not movie_app.movie_manager:
+        print("❌ movie manager failed to initialize")
+        return
+
+    before_rows = make_rows(args.rows, precomputed=False)
+    after_rows = make_rows(args.rows, precomputed=True)
+    client = movie_app.app.test_client()
+
+    # warm up (template compile, provider logo manifest)
+    run_route(client, after_rows, 5)
+
+    print(f"📊 /movies cost per row ({args.rows} rows, {args.iterations} renders)")
+    print("-" * 80)
+    before = report('formatting only, before', run_formatting(before_rows, args.iterations))
+    after = report('formatting only, after', run_formatting(after_rows, args.iterations))
+    print(f"formatting speedup: {before / after:.2f}x")
+    print("-" * 80)
+    before = report('GET /movies, before', run_route(client, before_rows, args.iterations))
+    after = report('GET /movies, after', run_route(client, after_rows, args.iterations))
+    print(f"route speedup: {before / after:.2f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Benchmark: IP Ranges
+เวลาค้นหา IP ใน blacklist แบบ CIDR ด้วย prefix tree เทียบกับการไล่ตรวจทีละช่วง
+ที่ขนาดรายการ 10 / 1k / 100k ช่วง (IPv4 และ IPv6)
+"""
+
+import argparse
+import ipaddress
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ip_ranges import IPRangeSet
+from security_store import MemoryStateStore
+
+
+def make_ranges(count, rng):
+    """ช่วง /16 - /32 ของ IPv4 และ /32 - /128 ของ IPv6 อย่างละครึ่ง"""
+    ranges = []
+    for i in range(count):
+        if i % 2:
+            prefix = rng.randint(16, 32)
+            network = ipaddress.IPv4Network((rng.getrandbits(32), prefix), strict=False)
+        else:
+            prefix = rng.randint(32, 128)
+            network = ipaddress.IPv6Network((rng.getrandbits(128), prefix), strict=False)
+        ranges.append(str(network))
+    return ranges
+
+
+def make_addresses(count, rng):
+    addresses = []
+    for i in range(count):
+        if i % 2:
+            addresses.append(str(ipaddress.IPv4Address(rng.getrandbits(32))))
+        else:
+            addresses.append(str(ipaddress.IPv6Address(rng.getrandbits(128))))
+    return addresses
+
+
+def percentiles(samples):
+    samples.sort()
+    return statistics.median(samples), samples[int(0.99 * (len(samples) - 1))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark CIDR blacklist lookups')
+    parser.add_argument('--sizes', default='10,1000,100000', help='Comma separated range counts')
+    parser.add_argument('--lookups', type=int, default=5000, help='Lookups per size (default: 5000)')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    addresses = make_addresses(args.lookups, rng)
+
+    for size in [int(value) for value in args.sizes.split(',')]:
+        ranges = make_ranges(size, rng)
+        print(f"\n📊 {size:,} ranges, {args.lookups:,} lookups")
+        print("-" * 80)
+
+        store = MemoryStateStore(sweep_interval=0)
+        loader = IPRangeSet(store, 'ip_blacklist')
+        loader.match(addresses[0])
+        start = time.perf_counter()
+        loader.add_many(ranges)
+        print(f"{'bulk load (same worker)':<24} {(time.perf_counter() - start) * 1000:10.1f} ms")
+
+        # worker อื่นสร้าง tree ใหม่จาก store ในการค้นหาครั้งแรกหลังการแก้ไข
+        ip_set = IPRangeSet(store, 'ip_blacklist')
+        start = time.perf_counter()
+        ip_set.match(addresses[0])
+        print(f"{'rebuild (other worker)':<24} {(time.perf_counter() - start) * 1000:10.1f} ms")
+
+        samples = []
+        for address in addresses:
+            start = time.perf_counter()
+            ip_set.match(address)
+            samples.append((time.perf_counter() - start) * 1_000_000)
+        p50, p99 = percentiles(samples)
+        print(f"{'prefix tree':<24} p50={p50:9.2f} µs   p99={p99:9.2f} µs")
+
+        # ไล่ตรวจทุกช่วง (แบบที่ต้องทำถ้าไม่มี tree) วัดจากตัวอย่างส่วนน้อยเพราะช้า
+        networks = [ipaddress.ip_network(value) for value in ranges]
+        samples = []
+        for address in addresses[:max(20, args.lookups * 1000 // max(size, 1000))]:
+            start = time.perf_counter()
+            parsed = ipaddress.ip_address(address)
+            any(parsed in network for network in networks)
+            samples.append((time.perf_counter() - start) * 1_000_000)
+        p50, p99 = percentiles(samples)
+        print(f"{'linear scan':<24} p50={p50:9.2f} µs   p99={p99:9.2f} µs")
+
+
+if __name__ == '__main__':
+    main()
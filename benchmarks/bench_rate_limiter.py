@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Rate Limiter
+เปรียบเทียบเวลาต่อการตรวจสอบและหน่วยความจำระหว่าง rate limiter แบบเก็บ timestamp ทุก request
+(แบบเดิม) กับ sliding window counter ที่ 1k / 10k / 100k IP
+ทั้งแบบเก็บใน process และแบบ SQLite ที่ทุก gunicorn worker ใช้ร่วมกัน (ขนาดเป็น byte บน disk)
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from security_middleware import RateLimiter
+from security_store import SQLiteStateStore
+
+
+class ListRateLimiter:
+    """RateLimiter แบบเดิม: list ของ timestamp ต่อ IP ย้อนหลัง 24 ชั่วโมง"""
+
+    def __init__(self):
+        self.requests = defaultdict(list)
+        self.limits = {'per_minute': 10, 'per_hour': 100, 'per_day': 1000}
+
+    def check_rate_limit(self, ip_address):
+        current_time = time.time()
+        self.requests[ip_address] = [t for t in self.requests[ip_address] if current_time - t < 86400]
+        requests_last_minute = len([t for t in self.requests[ip_address] if current_time - t < 60])
+        requests_last_hour = len([t for t in self.requests[ip_address] if current_time - t < 3600])
+        requests_last_day = len(self.requests[ip_address])
+
+        if requests_last_minute >= self.limits['per_minute']:
+            return {'allowed': False}
+        if requests_last_hour >= self.limits['per_hour']:
+            return {'allowed': False}
+        if requests_last_day >= self.limits['per_day']:
+            return {'allowed': False}
+
+        self.requests[ip_address].append(current_time)
+        return {'allowed': True}
+
+
+def history(rng, count, now):
+    """timestamp ของ request ย้อนหลัง 1 วัน เรียงจากเก่าไปใหม่"""
+    return sorted(now - rng.random() * 86400 for _ in range(count))
+
+
+def populate(limiter, ips, per_ip, rng):
+    now = time.time()
+    if isinstance(limiter, ListRateLimiter):
+        for ip in ips:
+            limiter.requests[ip].extend(history(rng, per_ip, now))
+        return
+
+    # ตัวนับมีขนาดคงที่ไม่ว่าจะมีกี่ request จึงเติมเพียง 1 request ต่อ IP
+    unlimited = {name: float('inf') for name in limiter.limits}
+    for ip in ips:
+        limiter.requests.hit(ip, unlimited, now=now - rng.random() * 86400)
+
+
+def measure(factory, ips, per_ip, checks, rng):
+    directory = tempfile.TemporaryDirectory()
+    path = os.path.join(directory.name, 'security_state.sqlite3')
+
+    tracemalloc.start()
+    limiter = factory(path)
+    populate(limiter, ips, per_ip, rng)
+    memory = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    if isinstance(getattr(limiter.requests, 'store', None), SQLiteStateStore):
+        memory = sum(os.path.getsize(path + suffix) for suffix in ('', '-wal') if os.path.exists(path + suffix))
+
+    samples = []
+    for ip in rng.choices(ips, k=checks):
+        start = time.perf_counter()
+        limiter.check_rate_limit(ip)
+        samples.append((time.perf_counter() - start) * 1_000_000)
+    samples.sort()
+    directory.cleanup()
+    return statistics.median(samples), samples[int(0.99 * (len(samples) - 1))], memory / len(ips)
+
+
+IMPLEMENTATIONS = (
+    ('timestamp lists (before)', lambda path: ListRateLimiter()),
+    ('sliding window (memory)', lambda path: RateLimiter()),
+    ('sliding window (sqlite)', lambda path: RateLimiter(SQLiteStateStore(path)))
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark rate limiter implementations')
+    parser.add_argument('--sizes', default='1000,10000,100000', help='Comma separated tracked IP counts')
+    parser.add_argument('--history', type=int, default=50, help='Requests per IP in the last 24h (default: 50)')
+    parser.add_argument('--checks', type=int, default=20000, help='Checks to time per size (default: 20000)')
+    args = parser.parse_args()
+
+    for size in [int(value) for value in args.sizes.split(',')]:
+        ips = [f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}' for i in range(size)]
+        print(f"\n📊 {size:,} IPs, {args.history} requests/IP in the last 24h")
+        print("-" * 80)
+        for label, factory in IMPLEMENTATIONS:
+            p50, p99, per_ip = measure(factory, ips, args.history, args.checks, random.Random(42))
+            print(f"{label:<28} p50={p50:7.2f} µs   p99={p99:7.2f} µs   memory={per_ip:8.0f} B/IP")
+
+
+if __name__ == '__main__':
+    main()
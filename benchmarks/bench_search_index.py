@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Search Index
+เปรียบเทียบเวลาค้นหาหนังระหว่าง ilike บน title (sequential scan) กับ
+search_text + pg_trgm GIN index และ query แบบจัดอันดับของ search_movies_ranked
+ที่ขนาดตาราง 10k / 100k / 1M แถว
+
+ต้องมี Postgres ในเครื่องและ psycopg2 (pip install psycopg2-binary)
+ข้อมูลทดสอบสร้างใน schema bench_search และถูกลบเมื่อจบ
+"""
+
+import argparse
+import os
+import statistics
+import time
+
+try:
+    import psycopg2
+except ImportError:  # ไม่ได้อยู่ใน requirements.txt
+    psycopg2 = None
+
+WORDS = [
+    'mission', 'impossible', 'dark', 'knight', 'star', 'wars', 'love', 'story', 'last', 'night',
+    'city', 'ghost', 'dragon', 'river', 'winter', 'summer', 'secret', 'garden', 'lost', 'world',
+    'ฝัน', 'รัก', 'เมือง', 'ผี', 'บ้าน', 'ทะเล', 'ฤดู', 'หนาว', 'คืน', 'สุดท้าย'
+]
+DIRECTORS = ['Christopher Nolan', 'Greta Gerwig', 'Bong Joon-ho', 'Apichatpong Weerasethakul', 'Denis Villeneuve']
+ACTORS = ['Tom Cruise', 'Hayley Atwell', 'Tony Jaa', 'Mario Maurer', 'Florence Pugh', 'Song Kang-ho']
+
+QUERIES = ['knight', 'impossible', 'garden', 'ผี', 'nolan', 'tom cruise', 'wintr', 'star wars']
+
+RANKED_QUERY = """
+    WITH q AS (
+        SELECT lower(trim(%(query)s)) AS term,
+               '%%' || replace(replace(replace(lower(trim(%(query)s)), '\\', '\\\\'), '%%', '\\%%'), '_', '\\_') || '%%' AS pattern
+    )
+    SELECT m.id, m.title
+    FROM bench_search.movies m, q
+    WHERE m.search_text ILIKE q.pattern
+       OR q.term <%% m.search_text
+    ORDER BY lower(m.title) = q.term DESC,
+             word_similarity(q.term, lower(m.title)) DESC,
+             word_similarity(q.term, m.search_text) DESC,
+             m.id DESC
+    LIMIT 10
+"""
+
+STRATEGIES = {
+    'ilike title (before)': "SELECT id, title FROM bench_search.movies WHERE title ILIKE %(pattern)s LIMIT 10",
+    'ilike search_text + trgm': "SELECT id, title FROM bench_search.movies WHERE search_text ILIKE %(pattern)s LIMIT 10",
+    'ranked (search_movies_ranked)': RANKED_QUERY
+}
+
+
+def create_table(cursor, rows):
+    """สร้างตารางทดสอบขนาด rows แถว (ข้อมูลกำหนดได้แน่นอน ไม่สุ่ม)"""
+    cursor.execute("DROP SCHEMA IF EXISTS bench_search CASCADE")
+    cursor.execute("CREATE SCHEMA bench_search")
+    cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    cursor.execute("""
+        CREATE TABLE bench_search.movies (
+            id SERIAL PRIMARY KEY,
+            title TEXT NOT NULL,
+            original_title TEXT,
+            director TEXT,
+            search_text TEXT
+        )
+    """)
+    cursor.execute("""
+        INSERT INTO bench_search.movies (title, original_title, director, search_text)
+        SELECT t.title, t.title, t.director,
+               lower(concat_ws(' ', t.title, t.title, t.director, t.actor))
+        FROM (
+            SELECT initcap(%(words)s[1 + (i * 7) %% cardinality(%(words)s)] || ' ' ||
+                           %(words)s[1 + (i * 13) %% cardinality(%(words)s)]) || ' ' || i AS title,
+                   %(directors)s[1 + i %% cardinality(%(directors)s)] AS director,
+                   %(actors)s[1 + (i * 3) %% cardinality(%(actors)s)] AS actor
+            FROM generate_series(1, %(rows)s) AS i
+        ) AS t
+    """, {'words': WORDS, 'directors': DIRECTORS, 'actors': ACTORS, 'rows': rows})
+
+    # index เดิมใน setup_supabase_updated.sql และ index ใหม่จาก migration
+    cursor.execute("CREATE INDEX ON bench_search.movies (title)")
+    cursor.execute("CREATE INDEX ON bench_search.movies USING GIN (search_text gin_trgm_ops)")
+    cursor.execute("ANALYZE bench_search.movies")
+
+
+def plan_node(cursor, sql, params):
+    """ชนิดของ scan ที่ planner เลือก"""
+    cursor.execute("EXPLAIN " + sql, params)
+    plan = ' '.join(row[0] for row in cursor.fetchall())
+    for node in ('Bitmap Index Scan', 'Index Scan', 'Seq Scan'):
+        if node in plan:
+            return node
+    return '?'
+
+
+def run_strategy(cursor, sql, repeat):
+    samples = []
+    for _ in range(repeat):
+        for query in QUERIES:
+            params = {'query': query, 'pattern': f'%{query}%'}
+            start = time.perf_counter()
+            cursor.execute(sql, params)
+            cursor.fetchall()
+            samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    p95 = samples[min(len(samples) - 1, int(round(0.95 * (len(samples) - 1))))]
+    return statistics.median(samples), p95
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark movie search strategies against a local Postgres')
+    parser.add_argument('--dsn', default=os.getenv('DATABASE_URL', 'dbname=postgres'),
+                        help='Postgres connection string (default: $DATABASE_URL or dbname=postgres)')
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='Comma separated row counts')
+    parser.add_argument('--repeat', type=int, default=5, help='Times to run each query set (default: 5)')
+    args = parser.parse_args()
+
+    if psycopg2 is None:
+        print("❌ psycopg2 is required: pip install psycopg2-binary")
+        return
+
+    connection = psycopg2.connect(args.dsn)
+    connection.autocommit = True
+    cursor = connection.cursor()
+
+    try:
+        for rows in [int(size) for size in args.sizes.split(',')]:
+            print(f"\n📊 {rows:,} rows ({len(QUERIES)} queries x {args.repeat})")
+            print("-" * 80)
+            start = time.perf_counter()
+            create_table(cursor, rows)
+            print(f"{'load + index':<32} {time.perf_counter() - start:8.1f} s")
+
+            for label, sql in STRATEGIES.items():
+                node = plan_node(cursor, sql, {'query': QUERIES[0], 'pattern': f'%{QUERIES[0]}%'})
+                p50, p95 = run_strategy(cursor, sql, args.repeat)
+                print(f"{label:<32} p50={p50:8.2f} ms   p95={p95:8.2f} ms   ({node})")
+    finally:
+        cursor.execute("DROP SCHEMA IF EXISTS bench_search CASCADE")
+        connection.close()
+
+
+if __name__ == '__main__':
+    main()
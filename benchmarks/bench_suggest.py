@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: Suggest
+วัด latency ของ autocomplete (/api/suggest) จาก prefix index ในหน่วยความจำ
+ทั้งเฉพาะการค้นใน index และผ่าน Flask ทั้ง request (เป้าหมาย p99 < 5 ms)
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+os.environ.setdefault('SUPABASE_URL', 'http://127.0.0.1:9')
+os.environ.setdefault('SUPABASE_ANON_KEY', 'bench')
+os.environ.setdefault('TMDB_API_KEY', 'bench')
+os.environ.setdefault('TMDB_BASE_URL', 'http://127.0.0.1:9/3')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as movie_app
+from search_index import search_index
+
+WORDS = [
+    'the', 'dark', 'knight', 'star', 'wars', 'love', 'story', 'last', 'night', 'city', 'ghost', 'dragon',
+    'river', 'winter', 'secret', 'garden', 'lost', 'world', 'mission', 'impossible',
+    'รัก', 'เมือง', 'ผี', 'บ้าน', 'ทะเล', 'หนาว', 'คืน', 'สุดท้าย', 'ฉลาด', 'เกมส์'
+]
+
+
+def make_rows(count, rng):
+    rows = []
+    for movie_id in range(1, count + 1):
+        title = ' '.join(rng.choice(WORDS) for _ in range(rng.randint(1, 4))).title()
+        rows.append({'id': movie_id, 'title': f'{title} {movie_id}', 'original_title': title,
+                     'year': str(rng.randint(1950, 2025)), 'director': '', 'genres': [], 'cast_data': []})
+    return rows
+
+
+def make_queries(rows, count, rng):
+    """prefix ความยาว 2-8 ตัวอักษรของ title จริง (แบบเดียวกับที่พิมพ์ใน popup)"""
+    queries = []
+    for _ in range(count):
+        title = rng.choice(rows)['title']
+        queries.append(title[:rng.randint(2, min(8, len(title)))])
+    return queries
+
+
+def report(label, samples):
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(round(0.99 * (len(samples) - 1))))]
+    print(f"{label:<24} p50={statistics.median(samples):8.3f} ms   p99={p99:8.3f} ms   max={samples[-1]:8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark /api/suggest latency')
+    parser.add_argument('--movies', type=int, default=100000, help='Catalog size (default: 100000)')
+    parser.add_argument('--queries', type=int, default=5000, help='Number of prefixes (default: 5000)')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    rows = make_rows(args.movies, rng)
+    queries = make_queries(rows, args.queries, rng)
+
+    start = time.perf_counter()
+    search_index.build(rows)
+    print(f"📊 {args.movies:,} movies, {len(search_index._suggest):,} prefix keys "
+          f"(built in {time.perf_counter() - start:.2f}s), {args.queries:,} prefixes")
+    print("-" * 80)
+
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        search_index.suggest(query)
+        samples.append((time.perf_counter() - start) * 1000)
+    report('index only', samples)
+
+    client = movie_app.app.test_client()
+    samples = []
+    for query in queries:
+        start = time.perf_counter()
+        response = client.get('/api/suggest', query_string={'q': query})
+        samples.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200
+    report('GET /api/suggest', samples)
+
+
+if __name__ == '__main__':
+    main()
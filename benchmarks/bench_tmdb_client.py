@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Benchmark: TMDB Client
+เปรียบเทียบ latency ของการ import (movie + watch providers) ระหว่าง
+requests.get แบบเดิม กับ TMDBClient ที่ใช้ connection pool
+
+ใช้ stub server ในเครื่อง จึงวัดเฉพาะ TCP handshake ที่ประหยัดได้
+(กับ TMDB จริงจะประหยัด TLS handshake เพิ่มอีก)
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from tmdb_client import TMDBClient
+
+MOVIE_PAYLOAD = json.dumps({
+    'id': 550,
+    'title': 'Fight Club',
+    'original_title': 'Fight Club',
+    'release_date': '1999-10-15',
+    'poster_path': '/pB8BM7pdSp6B6Ih7QZ4DrQ3PmJK.jpg',
+    'genres': [{'id': 18, 'name': 'Drama'}],
+    'credits': {'cast': [{'name': 'Brad Pitt', 'character': 'Tyler Durden'}], 'crew': []},
+    'videos': {'results': []}
+}).encode()
+
+PROVIDERS_PAYLOAD = json.dumps({
+    'id': 550,
+    'results': {'TH': {'flatrate': [{'provider_id': 8, 'provider_name': 'Netflix', 'logo_path': '/t2yyOv40HZeVlLjYsCsPHnWLk4W.jpg'}]}}
+}).encode()
+
+
+class StubTMDBHandler(BaseHTTPRequestHandler):
+    """Stub ของ TMDB API ที่รองรับ keep-alive"""
+
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = PROVIDERS_PAYLOAD if '/watch/providers' in self.path else MOVIE_PAYLOAD
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def percentile(samples, pct):
+    """คำนวณ percentile จากรายการเวลา"""
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def import_with_bare_requests(base_url, movie_id):
+    """รูปแบบเดิม: requests.get ใหม่ทุกครั้ง"""
+    params = {'api_key': 'bench', 'append_to_response': 'credits,videos'}
+    requests.get(f"{base_url}/movie/{movie_id}", params=params, timeout=30).json()
+    requests.get(f"{base_url}/movie/{movie_id}/watch/providers", params={'api_key': 'bench'}, timeout=30).json()
+
+
+def import_with_client(client, movie_id):
+    """รูปแบบใหม่: ใช้ TMDBClient ที่มี connection pool"""
+    client.get_movie(movie_id)
+    client.get_streaming_providers(movie_id)
+
+
+def run(label, func, iterations):
+    samples = []
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(550 + i)
+        samples.append((time.perf_counter() - start) * 1000)
+
+    print(f"{label:<22} p50={statistics.median(samples):7.3f} ms   "
+          f"p99={percentile(samples, 99):7.3f} ms   mean={statistics.mean(samples):7.3f} ms")
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark TMDB client against a local stub server')
+    parser.add_argument('--iterations', type=int, default=500, help='Number of imports per run (default: 500)')
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubTMDBHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}/3"
+
+    client = TMDBClient(api_key='bench', base_url=base_url)
+
+    # warm up
+    import_with_bare_requests(base_url, 1)
+    import_with_client(client, 1)
+
+    print(f"📊 TMDB import latency ({args.iterations} imports, 2 requests each)")
+    print("-" * 70)
+    before = run('before (requests.get)', lambda movie_id: import_with_bare_requests(base_url, movie_id), args.iterations)
+    after = run('after (TMDBClient)', lambda movie_id: import_with_client(client, movie_id), args.iterations)
+    print("-" * 70)
+    print(f"p50 speedup: {statistics.median(before) / statistics.median(after):.2f}x")
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -7,6 +7,23 @@ addEventListener('fetch', event => {
   event.respondWith(handleRequest(event.request))
 })
 
+// Routes whose responses set Cache-Control via http_cache.cacheable() on the
+// origin. Only these may be stored at the edge; everything else (admin pages,
+// /api/import which writes to the database, search) always reaches the origin.
+const EDGE_CACHEABLE_PATHS = [
+  /^\/movies$/,
+  /^\/api\/movies$/,
+  /^\/movie\/\d+$/,
+  /^\/api\/movie\/\d+$/,
+  /^\/api\/suggest$/
+]
+
+function isEdgeCacheable(request, url) {
+  if (request.method !== 'GET') return false
+  if (url.pathname.startsWith('/admin') || url.pathname.startsWith('/api/import')) return false
+  return EDGE_CACHEABLE_PATHS.some(pattern => pattern.test(url.pathname))
+}
+
 async function handleRequest(request) {
   const url = new URL(request.url)
   const renderUrl = 'https://movie-info-app.onrender.com'
@@ -20,7 +37,12 @@ async function handleRequest(request) {
   
   try {
     // Forward request to Render
-    const response = await fetch(newRequest)
+    // Cacheable routes are stored at the edge according to the origin's
+    // Cache-Control (s-maxage; private/no-store is respected); ETag and
+    // If-None-Match pass through for 304s
+    const response = await fetch(newRequest, isEdgeCacheable(request, url) ? {
+      cf: { cacheEverything: true }
+    } : undefined)
     
     // Create new response with CORS headers
     const newResponse = new Response(response.body, {
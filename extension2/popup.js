@@ -2,6 +2,7 @@
 let currentMovieData = null;
 let settings = {};
 let mappingSettings = {};
+let suggestRequestId = 0;
 
 // โหลดการตั้งค่าเมื่อเปิด popup
 document.addEventListener('DOMContentLoaded', function() {
@@ -48,7 +49,7 @@ function setupEventListeners() {
     document.getElementById('searchMovie').addEventListener('input', function(e) {
         const query = e.target.value.trim();
         if (query.length >= 2) {
-            searchMoviesFromAPI(query);
+            suggestMoviesFromAPI(query);
         } else {
             document.getElementById('searchResults').style.display = 'none';
         }
@@ -113,6 +114,9 @@ async function searchMovies() {
 
 // ค้นหาหนังจาก API (internal function)
 async function searchMoviesFromAPI(query) {
+    // ยกเลิกผลแนะนำที่ยังค้างอยู่ ไม่ให้ทับผลค้นหา
+    suggestRequestId++;
+    
     try {
         showStatus('กำลังค้นหาหนัง...', 'success');
         
@@ -138,6 +142,37 @@ async function searchMoviesFromAPI(query) {
     }
 }
 
+// แนะนำชื่อหนังระหว่างพิมพ์ (คืนเฉพาะ id, title, year)
+async function suggestMoviesFromAPI(query) {
+    const requestId = ++suggestRequestId;
+    
+    try {
+        const response = await fetch(`${settings.movieAppUrl}/api/suggest?q=${encodeURIComponent(query)}`);
+        
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+        
+        const data = await response.json();
+        
+        // ข้ามผลลัพธ์ของคำค้นเก่าที่ตอบกลับมาช้ากว่าคำค้นล่าสุด
+        if (requestId !== suggestRequestId) {
+            return;
+        }
+        
+        if (data.success && data.suggestions) {
+            displaySearchResults(data.suggestions);
+        } else {
+            document.getElementById('searchResults').style.display = 'none';
+        }
+        
+    } catch (error) {
+        if (requestId === suggestRequestId) {
+            document.getElementById('searchResults').style.display = 'none';
+        }
+    }
+}
+
 // แสดงผลการค้นหา
 function displaySearchResults(movies) {
     const searchResults = document.getElementById('searchResults');
@@ -152,7 +187,7 @@ function displaySearchResults(movies) {
         html += `
             <div class="search-item" data-movie-id="${movie.id}">
                 <div class="movie-title">${movie.title}</div>
-                <div class="movie-year">${movie.formatted_year || 'ไม่ระบุปี'}</div>
+                <div class="movie-year">${movie.formatted_year || movie.year || 'ไม่ระบุปี'}</div>
             </div>
         `;
     });
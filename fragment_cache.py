@@ -0,0 +1,93 @@
+"""
+Fragment Cache for Movie Info App
+เก็บ HTML ของ movie card ที่ render แล้ว (LRU) โดยใช้ movie id และ updated_at เป็น key
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional
+
+FRAGMENT_CACHE_MAX_ENTRIES = int(os.getenv('FRAGMENT_CACHE_MAX_ENTRIES', '2000'))
+
+
+class FragmentCache:
+    """
+    LRU cache ของ HTML fragment ต่อหนัง 1 เรื่อง
+
+    key ต้องขึ้นต้นด้วย movie id และมี updated_at เพื่อให้แถวที่ถูกอัปเดต (แม้จากอีก process)
+    ได้ key ใหม่เสมอ ส่วน invalidate() ใช้ลบ fragment เก่าออกทันทีเมื่อบันทึกหนังใน process นี้
+    """
+
+    def __init__(self, max_entries: int = FRAGMENT_CACHE_MAX_ENTRIES):
+        self.max_entries = max(1, max_entries)
+        self._entries = OrderedDict()
+        self._keys_by_movie: Dict[int, set] = {}
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key: Hashable) -> Optional[str]:
+        """อ่าน fragment (None ถ้าไม่มี)"""
+        with self._lock:
+            html = self._entries.get(key)
+            if html is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return html
+
+    def set(self, key: Hashable, html: str):
+        """บันทึก fragment และลบรายการที่ใช้น้อยที่สุดเมื่อเกินขนาด"""
+        with self._lock:
+            self._entries[key] = html
+            self._entries.move_to_end(key)
+            self._keys_by_movie.setdefault(key[0], set()).add(key)
+
+            while len(self._entries) > self.max_entries:
+                old_key, _ = self._entries.popitem(last=False)
+                self._forget(old_key)
+                self.evictions += 1
+
+    def _forget(self, key: Hashable):
+        keys = self._keys_by_movie.get(key[0])
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._keys_by_movie[key[0]]
+
+    def invalidate(self, movie_id: int):
+        """ลบทุก fragment ของหนังเรื่องนี้"""
+        with self._lock:
+            for key in self._keys_by_movie.pop(movie_id, ()):
+                self._entries.pop(key, None)
+                self.invalidations += 1
+
+    def clear(self):
+        """ลบ fragment ทั้งหมด"""
+        with self._lock:
+            self._entries.clear()
+            self._keys_by_movie.clear()
+
+    def stats(self) -> Dict:
+        """สถิติ hit/miss ของ cache"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations,
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'hit_rate': round(self.hits / total * 100, 2) if total else 0
+            }
+
+
+# Global instance
+movie_card_cache = FragmentCache()
@@ -0,0 +1,79 @@
+"""
+HTTP Cache Headers for Movie Info App
+ตั้ง ETag, Last-Modified และ Cache-Control ให้หน้าเว็บและ JSON API เพื่อให้ browser
+และ Cloudflare ตอบ 304 หรือใช้ cache ที่ edge ได้
+"""
+
+import os
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+from flask import Response, request, session
+
+HTTP_CACHE_DETAIL_MAX_AGE = int(os.getenv('HTTP_CACHE_DETAIL_MAX_AGE', '60'))
+HTTP_CACHE_DETAIL_S_MAXAGE = int(os.getenv('HTTP_CACHE_DETAIL_S_MAXAGE', '600'))
+HTTP_CACHE_LIST_MAX_AGE = int(os.getenv('HTTP_CACHE_LIST_MAX_AGE', '30'))
+HTTP_CACHE_LIST_S_MAXAGE = int(os.getenv('HTTP_CACHE_LIST_S_MAXAGE', '120'))
+
+# Cache-Control ต่อประเภทของ route
+# detail: หนัง 1 เรื่อง เปลี่ยนเฉพาะตอน update/import
+# list: รายการหนังล่าสุด เปลี่ยนทุกครั้งที่มีหนังใหม่
+CACHE_POLICIES = {
+    'detail': (f'public, max-age={HTTP_CACHE_DETAIL_MAX_AGE}, s-maxage={HTTP_CACHE_DETAIL_S_MAXAGE}, '
+               f'stale-while-revalidate={HTTP_CACHE_DETAIL_S_MAXAGE}'),
+    'list': (f'public, max-age={HTTP_CACHE_LIST_MAX_AGE}, s-maxage={HTTP_CACHE_LIST_S_MAXAGE}, '
+             f'stale-while-revalidate={HTTP_CACHE_LIST_S_MAXAGE}'),
+    # autocomplete: คำค้นเดียวกันถูกพิมพ์ซ้ำบ่อย ใช้ cache ที่ edge ได้แม้ผลจะช้าไปเล็กน้อย
+    'suggest': f'public, max-age={HTTP_CACHE_LIST_MAX_AGE}, s-maxage={HTTP_CACHE_LIST_S_MAXAGE}'
+}
+
+
+def parse_timestamp(value) -> Optional[datetime]:
+    """แปลง timestamp จาก Supabase (ISO 8601) เป็น datetime แบบมี timezone"""
+    if not value:
+        return None
+
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return None
+
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def latest_timestamp(values: Iterable) -> Optional[datetime]:
+    """timestamp ล่าสุดจากหลายแถว (ใช้เป็น Last-Modified ของหน้ารายการ)"""
+    timestamps = [parsed for parsed in (parse_timestamp(value) for value in values) if parsed]
+    return max(timestamps) if timestamps else None
+
+
+def cacheable(response: Response, policy: str, last_modified=None) -> Response:
+    """
+    ใส่ validators และ Cache-Control ให้ response แล้วตอบ 304 ถ้า request มี
+    If-None-Match / If-Modified-Since ที่ตรงกัน
+
+    Args:
+        response: response ของ route (status 200)
+        policy: ชื่อ policy ใน CACHE_POLICIES
+        last_modified: updated_at ของข้อมูลที่แสดง
+
+    Returns:
+        response เดิม หรือ response 304 ที่ไม่มี body
+    """
+    # หน้าที่แสดง flash message เป็นของผู้ใช้คนเดียว ห้ามเก็บไว้ใน cache ที่ใช้ร่วมกัน
+    if session.modified:
+        response.headers['Cache-Control'] = 'private, no-store'
+        return response
+
+    response.headers['Cache-Control'] = CACHE_POLICIES[policy]
+
+    last_modified = parse_timestamp(last_modified)
+    if last_modified:
+        response.last_modified = last_modified
+
+    # strong ETag จาก hash ของ body (poster/logo URL อาจเปลี่ยนโดยที่ updated_at ไม่เปลี่ยน)
+    response.add_etag()
+    return response.make_conditional(request)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Movie Import Script
+สคริปต์สำหรับนำเข้าหนังหลายเรื่องจาก TMDB พร้อมกัน
+"""
+
+import argparse
+import sys
+from batch_importer import BatchImporter, BATCH_IMPORT_WORKERS, BATCH_IMPORT_CHUNK_SIZE
+
+def read_ids_from_file(path):
+    """อ่าน TMDB IDs จากไฟล์ (1 ID ต่อบรรทัด, ข้ามบรรทัดว่างและ # comment)"""
+    tmdb_ids = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.split('#', 1)[0].strip()
+            if line:
+                tmdb_ids.append(int(line))
+    return tmdb_ids
+
+def main():
+    parser = argparse.ArgumentParser(description='Import movies from TMDB in batches')
+    parser.add_argument('--ids', nargs='+', type=int, help='TMDB IDs to import')
+    parser.add_argument('--file', help='File with one TMDB ID per line')
+    parser.add_argument('--workers', type=int, default=BATCH_IMPORT_WORKERS, help=f'Concurrent TMDB fetches (default: {BATCH_IMPORT_WORKERS})')
+    parser.add_argument('--chunk-size', type=int, default=BATCH_IMPORT_CHUNK_SIZE, help=f'Movies per database upsert (default: {BATCH_IMPORT_CHUNK_SIZE})')
+    
+    args = parser.parse_args()
+    
+    tmdb_ids = list(args.ids or [])
+    if args.file:
+        tmdb_ids.extend(read_ids_from_file(args.file))
+    
+    if not tmdb_ids:
+        parser.print_help()
+        return
+    
+    try:
+        print(f"\n🎬 Importing {len(tmdb_ids)} movies (workers: {args.workers}, chunk size: {args.chunk_size})")
+        
+        importer = BatchImporter(workers=args.workers, chunk_size=args.chunk_size)
+        result = importer.import_ids(tmdb_ids)
+        
+        for item in result['results']:
+            if not item['result']['success']:
+                print(f"❌ {item['tmdb_id']}: {item['result']['message']}")
+        
+        summary = result['summary']
+        print(f"✅ Import completed:")
+        print(f"   - Total: {summary['total']}")
+        print(f"   - Imported: {summary['imported']}")
+        print(f"   - Failed: {summary['failed']}")
+        print(f"   - Elapsed: {summary['elapsed_seconds']}s ({summary['items_per_sec']} items/sec)")
+        
+    except Exception as e:
+        print(f"❌ Error: {str(e)}")
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,284 @@
+"""
+IP Range Lists for Movie Info App
+blacklist / whitelist ที่รับได้ทั้ง IP เดี่ยวและช่วง CIDR (IPv4 / IPv6) ค้นหาด้วย prefix tree
+ใช้เวลาตามความยาว prefix (32 / 128 bit) ไม่ขึ้นกับจำนวนรายการ
+"""
+
+import argparse
+import ipaddress
+import os
+import threading
+import time
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+from security_store import StoredMap, StoredSet
+
+# ตรวจ version ของรายการใน store ไม่บ่อยกว่านี้ต่อ process (วินาที)
+# worker อื่นเห็นการแก้ไขช้าไม่เกินเท่านี้ ส่วน worker ที่แก้ไขเห็นทันที
+IP_LIST_REFRESH_INTERVAL = float(os.getenv('IP_LIST_REFRESH_INTERVAL', '1'))
+
+Network = Union[ipaddress.IPv4Network, ipaddress.IPv6Network]
+Address = Union[ipaddress.IPv4Address, ipaddress.IPv6Address]
+
+
+def parse_network(value: str) -> Network:
+    """
+    แปลง IP เดี่ยวหรือ CIDR เป็น network (host bits ถูกตัดทิ้ง เช่น 10.1.2.3/8 -> 10.0.0.0/8)
+
+    Raises:
+        ValueError: ถ้าไม่ใช่ IP หรือ CIDR ที่ถูกต้อง
+    """
+    network = ipaddress.ip_network(str(value).strip(), strict=False)
+    # IPv4 ที่เขียนแบบ IPv6 (::ffff:1.2.3.4) เก็บเป็น IPv4
+    mapped = getattr(network.network_address, 'ipv4_mapped', None)
+    if mapped is not None and network.prefixlen >= 96:
+        network = ipaddress.ip_network(f'{mapped}/{network.prefixlen - 96}', strict=False)
+    return network
+
+
+def format_network(network: Network) -> str:
+    """ข้อความที่ใช้เก็บและแสดง (IP เดี่ยวไม่มี /32 หรือ /128)"""
+    if network.prefixlen == network.max_prefixlen:
+        return str(network.network_address)
+    return str(network)
+
+
+def parse_address(value: str) -> Optional[Address]:
+    """แปลง IP ของ request (None ถ้าไม่ถูกต้อง)"""
+    try:
+        address = ipaddress.ip_address(str(value).strip())
+    except ValueError:
+        return None
+    return getattr(address, 'ipv4_mapped', None) or address
+
+
+class PrefixTree:
+    """
+    Radix tree แบบบีบ path (Patricia) แยก IPv4 / IPv6
+
+    แต่ละ node คือ [bit ต้นของ prefix เป็น int, ความยาว prefix, network ที่จบที่ node นี้,
+    ลูก bit 0, ลูก bit 1] node มีเฉพาะจุดแยกทางและจุดที่มี network จึงลึกไม่เกินความยาว prefix
+    lookup() คืน network ที่ยาวที่สุดที่ครอบ IP (longest prefix match)
+    """
+
+    def __init__(self):
+        self._roots = {4: [0, 0, None, None, None], 6: [0, 0, None, None, None]}
+        self.size = 0
+
+    def insert(self, network: Network):
+        width = network.max_prefixlen
+        length = network.prefixlen
+        key = int(network.network_address) >> (width - length)
+        node = self._roots[network.version]
+
+        while True:
+            # prefix ของ node เป็นส่วนต้นของ key เสมอ
+            if node[1] == length:
+                if node[2] is None:
+                    self.size += 1
+                node[2] = network
+                return
+
+            slot = 3 + ((key >> (length - node[1] - 1)) & 1)
+            child = node[slot]
+            if child is None:
+                node[slot] = [key, length, network, None, None]
+                self.size += 1
+                return
+
+            common = child[1] if child[1] < length else length
+            diff = (child[0] >> (child[1] - common)) ^ (key >> (length - common))
+            if diff == 0 and child[1] <= length:
+                node = child
+                continue
+
+            # แยก node ที่ความยาว prefix ร่วม (หรือแทรก key เป็น node แม่ของ child)
+            split_length = common - diff.bit_length()
+            if split_length == length:
+                split = [key, length, network, None, None]
+            else:
+                split = [key >> (length - split_length), split_length, None, None, None]
+                split[3 + ((key >> (length - split_length - 1)) & 1)] = [key, length, network, None, None]
+            split[3 + ((child[0] >> (child[1] - split_length - 1)) & 1)] = child
+            node[slot] = split
+            self.size += 1
+            return
+
+    def lookup(self, address: Address) -> Optional[Network]:
+        width = address.max_prefixlen
+        bits = int(address)
+        node = self._roots[address.version]
+        match = node[2]
+
+        while node[1] < width:
+            child = node[3 + ((bits >> (width - node[1] - 1)) & 1)]
+            if child is None or bits >> (width - child[1]) != child[0]:
+                break
+            node = child
+            if node[2] is not None:
+                match = node[2]
+
+        return match
+
+    def __len__(self):
+        return self.size
+
+
+class IPRangeSet:
+    """
+    รายการ IP / CIDR ที่เก็บใน security store และค้นหาด้วย PrefixTree ของ process นี้
+
+    ทุกการแก้ไขเพิ่ม version ใน store worker อื่นจึงสร้าง tree ใหม่ในการค้นหาครั้งถัดไป
+    (worker ที่เพิ่มรายการเองใส่ลง tree เดิมได้ทันที)
+    """
+
+    def __init__(self, store, namespace: str, refresh_interval: float = IP_LIST_REFRESH_INTERVAL):
+        self.namespace = namespace
+        self.refresh_interval = refresh_interval
+        self._entries = StoredSet(store, namespace)
+        self._versions = StoredMap(store, 'ip_list_versions', int)
+        self._tree = PrefixTree()
+        self._version = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def _current_tree(self) -> PrefixTree:
+        # ใช้ tree เดิมโดยไม่อ่าน store ถ้าเพิ่งตรวจ version ไป
+        now = time.monotonic()
+        if self._version is not None and now - self._checked_at < self.refresh_interval:
+            return self._tree
+
+        version = self._versions[self.namespace]
+        self._checked_at = now
+        if version == self._version:
+            return self._tree
+
+        with self._lock:
+            if version != self._version:
+                tree = PrefixTree()
+                for value in self._entries:
+                    try:
+                        tree.insert(parse_network(value))
+                    except ValueError:
+                        # ข้อความเก่าที่ไม่ใช่ IP ยังแสดงในหน้า admin เพื่อให้ลบได้
+                        continue
+                # อ่าน version ก่อนรายการ ถ้ามีการแก้ไขระหว่างนี้จะสร้างใหม่อีกรอบในครั้งถัดไป
+                self._tree, self._version = tree, version
+            return self._tree
+
+    def _changed(self, networks: Optional[List[Network]] = None):
+        """
+        เพิ่ม version หลังแก้ไข ถ้าเป็นการเพิ่มและไม่มี worker อื่นแก้ไขในระหว่างนั้น
+        ใส่ networks ลง tree เดิมเลยแทนการสร้างใหม่ทั้งหมด
+        """
+        version = self._versions.increment(self.namespace)
+
+        with self._lock:
+            if networks is not None and self._version == version - 1:
+                for network in networks:
+                    self._tree.insert(network)
+                self._version = version
+            else:
+                # ต้องสร้าง tree ใหม่ (ลบรายการ หรือ worker อื่นแก้ไขด้วย) ให้การค้นหาครั้งถัดไปอ่าน version ทันที
+                self._checked_at = 0.0
+
+    def add(self, value: str) -> str:
+        """
+        เพิ่ม IP หรือช่วง CIDR
+
+        Returns:
+            ข้อความที่เก็บ (รูปแบบมาตรฐาน)
+
+        Raises:
+            ValueError: ถ้าไม่ใช่ IP หรือ CIDR ที่ถูกต้อง
+        """
+        network = parse_network(value)
+        key = format_network(network)
+        self._entries.add(key)
+        self._changed([network])
+        return key
+
+    def add_many(self, values: Iterable[str]) -> Tuple[List[str], List[str]]:
+        """
+        เพิ่มหลายรายการใน write เดียว
+
+        Returns:
+            (รายการที่เพิ่ม, ข้อความที่ไม่ใช่ IP หรือ CIDR)
+        """
+        networks, added, invalid = [], [], []
+        for value in values:
+            try:
+                network = parse_network(value)
+            except ValueError:
+                invalid.append(value)
+                continue
+            networks.append(network)
+            added.append(format_network(network))
+
+        if added:
+            self._entries.add_many(added)
+            self._changed(networks)
+        return added, invalid
+
+    def load_file(self, path: str) -> Tuple[List[str], List[str]]:
+        """เพิ่มรายการจากไฟล์ (บรรทัดละ 1 รายการ ข้ามบรรทัดว่างและข้อความหลัง #)"""
+        with open(path, encoding='utf-8') as file:
+            return self.add_many(read_ranges(file))
+
+    def discard(self, value: str):
+        """ลบ IP หรือช่วง CIDR (ต้องตรงกับรายการที่เพิ่มไว้)"""
+        try:
+            key = format_network(parse_network(value))
+        except ValueError:
+            key = value
+        self._entries.discard(key)
+        self._changed()
+
+    def match(self, ip_address: str) -> Optional[str]:
+        """ช่วงที่เจาะจงที่สุดที่ครอบ IP นี้ (None ถ้าไม่อยู่ในรายการ)"""
+        address = parse_address(ip_address)
+        if address is None:
+            return None
+
+        network = self._current_tree().lookup(address)
+        return format_network(network) if network is not None else None
+
+    def __contains__(self, ip_address: str) -> bool:
+        return self.match(ip_address) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def read_ranges(lines: Iterable[str]) -> List[str]:
+    """รายการ IP / CIDR จากข้อความหลายบรรทัด (ข้ามบรรทัดว่างและ comment)"""
+    ranges = []
+    for line in lines:
+        value = line.split('#', 1)[0].strip()
+        if value:
+            ranges.append(value)
+    return ranges
+
+
+def main():
+    """โหลด blacklist / whitelist จากไฟล์ลง security store ที่ทุก worker ใช้ร่วมกัน"""
+    from security_middleware import security_middleware
+
+    parser = argparse.ArgumentParser(description='Bulk load IP addresses / CIDR ranges into the blacklist or whitelist')
+    parser.add_argument('list', choices=['blacklist', 'whitelist'], help='List to load into')
+    parser.add_argument('file', help='File with one IP or CIDR range per line (# comments allowed)')
+    args = parser.parse_args()
+
+    ip_list = security_middleware.ip_blacklist if args.list == 'blacklist' else security_middleware.ip_whitelist
+    added, invalid = ip_list.load_file(args.file)
+
+    print(f"✅ Added {len(added)} entries to {args.list} ({len(ip_list)} total)")
+    for value in invalid:
+        print(f"❌ Invalid entry skipped: {value}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,91 @@
+"""
+Movie Store for Movie Info App
+บันทึกข้อมูลหนังลง Supabase ด้วย upsert (on_conflict='tmdb_id') คำสั่งเดียว
+"""
+
+from typing import Dict, List, Optional
+
+from supabase import Client
+
+from fragment_cache import movie_card_cache
+from search_cache import search_result_cache
+from search_index import search_index, suggest_index
+from utils import build_display_fields, build_search_text
+
+# คอลัมน์ของตาราง movies ที่บันทึกจากข้อมูล TMDB
+MOVIE_FIELDS = [
+    'tmdb_id', 'title', 'original_title', 'year', 'genres', 'trailer_id',
+    'director', 'cast_data', 'poster_path', 'streaming_providers', 'updated_at'
+]
+
+# คอลัมน์ที่จัดรูปแบบไว้ตอนบันทึก เพื่อไม่ต้องคำนวณใหม่ทุกครั้งที่ render
+DISPLAY_FIELDS = ['display_year', 'display_genres', 'display_cast']
+
+# ข้อความสำหรับค้นหา (ใช้กับ pg_trgm index และ search_movies_ranked)
+SEARCH_FIELD = 'search_text'
+
+
+def build_movie_record(movie_data: Dict) -> Dict:
+    """
+    สร้าง record สำหรับตาราง movies จากข้อมูลที่ extract แล้ว
+
+    ใส่เฉพาะคอลัมน์ที่มีใน movie_data เพื่อไม่เขียนทับข้อมูลเดิมด้วยค่าว่าง
+    (tmdb_id และ title ต้องมีเสมอ) และคำนวณ display fields กับ search_text จากคอลัมน์เหล่านั้น
+    """
+    if 'tmdb_id' not in movie_data or 'title' not in movie_data:
+        raise ValueError("movie_data must contain tmdb_id and title")
+
+    record = {field: movie_data[field] for field in MOVIE_FIELDS if field in movie_data}
+    record.update(build_display_fields(record))
+
+    search_text = build_search_text(record)
+    if search_text is not None:
+        record[SEARCH_FIELD] = search_text
+    return record
+
+
+def upsert_movie(supabase: Client, movie_data: Dict) -> Optional[int]:
+    """
+    บันทึกหนัง 1 เรื่อง (insert หรือ update ตาม tmdb_id) ใน round trip เดียว
+
+    Returns:
+        id ของหนังในฐานข้อมูล
+    """
+    result = supabase.table('movies').upsert(build_movie_record(movie_data), on_conflict='tmdb_id').execute()
+    if not result.data:
+        return None
+
+    movie_card_cache.invalidate(result.data[0]['id'])
+    search_index.upsert(result.data[0])
+    suggest_index.upsert(result.data[0])
+    search_result_cache.invalidate_local()
+    return result.data[0]['id']
+
+
+def upsert_movies(supabase: Client, movies: List[Dict]) -> Dict[int, int]:
+    """
+    บันทึกหนังหลายเรื่องด้วย upsert (1 คำสั่งต่อชุดคอลัมน์)
+
+    bulk upsert ส่งคอลัมน์รวมของทุก record และเขียน NULL ให้คอลัมน์ที่ record ไม่มี
+    จึงแยก record ตามชุดคอลัมน์ เพื่อให้การอัปเดตบางคอลัมน์ไม่ลบข้อมูลเดิมของหนังเรื่องอื่น
+
+    Returns:
+        dict {tmdb_id: id ในฐานข้อมูล}
+    """
+    groups = {}
+    for movie in movies:
+        record = build_movie_record(movie)
+        groups.setdefault(frozenset(record), []).append(record)
+
+    saved = {}
+    for records in groups.values():
+        result = supabase.table('movies').upsert(records, on_conflict='tmdb_id').execute()
+        for row in result.data:
+            movie_card_cache.invalidate(row['id'])
+            search_index.upsert(row)
+            suggest_index.upsert(row)
+            saved[row['tmdb_id']] = row['id']
+
+    if saved:
+        search_result_cache.invalidate_local()
+    return saved
@@ -0,0 +1,93 @@
+"""
+Keyset Pagination for Movie Info App
+แบ่งหน้ารายการหนังด้วย cursor บน (created_at, id) แทน offset
+เวลาในการดึงแต่ละหน้าจึงคงที่ไม่ว่าจะอยู่ลึกแค่ไหน
+"""
+
+import base64
+import json
+import os
+import re
+from typing import Dict, List, Optional, Tuple
+
+MOVIES_PAGE_SIZE = int(os.getenv('MOVIES_PAGE_SIZE', '50'))
+MOVIES_MAX_PAGE_SIZE = int(os.getenv('MOVIES_MAX_PAGE_SIZE', '100'))
+
+# created_at ใน cursor ถูกใส่ลงในเงื่อนไข PostgREST ตรง ๆ จึงรับเฉพาะรูปแบบ timestamp
+# (กัน cursor ที่แก้เองใส่ " , หรือ ( เพื่อเปลี่ยนเงื่อนไข)
+_CURSOR_TIMESTAMP = re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d{1,6})?(Z|[+-]\d{2}:?\d{2})?')
+
+
+def encode_cursor(row: Dict, direction: str) -> str:
+    """สร้าง cursor (base64url) จาก created_at และ id ของแถว"""
+    payload = json.dumps({'k': [row['created_at'], row['id']], 'd': direction}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Optional[Tuple[str, int, str]]:
+    """
+    แปลง cursor กลับเป็น (created_at, id, direction)
+
+    Returns:
+        None ถ้า cursor ไม่ถูกต้อง
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        created_at, row_id = payload['k']
+        direction = payload['d']
+        if direction not in ('next', 'prev') or not isinstance(created_at, str):
+            return None
+        if not _CURSOR_TIMESTAMP.fullmatch(created_at) or isinstance(row_id, bool):
+            return None
+        return created_at, int(row_id), direction
+    except (ValueError, TypeError, KeyError):
+        return None
+
+
+def clamp_page_size(value, default: int = MOVIES_PAGE_SIZE) -> int:
+    """จำกัด page size ให้อยู่ระหว่าง 1 ถึง MOVIES_MAX_PAGE_SIZE"""
+    try:
+        size = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(1, min(size, MOVIES_MAX_PAGE_SIZE))
+
+
+def keyset_filter(created_at: str, row_id: int, direction: str) -> str:
+    """
+    เงื่อนไข PostgREST (ใช้กับ .or_) สำหรับแถวถัดไปจาก (created_at, id)
+
+    next: แถวที่เก่ากว่า (เรียง created_at, id จากใหม่ไปเก่า)
+    prev: แถวที่ใหม่กว่า
+    """
+    op = 'lt' if direction == 'next' else 'gt'
+    return f'created_at.{op}."{created_at}",and(created_at.eq."{created_at}",id.{op}.{row_id})'
+
+
+def build_page(rows: List[Dict], page_size: int, direction: Optional[str]) -> Dict:
+    """
+    สร้างผลลัพธ์ของหน้าจากแถวที่ดึงมา page_size + 1 แถว
+
+    Args:
+        rows: แถวตามลำดับที่ query (prev เรียงจากเก่าไปใหม่)
+        page_size: จำนวนแถวต่อหน้า
+        direction: ทิศทางของ cursor ที่ใช้ดึง (None = หน้าแรก)
+
+    Returns:
+        dict {'movies', 'next_cursor', 'prev_cursor'}
+    """
+    has_more = len(rows) > page_size
+    rows = rows[:page_size]
+
+    if direction == 'prev':
+        rows.reverse()
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, direction == 'next'
+
+    return {
+        'movies': rows,
+        'next_cursor': encode_cursor(rows[-1], 'next') if rows and has_next else None,
+        'prev_cursor': encode_cursor(rows[0], 'prev') if rows and has_prev else None
+    }
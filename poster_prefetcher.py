@@ -0,0 +1,152 @@
+"""
+Poster Prefetcher for Movie Info App
+ดาวน์โหลด poster เบื้องหลังด้วย worker pool แทนการดาวน์โหลดระหว่าง render หน้าเว็บ
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+from utils import POSTERS_DIR, download_and_save_poster, get_poster_filename, get_poster_url
+
+POSTER_PREFETCH_WORKERS = int(os.getenv('POSTER_PREFETCH_WORKERS', '4'))
+POSTER_PREFETCH_QUEUE_SIZE = int(os.getenv('POSTER_PREFETCH_QUEUE_SIZE', '500'))
+
+NO_POSTER_URL = '/static/images/no-poster.jpg'
+
+
+class PosterPrefetcher:
+    """
+    คิวดาวน์โหลด poster เบื้องหลัง
+
+    หน้าเว็บเรียก poster_url() ซึ่งตอบทันที: ถ้ามีไฟล์ในเครื่องแล้วจะได้ URL ของไฟล์นั้น
+    ถ้ายังไม่มีจะได้ URL ของ TMDB CDN และ poster จะถูกเพิ่มเข้าคิวดาวน์โหลด
+    """
+
+    def __init__(self, workers: int = POSTER_PREFETCH_WORKERS, max_queue: int = POSTER_PREFETCH_QUEUE_SIZE,
+                 size: str = 'w185'):
+        self.workers = max(1, workers)
+        self.size = size
+        self.queue = queue.Queue(maxsize=max_queue)
+
+        self._lock = threading.Lock()
+        self._pending = set()
+        self._local_files = None
+        self._started_pid = None
+
+        self.enqueued = 0
+        self.completed = 0
+        self.failed = 0
+        self.dropped = 0
+        self._latencies = deque(maxlen=200)
+
+    def _known_local_files(self) -> set:
+        """รายชื่อไฟล์ poster ที่มีอยู่แล้ว (อ่าน directory ครั้งเดียว)"""
+        if self._local_files is None:
+            try:
+                self._local_files = set(os.listdir(POSTERS_DIR))
+            except OSError:
+                self._local_files = set()
+        return self._local_files
+
+    def _ensure_workers(self):
+        """เริ่ม worker threads ใน process ปัจจุบัน (เริ่มใหม่หลัง fork)"""
+        pid = os.getpid()
+        if self._started_pid == pid:
+            return
+
+        with self._lock:
+            if self._started_pid == pid:
+                return
+
+            for index in range(self.workers):
+                threading.Thread(target=self._worker, name=f'poster-prefetch-{index}', daemon=True).start()
+            self._started_pid = pid
+
+    def _worker(self):
+        while True:
+            poster_path, tmdb_id, filename, enqueued_at = self.queue.get()
+            try:
+                url = download_and_save_poster(poster_path, tmdb_id, self.size)
+                success = url.startswith('/static/')
+            except Exception as e:
+                print(f"Error prefetching poster: {e}")
+                success = False
+
+            with self._lock:
+                self._pending.discard(filename)
+                if success:
+                    self._known_local_files().add(filename)
+                    self.completed += 1
+                else:
+                    self.failed += 1
+                self._latencies.append(time.monotonic() - enqueued_at)
+
+            self.queue.task_done()
+
+    def enqueue(self, poster_path: str, tmdb_id: int, filename: Optional[str] = None) -> bool:
+        """เพิ่ม poster เข้าคิว (ข้ามถ้าอยู่ในคิวแล้ว หรือคิวเต็ม)"""
+        filename = filename or get_poster_filename(poster_path, tmdb_id)
+
+        with self._lock:
+            if filename in self._pending or filename in self._known_local_files():
+                return False
+            self._pending.add(filename)
+
+        self._ensure_workers()
+
+        try:
+            self.queue.put_nowait((poster_path, tmdb_id, filename, time.monotonic()))
+        except queue.Full:
+            with self._lock:
+                self._pending.discard(filename)
+                self.dropped += 1
+            return False
+
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def poster_url(self, poster_path: str, tmdb_id: int) -> str:
+        """URL ของ poster สำหรับ render ทันที (ไม่มี network I/O)"""
+        if not poster_path:
+            return NO_POSTER_URL
+
+        filename = get_poster_filename(poster_path, tmdb_id)
+        if filename in self._known_local_files():
+            return f'/static/images/posters/{filename}'
+
+        self.enqueue(poster_path, tmdb_id, filename)
+        return get_poster_url(poster_path, self.size)
+
+    def stats(self) -> Dict:
+        """ความยาวคิวและ latency ของการดาวน์โหลด"""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            in_progress = len(self._pending) - self.queue.qsize()
+            local_files = len(self._known_local_files())
+
+        def percentile(pct):
+            if not latencies:
+                return 0
+            index = min(len(latencies) - 1, int(round(pct / 100 * (len(latencies) - 1))))
+            return round(latencies[index] * 1000, 1)
+
+        return {
+            'queue_depth': self.queue.qsize(),
+            'in_progress': max(0, in_progress),
+            'enqueued': self.enqueued,
+            'completed': self.completed,
+            'failed': self.failed,
+            'dropped': self.dropped,
+            'local_files': local_files,
+            'latency_p50_ms': percentile(50),
+            'latency_p95_ms': percentile(95)
+        }
+
+
+# Global instance
+poster_prefetcher = PosterPrefetcher()
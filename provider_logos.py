@@ -0,0 +1,190 @@
+"""
+Provider Logo Manifest for Movie Info App
+แผนที่ provider_id -> ไฟล์ logo ในเครื่อง สร้างจากรายชื่อ provider ของ TMDB และรีเฟรชเบื้องหลัง
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+import requests
+
+from tmdb_client import get_tmdb_client
+
+PROVIDER_LOGOS_DIR = Path("static/images/providers")
+PROVIDER_LOGO_SIZE = 'w45'
+PROVIDER_LOGO_REGION = os.getenv('PROVIDER_LOGO_REGION', 'TH')
+PROVIDER_LOGO_REFRESH_INTERVAL = int(os.getenv('PROVIDER_LOGO_REFRESH_INTERVAL', '86400'))
+
+NO_LOGO_PATH = 'images/no-logo.png'
+
+
+def get_provider_logo_filename(logo_path: str, provider_id: int) -> str:
+    """ชื่อไฟล์ logo ที่บันทึกไว้ที่เซิร์ฟเวอร์ (provider ID + hash ของ logo path)"""
+    file_hash = hashlib.md5(logo_path.encode()).hexdigest()[:8]
+    return f"provider_{provider_id}_{file_hash}.png"
+
+
+class ProviderLogoManifest:
+    """
+    Manifest ของ provider logos
+
+    การ render เรียก logo() ซึ่งเป็นแค่การค้นหาใน dict (ไม่มี filesystem หรือ network I/O)
+    logo ที่ยังไม่มีในเครื่องจะใช้ URL ของ TMDB CDN ไปก่อน และถูกดาวน์โหลดโดย thread เบื้องหลัง
+    """
+
+    def __init__(self, region: str = PROVIDER_LOGO_REGION, size: str = PROVIDER_LOGO_SIZE,
+                 refresh_interval: int = PROVIDER_LOGO_REFRESH_INTERVAL, logos_dir: Path = PROVIDER_LOGOS_DIR):
+        self.region = region
+        self.size = size
+        self.refresh_interval = refresh_interval
+        self.logos_dir = Path(logos_dir)
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._started_pid = None
+
+        # provider_id -> (logo_path จาก TMDB, path ใต้ static/)
+        self._logos: Dict[int, tuple] = {}
+        # logo ที่เจอระหว่าง render แต่ยังไม่มีในเครื่อง: provider_id -> logo_path
+        self._missing: Dict[int, str] = {}
+
+        self.refreshes = 0
+        self.downloaded = 0
+        self.failed = 0
+
+        self._load_local_files()
+
+    def _load_local_files(self):
+        """อ่านไฟล์ logo ที่มีอยู่แล้วในเครื่อง (ครั้งเดียวตอนเริ่ม)"""
+        try:
+            filenames = os.listdir(self.logos_dir)
+        except OSError:
+            return
+
+        for filename in filenames:
+            parts = filename.split('_')
+            if len(parts) == 3 and parts[0] == 'provider' and parts[1].isdigit():
+                # ยังไม่รู้ logo_path จนกว่าจะรีเฟรชครั้งแรก ใช้ hash จากชื่อไฟล์แทน
+                self._logos[int(parts[1])] = (None, f'images/providers/{filename}')
+
+    def _ensure_worker(self):
+        """เริ่ม thread รีเฟรชใน process ปัจจุบัน (เริ่มใหม่หลัง fork)"""
+        pid = os.getpid()
+        if self._started_pid == pid:
+            return
+
+        with self._lock:
+            if self._started_pid == pid:
+                return
+
+            threading.Thread(target=self._worker, name='provider-logo-refresh', daemon=True).start()
+            self._started_pid = pid
+
+    def _worker(self):
+        while True:
+            self.refresh()
+            self._wakeup.wait(self.refresh_interval)
+            self._wakeup.clear()
+
+    def _download(self, logo_path: str, provider_id: int) -> Optional[str]:
+        """ดาวน์โหลด logo 1 ไฟล์ คืนค่า path ใต้ static/ หรือ None ถ้าไม่สำเร็จ"""
+        filename = get_provider_logo_filename(logo_path, provider_id)
+        file_path = self.logos_dir / filename
+
+        if not file_path.exists():
+            try:
+                response = requests.get(f"https://image.tmdb.org/t/p/{self.size}{logo_path}", timeout=30)
+                response.raise_for_status()
+
+                self.logos_dir.mkdir(parents=True, exist_ok=True)
+                with open(file_path, 'wb') as f:
+                    f.write(response.content)
+
+                self.downloaded += 1
+                print(f"Downloaded provider logo: {filename}")
+            except Exception as e:
+                self.failed += 1
+                print(f"Error downloading provider logo: {e}")
+                return None
+
+        return f'images/providers/{filename}'
+
+    def refresh(self) -> int:
+        """
+        ดึงรายชื่อ provider จาก TMDB ดาวน์โหลด logo ที่ยังไม่มี แล้วอัปเดต manifest
+
+        Returns:
+            จำนวน provider ใน manifest
+        """
+        wanted = {}
+        try:
+            for provider in get_tmdb_client().get_provider_list(self.region):
+                if provider.get('provider_id') and provider.get('logo_path'):
+                    wanted[provider['provider_id']] = provider['logo_path']
+        except Exception as e:
+            print(f"Error fetching provider list: {e}")
+
+        with self._lock:
+            wanted.update(self._missing)
+            current = dict(self._logos)
+
+        logos = dict(current)
+        for provider_id, logo_path in wanted.items():
+            known = current.get(provider_id)
+            if known and known[0] == logo_path:
+                continue
+
+            static_path = self._download(logo_path, provider_id)
+            if static_path:
+                logos[provider_id] = (logo_path, static_path)
+
+        with self._lock:
+            self._logos = logos
+            for provider_id in wanted:
+                if provider_id in logos:
+                    self._missing.pop(provider_id, None)
+            self.refreshes += 1
+
+        return len(logos)
+
+    def logo(self, provider: Dict) -> Dict:
+        """
+        คืนค่า logo ของ provider สำหรับแสดงผล
+
+        Returns:
+            dict {'logo_path': path ใต้ static/ หรือ None, 'logo_url': URL ที่ใช้ใน <img>}
+        """
+        provider_id = provider.get('provider_id')
+        logo_path = provider.get('logo_path')
+        if not logo_path:
+            return {'logo_path': NO_LOGO_PATH, 'logo_url': f'/static/{NO_LOGO_PATH}'}
+
+        self._ensure_worker()
+
+        known = self._logos.get(provider_id)
+        if known and (known[0] is None or known[0] == logo_path):
+            return {'logo_path': known[1], 'logo_url': f'/static/{known[1]}'}
+
+        if provider_id and provider_id not in self._missing:
+            with self._lock:
+                self._missing[provider_id] = logo_path
+            self._wakeup.set()
+
+        return {'logo_path': None, 'logo_url': f"https://image.tmdb.org/t/p/{self.size}{logo_path}"}
+
+    def stats(self) -> Dict:
+        """ขนาด manifest และจำนวนการดาวน์โหลด"""
+        return {
+            'providers': len(self._logos),
+            'missing': len(self._missing),
+            'refreshes': self.refreshes,
+            'downloaded': self.downloaded,
+            'failed': self.failed
+        }
+
+
+# Global instance
+provider_logo_manifest = ProviderLogoManifest()
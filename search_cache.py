@@ -0,0 +1,146 @@
+"""
+Search Result Cache for Movie Info App
+เก็บผลค้นหาจากฐานข้อมูลและ TMDB (LRU + TTL) โดยใช้คำค้นที่ผ่าน search_key เป็น key
+(ตัวพิมพ์เล็ก NFC ไม่มี zero-width และช่องว่างเดียว) ผู้เรียกส่งคำค้นเดียวกันนี้ไปค้นจริงด้วย
+จึง 1 key = 1 ชุดผลลัพธ์ ไม่ตัดวรรณยุกต์: TMDB และ search_movies_ranked ให้ผลต่างกันสำหรับ "พีมาก" กับ "พี่มาก"
+"""
+
+import os
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv('SEARCH_CACHE_MAX_ENTRIES', '1000'))
+SEARCH_CACHE_LOCAL_TTL = int(os.getenv('SEARCH_CACHE_LOCAL_TTL', '60'))
+SEARCH_CACHE_TMDB_TTL = int(os.getenv('SEARCH_CACHE_TMDB_TTL', '3600'))
+
+SEARCH_CACHE_KINDS = ('local', 'tmdb')
+
+# zero-width space / non-joiner / joiner / BOM ที่มักติดมากับข้อความไทยที่คัดลอกมา
+_ZERO_WIDTH = dict.fromkeys([0x200B, 0x200C, 0x200D, 0xFEFF])
+
+
+def search_key(query) -> str:
+    """
+    คำค้นในรูปที่ใช้ทั้งเป็น key ของ cache และส่งไปค้นจริง (เรียกซ้ำได้ผลเดิม)
+
+    NFC, ตัวพิมพ์เล็ก, ลบ zero-width และรวมช่องว่างเป็นช่องเดียว (คงวรรณยุกต์ไทยไว้)
+    """
+    text = unicodedata.normalize('NFC', str(query or '')).translate(_ZERO_WIDTH).lower()
+    return ' '.join(text.split())
+
+
+class SearchResultCache:
+    """
+    LRU cache ของผลค้นหา แยก TTL ตามแหล่งข้อมูล
+
+    local: ผลจากฐานข้อมูล ถูกล้างทุกครั้งที่บันทึกหนัง (invalidate_local) และหมดอายุเร็ว
+           เพื่อให้เห็นหนังที่ import จาก process อื่น
+    tmdb: ผลจาก TMDB ไม่ขึ้นกับฐานข้อมูลของเรา เก็บได้นานกว่า
+    """
+
+    def __init__(self, max_entries: int = SEARCH_CACHE_MAX_ENTRIES,
+                 local_ttl: int = SEARCH_CACHE_LOCAL_TTL, tmdb_ttl: int = SEARCH_CACHE_TMDB_TTL):
+        self.max_entries = max(1, max_entries)
+        self.ttls = {'local': local_ttl, 'tmdb': tmdb_ttl}
+        # (kind, คำค้นตาม search_key, limit) -> (เวลาหมดอายุ, ผลค้นหา)
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+        # เพิ่มทุกครั้งที่ล้างผล local ใช้ทิ้งผลที่ค้นก่อนการ import แต่ตอบกลับมาทีหลัง
+        self.local_generation = 0
+
+        self.hits = dict.fromkeys(SEARCH_CACHE_KINDS, 0)
+        self.misses = dict.fromkeys(SEARCH_CACHE_KINDS, 0)
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def _key(kind: str, query: str, limit: Optional[int]) -> Optional[tuple]:
+        query = search_key(query)
+        return (kind, query, limit) if query else None
+
+    def get(self, kind: str, query: str, limit: Optional[int] = None) -> Optional[List[Dict]]:
+        """อ่านผลค้นหา (None ถ้าไม่มีหรือหมดอายุ)"""
+        key = self._key(kind, query, limit)
+        if key is None:
+            return None
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.monotonic():
+                del self._entries[key]
+                self.expirations += 1
+                entry = None
+
+            if entry is None:
+                self.misses[kind] += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits[kind] += 1
+            return entry[1]
+
+    def set(self, kind: str, query: str, results: List[Dict], limit: Optional[int] = None,
+            generation: Optional[int] = None):
+        """
+        บันทึกผลค้นหา
+
+        Args:
+            generation: local_generation ก่อนเริ่มค้น (ผล local ที่ค้นก่อนการ import จะไม่ถูกเก็บ)
+        """
+        key = self._key(kind, query, limit)
+        if key is None:
+            return
+
+        with self._lock:
+            if kind == 'local' and generation is not None and generation != self.local_generation:
+                return
+
+            self._entries[key] = (time.monotonic() + self.ttls[kind], results)
+            self._entries.move_to_end(key)
+
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate_local(self):
+        """ล้างผลค้นหาจากฐานข้อมูลทั้งหมด (เรียกเมื่อมีการบันทึกหนัง)"""
+        with self._lock:
+            self.local_generation += 1
+            for key in [key for key in self._entries if key[0] == 'local']:
+                del self._entries[key]
+                self.invalidations += 1
+
+    def clear(self):
+        """ล้างผลค้นหาทั้งหมด"""
+        with self._lock:
+            self.local_generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """สถิติ hit/miss แยกตามแหล่งข้อมูล"""
+        with self._lock:
+            stats = {
+                'size': len(self._entries),
+                'max_entries': self.max_entries,
+                'expirations': self.expirations,
+                'evictions': self.evictions,
+                'invalidations': self.invalidations
+            }
+            for kind in SEARCH_CACHE_KINDS:
+                total = self.hits[kind] + self.misses[kind]
+                stats[kind] = {
+                    'hits': self.hits[kind],
+                    'misses': self.misses[kind],
+                    'ttl': self.ttls[kind],
+                    'hit_rate': round(self.hits[kind] / total * 100, 2) if total else 0
+                }
+            return stats
+
+
+# Global instance
+search_result_cache = SearchResultCache()
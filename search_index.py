@@ -0,0 +1,428 @@
+"""
+Search Index for Movie Info App
+Inverted index ในหน่วยความจำสำหรับค้นหาหนัง (title, original_title, director, genres, cast)
+ใช้ character bigram จึงค้นหาภาษาไทยที่ไม่มีการเว้นวรรคระหว่างคำได้
+"""
+
+import json
+import os
+from bisect import bisect_left, insort
+import re
+import threading
+import time
+import unicodedata
+from typing import Dict, Iterable, List, Optional, Set
+
+# ปิดเป็นค่าเริ่มต้น: ทุก worker โหลดหนังทั้งหมดเข้าหน่วยความจำและโหลดใหม่ทุกรอบ refresh
+# ค้นหาผ่าน search_movies_ranked (pg_trgm) ในฐานข้อมูลแทน เปิดเมื่อ catalog เล็กและมี worker น้อย
+SEARCH_INDEX_ENABLED = os.getenv('SEARCH_INDEX_ENABLED', '0') == '1'
+# สร้าง index ใหม่จากฐานข้อมูลเป็นระยะ (รับการแก้ไขจาก process อื่น เช่น update script)
+SEARCH_INDEX_REFRESH_INTERVAL = int(os.getenv('SEARCH_INDEX_REFRESH_INTERVAL', '600'))
+# prefix index ของชื่อหนังสำหรับ /api/suggest (เก็บแค่ id, title, original_title, year จึงเล็กกว่า
+# search index มาก) เปิดเป็นค่าเริ่มต้นเพื่อให้ autocomplete ไม่ต้องถามฐานข้อมูลทุกครั้งที่พิมพ์
+SUGGEST_INDEX_ENABLED = os.getenv('SUGGEST_INDEX_ENABLED', '1') == '1'
+# จำนวน key สูงสุดที่ตรวจต่อ 1 คำขอ autocomplete (จำกัด latency ของ prefix สั้น ๆ)
+SUGGEST_SCAN_LIMIT = int(os.getenv('SUGGEST_SCAN_LIMIT', '200'))
+
+# คอลัมน์ที่เก็บไว้ใน index (พอสำหรับ search_movies โดยไม่ต้องกลับไปถามฐานข้อมูล)
+SEARCH_INDEX_COLUMNS = (
+    'id, tmdb_id, title, original_title, year, director, genres, cast_data, poster_path, trailer_id, '
+    'display_year, display_genres, display_cast'
+)
+SUGGEST_INDEX_COLUMNS = 'id, title, original_title, year'
+
+# วรรณยุกต์และเครื่องหมายของไทยที่ผู้ใช้มักพิมพ์ไม่ครบ: ไม้ไต่คู้ ่ ้ ๊ ๋ ์
+_THAI_MARKS = dict.fromkeys(range(0x0E47, 0x0E4D))
+# zero-width space / joiner ที่มักติดมากับข้อความไทย
+_ZERO_WIDTH = dict.fromkeys([0x200B, 0x200C, 0x200D, 0xFEFF])
+# ตัวคั่นคำ (ยกเว้นสระ/เครื่องหมายภาษาไทยที่ \w ไม่นับเป็นตัวอักษร)
+_SEPARATORS = re.compile(r'[^\w\u0E00-\u0E7F]+|_+')
+
+
+def normalize_text(text) -> str:
+    """แปลงข้อความให้อยู่ในรูปเดียวกันสำหรับค้นหา (ตัวพิมพ์เล็ก ตัดวรรณยุกต์ไทย รวมช่องว่าง)"""
+    if not text:
+        return ''
+
+    text = unicodedata.normalize('NFC', str(text)).lower()
+    text = text.translate(_ZERO_WIDTH).translate(_THAI_MARKS)
+    return _SEPARATORS.sub(' ', text).strip()
+
+
+def bigrams(text: str) -> Set[str]:
+    """character bigram ของแต่ละคำ (คำที่มีตัวอักษรเดียวไม่ถูก index ตรวจด้วย substring แทน)"""
+    grams = set()
+    for word in text.split():
+        grams.update(word[i:i + 2] for i in range(len(word) - 1))
+    return grams
+
+
+def _as_list(value) -> List:
+    """genres / cast_data อาจมาเป็น JSON string"""
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return [value]
+    return value if isinstance(value, list) else []
+
+
+def _document_text(row: Dict) -> str:
+    genres = _as_list(row.get('genres'))
+    cast = _as_list(row.get('cast_data'))
+    parts = [row.get('title'), row.get('original_title'), row.get('director')]
+    parts.extend(genres)
+    parts.extend(person.get('name') for person in cast if isinstance(person, dict))
+    return normalize_text(' '.join(str(part) for part in parts if part))
+
+
+class SuggestIndex:
+    """
+    Prefix index สำหรับ autocomplete: sorted array ของ (key, movie id) ค้นด้วย binary search
+
+    key คือ title และ original_title ที่ normalize แล้ว ตั้งแต่ต้นและตั้งแต่ต้นแต่ละคำ
+    (พิมพ์ "knight" เจอ "The Dark Knight")
+    """
+
+    def __init__(self):
+        self._keys: List[tuple] = []
+        # id -> (title ที่ normalize แล้ว, title, year, keys)
+        self._entries: Dict[int, tuple] = {}
+
+    @staticmethod
+    def _keys_for(row: Dict) -> Set[str]:
+        keys = set()
+        for text in (normalize_text(row.get('title')), normalize_text(row.get('original_title'))):
+            words = text.split()
+            keys.update(' '.join(words[i:]) for i in range(len(words)))
+        return keys
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict]) -> 'SuggestIndex':
+        """สร้าง index จากหลายแถว (sort ครั้งเดียว)"""
+        index = cls()
+        for row in rows:
+            keys = cls._keys_for(row)
+            index._entries[row['id']] = (normalize_text(row.get('title')), row.get('title'), row.get('year'), keys)
+        index._keys = sorted((key, movie_id) for movie_id, entry in index._entries.items() for key in entry[3])
+        return index
+
+    def _remove(self, movie_id: int):
+        entry = self._entries.pop(movie_id, None)
+        if entry is None:
+            return
+
+        for key in entry[3]:
+            position = bisect_left(self._keys, (key, movie_id))
+            if position < len(self._keys) and self._keys[position] == (key, movie_id):
+                del self._keys[position]
+
+    def add(self, row: Dict):
+        """เพิ่มหรืออัปเดตหนัง 1 เรื่อง"""
+        self._remove(row['id'])
+        keys = self._keys_for(row)
+        self._entries[row['id']] = (normalize_text(row.get('title')), row.get('title'), row.get('year'), keys)
+        for key in keys:
+            insort(self._keys, (key, row['id']))
+
+    def suggest(self, query: str, limit: int = 8) -> List[Dict]:
+        """
+        หนังที่ title ขึ้นต้นด้วยคำค้น (หรือมีคำที่ขึ้นต้นด้วยคำค้น)
+
+        เรียงลำดับ: title ขึ้นต้นด้วยคำค้นก่อน แล้วตาม title ที่สั้นกว่า
+        """
+        prefix = normalize_text(query)
+        if not prefix:
+            return []
+
+        keys = self._keys
+        position = bisect_left(keys, (prefix,))
+        end = min(len(keys), position + SUGGEST_SCAN_LIMIT)
+
+        found = {}
+        while position < end and keys[position][0].startswith(prefix):
+            movie_id = keys[position][1]
+            if movie_id not in found:
+                normalized_title = self._entries[movie_id][0]
+                found[movie_id] = (0 if normalized_title.startswith(prefix) else 1, len(normalized_title), -movie_id)
+            position += 1
+
+        ranked = sorted(found, key=found.get)[:limit]
+        return [
+            {'id': movie_id, 'title': self._entries[movie_id][1], 'year': self._entries[movie_id][2]}
+            for movie_id in ranked
+        ]
+
+    def __len__(self):
+        return len(self._keys)
+
+
+class BackgroundIndex:
+    """
+    โครงสร้างค้นหาในหน่วยความจำที่โหลดจากตาราง movies เบื้องหลังและโหลดใหม่ทุก refresh_interval
+
+    คลาสลูกกำหนด columns, _create (สร้างจากทุกแถว) และ _apply (เพิ่ม/อัปเดตทีละแถว)
+    ระหว่างที่ยังโหลดไม่เสร็จ ค้นหาได้ None เพื่อให้ใช้ฐานข้อมูลแทน
+    """
+
+    name = 'index'
+    columns = 'id, title'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data = self._create([])
+        self._pending: Optional[List] = None
+        self._started_pid = None
+        self._fields = [column.strip() for column in self.columns.split(',')]
+
+        self.ready = False
+        self.built_at = None
+        self.build_seconds = 0.0
+
+    def _create(self, rows: Iterable[Dict]):
+        raise NotImplementedError
+
+    def _apply(self, data, row: Dict):
+        raise NotImplementedError
+
+    def _size(self) -> int:
+        raise NotImplementedError
+
+    def build(self, rows: Iterable[Dict]):
+        """สร้างใหม่ทั้งหมด แล้วสลับมาใช้ทันที (การค้นหาระหว่างสร้างยังใช้ข้อมูลเดิม)"""
+        start = time.perf_counter()
+        with self._lock:
+            self._pending = []
+
+        data = self._create(rows)
+
+        with self._lock:
+            # ใส่การแก้ไขที่เกิดขึ้นระหว่างสร้าง
+            for row in self._pending:
+                self._apply(data, row)
+            self._pending = None
+
+            self._data = data
+            self.ready = True
+            self.built_at = time.time()
+            self.build_seconds = time.perf_counter() - start
+
+    def upsert(self, row: Dict):
+        """เพิ่มหรืออัปเดตหนัง 1 เรื่อง (เรียกหลังบันทึกลงฐานข้อมูล)"""
+        if not row.get('id') or not row.get('title'):
+            return
+
+        row = {field: row.get(field) for field in self._fields}
+        with self._lock:
+            if self._pending is not None:
+                self._pending.append(row)
+            if self.ready:
+                self._apply(self._data, row)
+
+    def load_rows(self, supabase, page_size: int = 1000) -> List[Dict]:
+        """อ่านหนังทั้งหมดจาก Supabase ทีละหน้า (keyset บน id) เฉพาะคอลัมน์ที่ใช้"""
+        rows = []
+        last_id = 0
+        while True:
+            result = supabase.table('movies').select(self.columns) \
+                .gt('id', last_id).order('id').limit(page_size).execute()
+            rows.extend(result.data)
+            if len(result.data) < page_size:
+                return rows
+            last_id = result.data[-1]['id']
+
+    def start(self, supabase, refresh_interval: int = SEARCH_INDEX_REFRESH_INTERVAL):
+        """โหลดเบื้องหลังตอนเริ่มแอป และโหลดใหม่ทุก refresh_interval วินาที (ครั้งเดียวต่อ process)"""
+        pid = os.getpid()
+        with self._lock:
+            if self._started_pid == pid:
+                return
+            self._started_pid = pid
+
+        def worker():
+            while True:
+                try:
+                    self.build(self.load_rows(supabase))
+                    print(f"{self.name} built: {self._size()} movies in {self.build_seconds:.2f}s")
+                except Exception as e:
+                    with self._lock:
+                        self._pending = None
+                    print(f"Error building {self.name}: {e}")
+                time.sleep(refresh_interval)
+
+        threading.Thread(target=worker, name=self.name.replace(' ', '-'), daemon=True).start()
+
+
+class SearchIndex(BackgroundIndex):
+    """
+    Inverted index: bigram -> movie ids
+
+    ผลค้นหาต้องมีทุก bigram ของคำค้น และต้องมีคำค้นเป็น substring ของข้อความจริง
+    เรียงลำดับ: title ตรงทั้งหมด > title ขึ้นต้นด้วยคำค้น > title มีคำค้น > พบใน field อื่น (ใหม่สุดก่อน)
+    """
+
+    name = 'Search index'
+    columns = SEARCH_INDEX_COLUMNS
+
+    def __init__(self):
+        super().__init__()
+        self.searches = 0
+
+    # ----- การแก้ไข index -----
+
+    def _create(self, rows: Iterable[Dict]):
+        # (title bigram -> ids, bigram ของทุก field -> ids, id -> (title, ข้อความทั้งหมด, row))
+        index = ({}, {}, {})
+        for row in rows:
+            self._apply(index, row)
+        return index
+
+    def _apply(self, index, row: Dict):
+        title_postings, postings, documents = index
+        movie_id = row['id']
+        self._remove(index, movie_id)
+
+        title = normalize_text(row.get('title'))
+        text = _document_text(row)
+        documents[movie_id] = (title, text, row)
+        for gram in bigrams(title):
+            title_postings.setdefault(gram, set()).add(movie_id)
+        for gram in bigrams(text):
+            postings.setdefault(gram, set()).add(movie_id)
+
+    def _remove(self, index, movie_id: int):
+        title_postings, postings, documents = index
+        document = documents.pop(movie_id, None)
+        if document is None:
+            return
+
+        for target, text in ((title_postings, document[0]), (postings, document[1])):
+            for gram in bigrams(text):
+                ids = target.get(gram)
+                if ids is not None:
+                    ids.discard(movie_id)
+                    if not ids:
+                        del target[gram]
+
+    def _size(self) -> int:
+        return len(self._data[2])
+
+    # ----- การค้นหา -----
+
+    @staticmethod
+    def _candidates(postings, grams) -> Optional[Set[int]]:
+        """ids ที่มีทุก bigram (None = คำค้นไม่มี bigram ต้องตรวจทุกเรื่อง)"""
+        candidates = None
+        for gram in sorted(grams, key=lambda g: len(postings.get(g, ()))):
+            ids = postings.get(gram)
+            if not ids:
+                return set()
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return set()
+        return candidates
+
+    def search(self, query: str, limit: int = 10) -> Optional[List[Dict]]:
+        """
+        ค้นหาหนังจาก index
+
+        Returns:
+            รายการแถวหนัง หรือ None ถ้า index ยังไม่พร้อม (ให้ใช้ฐานข้อมูลแทน)
+        """
+        if not self.ready:
+            return None
+
+        term = normalize_text(query)
+        if not term:
+            return []
+
+        grams = bigrams(term)
+        with self._lock:
+            title_postings, postings, documents = self._data
+
+            # 1) ค้นใน title ก่อน แล้วจัดอันดับ
+            candidates = self._candidates(title_postings, grams)
+            matches = []
+            for movie_id in (documents if candidates is None else candidates):
+                title = documents[movie_id][0]
+                if term in title:
+                    rank = 0 if title == term else 1 if title.startswith(term) else 2
+                    matches.append((rank, -movie_id, movie_id))
+            matches.sort()
+            result = [movie_id for _, _, movie_id in matches[:limit]]
+
+            # 2) ถ้ายังไม่ครบ เติมจาก field อื่น (ใหม่สุดก่อน)
+            if len(result) < limit:
+                found = set(result)
+                candidates = self._candidates(postings, grams)
+                for movie_id in sorted(documents if candidates is None else candidates, reverse=True):
+                    if movie_id not in found and term in documents[movie_id][1]:
+                        result.append(movie_id)
+                        if len(result) >= limit:
+                            break
+
+            self.searches += 1
+            return [dict(documents[movie_id][2]) for movie_id in result]
+
+    def stats(self) -> Dict:
+        """ขนาดและสถานะของ index"""
+        return {
+            'enabled': SEARCH_INDEX_ENABLED,
+            'ready': self.ready,
+            'movies': self._size(),
+            'terms': len(self._data[1]),
+            'searches': self.searches,
+            'build_seconds': round(self.build_seconds, 3),
+            'built_at': self.built_at
+        }
+
+
+class TitleSuggestIndex(BackgroundIndex):
+    """SuggestIndex ที่โหลดจากฐานข้อมูลเบื้องหลัง แยกจาก SearchIndex (ใช้ได้แม้ปิด search index)"""
+
+    name = 'Suggest index'
+    columns = SUGGEST_INDEX_COLUMNS
+
+    def __init__(self):
+        super().__init__()
+        self.suggestions = 0
+
+    def _create(self, rows: Iterable[Dict]) -> SuggestIndex:
+        return SuggestIndex.from_rows(rows)
+
+    def _apply(self, index: SuggestIndex, row: Dict):
+        index.add(row)
+
+    def _size(self) -> int:
+        return len(self._data._entries)
+
+    def suggest(self, query: str, limit: int = 8) -> Optional[List[Dict]]:
+        """
+        Autocomplete จาก prefix ของ title
+
+        Returns:
+            รายการ {'id', 'title', 'year'} หรือ None ถ้ายังโหลดไม่เสร็จ
+        """
+        if not self.ready:
+            return None
+
+        with self._lock:
+            self.suggestions += 1
+            return self._data.suggest(query, limit)
+
+    def stats(self) -> Dict:
+        """ขนาดและสถานะของ index"""
+        return {
+            'enabled': SUGGEST_INDEX_ENABLED,
+            'ready': self.ready,
+            'movies': self._size(),
+            'keys': len(self._data),
+            'suggestions': self.suggestions,
+            'build_seconds': round(self.build_seconds, 3),
+            'built_at': self.built_at
+        }
+
+
+# Global instances
+search_index = SearchIndex()
+suggest_index = TitleSuggestIndex()
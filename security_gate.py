@@ -0,0 +1,201 @@
+"""
+Security Gate for Movie Info App
+ตรวจ IP, User-Agent และ rate limit ใน before_request ก่อนที่ route จะ query Supabase
+หรือเรียก TMDB แล้วนับจำนวน request ที่ถูกปฏิเสธแยกตามเหตุผล
+"""
+
+import os
+from typing import Dict, List, Optional, Tuple
+
+from flask import jsonify, render_template, request
+from werkzeug.middleware.proxy_fix import ProxyFix
+
+from security_middleware import RATE_LIMIT_WINDOWS, SlidingWindowCounter, security_middleware, input_validator
+from security_store import StoredMap, security_state_store
+
+# จำกัดการนำเข้าหนัง (ทุกครั้งเรียก TMDB และเขียนฐานข้อมูล)
+MAX_REQUESTS_PER_MINUTE = 10  # จำกัด 10 ครั้งต่อนาที
+MAX_REQUESTS_PER_HOUR = 100   # จำกัด 100 ครั้งต่อชั่วโมง
+
+# จำนวน proxy ที่เชื่อถือได้หน้า app (เช่น load balancer ของ Render = 1)
+# IP ของผู้ใช้คือค่าที่ proxy ตัวนอกสุดต่อท้ายใน X-Forwarded-For ค่าที่ client ส่งมาเองถูกข้าม
+# 0 = ไม่มี proxy ใช้ IP ของ connection
+TRUSTED_PROXY_COUNT = int(os.getenv('TRUSTED_PROXY_COUNT', '1'))
+
+# จำกัดการค้นหา (/api/suggest ถูกเรียกทุกครั้งที่พิมพ์ จึงสูงกว่าการนำเข้า)
+SEARCH_RATE_LIMIT_PER_MINUTE = int(os.getenv('SEARCH_RATE_LIMIT_PER_MINUTE', '120'))
+
+# policy ต่อ endpoint (endpoint อื่นตรวจเฉพาะ IP)
+# rate_limit: ชื่อตัวนับใน SecurityGate.rate_limits
+# user_agent: ปฏิเสธ bot ตาม InputValidator.validate_user_agent
+GATE_POLICIES = {
+    'import': {'rate_limit': 'import', 'user_agent': True},
+    'search': {'rate_limit': 'search', 'user_agent': True},
+    'default': {'rate_limit': None, 'user_agent': False}
+}
+
+ENDPOINT_POLICIES = {
+    'api_import_movie': 'import',
+    'import_movie': 'import',
+    'search': 'search',
+    'api_search': 'search',
+    'api_suggest': 'search'
+}
+
+# หน้าฟอร์มที่ GET แค่แสดงฟอร์ม ตรวจ policy เต็มเฉพาะตอน submit
+FORM_ENDPOINTS = {'import_movie'}
+
+# เหตุผลจาก SecurityMiddleware.check_ip_security -> ชื่อตัวนับ
+IP_REJECT_REASONS = {
+    'IP is blacklisted': 'blacklisted',
+    'Too many failed attempts': 'failed_attempts',
+    'Suspicious activity detected': 'suspicious'
+}
+
+WINDOW_LABELS = {'per_minute': 'นาที', 'per_hour': 'ชั่วโมง'}
+
+
+def get_client_ip():
+    """ดึง IP address ของผู้ใช้ (ProxyFix ใน SecurityGate.init_app แปลง X-Forwarded-For แล้ว)"""
+    return request.remote_addr
+
+
+class SecurityGate:
+    """
+    ด่านตรวจก่อนเข้า route เรียงจากถูกไปแพง: IP (อ่าน store), User-Agent (regex),
+    rate limit (เขียน store) แล้วตอบ 403 / 429 ทันทีโดยไม่เข้า route
+    """
+
+    def __init__(self, middleware=None, validator=None, store=None):
+        store = store or security_state_store
+        self.middleware = middleware or security_middleware
+        self.validator = validator or input_validator
+
+        # ชื่อ -> (ตัวนับ, limit ต่อ window)
+        self.rate_limits = {
+            'import': (
+                SlidingWindowCounter({'per_minute': 60, 'per_hour': 3600}, store, 'api_rate_limit'),
+                {'per_minute': MAX_REQUESTS_PER_MINUTE, 'per_hour': MAX_REQUESTS_PER_HOUR}
+            ),
+            'search': (
+                # per_hour ใช้แสดงในหน้า admin เท่านั้น
+                SlidingWindowCounter({'per_minute': 60, 'per_hour': 3600}, store, 'search_rate_limit'),
+                {'per_minute': SEARCH_RATE_LIMIT_PER_MINUTE}
+            )
+        }
+
+        # "policy:เหตุผล" -> จำนวนที่ถูกปฏิเสธ (รวมทุก worker)
+        self.rejects = StoredMap(store, 'security_gate_rejects', int)
+
+    def init_app(self, app, trusted_proxies: int = TRUSTED_PROXY_COUNT):
+        """ลงทะเบียนเป็น before_request ของ app และอ่าน IP จาก proxy ที่เชื่อถือได้เท่านั้น"""
+        if trusted_proxies:
+            app.wsgi_app = ProxyFix(app.wsgi_app, x_for=trusted_proxies)
+        app.before_request(self.check_request)
+
+    def policy_for(self, endpoint: Optional[str], method: str) -> str:
+        """ชื่อ policy ของ request"""
+        if method == 'OPTIONS' or (method == 'GET' and endpoint in FORM_ENDPOINTS):
+            return 'default'
+        return ENDPOINT_POLICIES.get(endpoint, 'default')
+
+    def check(self, ip_address: str, user_agent: str, policy_name: str) -> Optional[Tuple[str, str, int, int]]:
+        """
+        ตรวจ request ตาม policy
+
+        Returns:
+            None ถ้าผ่าน หรือ (เหตุผล, ข้อความ, HTTP status, Retry-After วินาที หรือ 0)
+        """
+        policy = GATE_POLICIES[policy_name]
+
+        ip_check = self.middleware.check_ip_security(ip_address)
+        if not ip_check['allowed']:
+            return IP_REJECT_REASONS.get(ip_check['reason'], 'blocked'), f"Access denied: {ip_check['reason']}", 403, 0
+
+        # IP ใน whitelist ข้ามการตรวจสอบอื่นๆ
+        if ip_check.get('whitelisted'):
+            return None
+
+        if policy['user_agent'] and not self.validator.validate_user_agent(user_agent):
+            return 'user_agent', 'Invalid request', 403, 0
+
+        if policy['rate_limit']:
+            counter, limits = self.rate_limits[policy['rate_limit']]
+            exceeded, _ = counter.hit(ip_address, limits)
+            if exceeded:
+                label = WINDOW_LABELS.get(exceeded, exceeded)
+                return 'rate_limit', f"เกินจำนวนการเรียก API ต่อ{label} ({limits[exceeded]} ครั้ง)", 429, RATE_LIMIT_WINDOWS[exceeded]
+
+        return None
+
+    def check_request(self):
+        """before_request: คืน response ปฏิเสธ หรือ None ให้ Flask เข้า route ต่อ"""
+        # admin มีการ login ของตัวเอง และต้องเข้าได้เสมอเพื่อแก้ blacklist ที่ตั้งผิด
+        if request.endpoint == 'static' or request.blueprint == 'admin':
+            return None
+
+        policy_name = self.policy_for(request.endpoint, request.method)
+        try:
+            rejected = self.check(get_client_ip(), request.headers.get('User-Agent', ''), policy_name)
+            if rejected is None:
+                return None
+            self.rejects.increment(f'{policy_name}:{rejected[0]}')
+        except Exception as e:
+            # store มีปัญหาไม่ควรทำให้เว็บล่ม
+            print(f"Error checking request security: {e}")
+            return None
+
+        return self._reject_response(*rejected)
+
+    @staticmethod
+    def _reject_response(reason: str, message: str, status: int, retry_after: int):
+        if request.path.startswith('/api/'):
+            response = jsonify({
+                'success': False,
+                'message': f'Rate limit exceeded: {message}' if reason == 'rate_limit' else message,
+                'error_type': {'rate_limit': 'rate_limit', 'user_agent': 'invalid_agent'}.get(reason, 'blocked')
+            })
+        else:
+            response = render_template('error.html', message=message)
+
+        headers = {'Retry-After': str(retry_after)} if retry_after else {}
+        return response, status, headers
+
+    def rate_limit_counts(self, name: str, ip_address: str) -> Dict[str, int]:
+        """จำนวน request ต่อ window ของ IP (ไม่นับเพิ่ม)"""
+        counter, _ = self.rate_limits[name]
+        return counter.counts(ip_address)
+
+    def active_clients(self, window: str = 'per_hour') -> List[Dict]:
+        """IP ที่เรียก route นำเข้า/ค้นหาใน window (รวมทุก rate limit) เรียงจากล่าสุด"""
+        clients = {}
+        for counter, _ in self.rate_limits.values():
+            for ip, count, last_request in counter.active(window):
+                client = clients.setdefault(ip, {'ip': ip, 'requests_count': 0, 'last_request': 0})
+                client['requests_count'] += count
+                client['last_request'] = max(client['last_request'], last_request)
+        return sorted(clients.values(), key=lambda client: client['last_request'], reverse=True)
+
+    def tracked_clients(self) -> int:
+        """จำนวน IP ที่มีตัวนับ rate limit อยู่ใน store (นับซ้ำถ้าอยู่หลาย rate limit)"""
+        return sum(len(counter) for counter, _ in self.rate_limits.values())
+
+    def stats(self) -> Dict:
+        """จำนวน request ที่ถูกปฏิเสธแยกตามเหตุผลและ policy"""
+        by_reason = {}
+        by_policy = {}
+        for key, count in self.rejects.items():
+            policy_name, _, reason = key.partition(':')
+            by_reason[reason] = by_reason.get(reason, 0) + count
+            by_policy[policy_name] = by_policy.get(policy_name, 0) + count
+
+        return {
+            'total_rejects': sum(by_reason.values()),
+            'by_reason': by_reason,
+            'by_policy': by_policy,
+            'search_limit_per_minute': SEARCH_RATE_LIMIT_PER_MINUTE
+        }
+
+
+# Global instance
+security_gate = SecurityGate()
@@ -3,35 +3,61 @@ Security Middleware for Movie Info App
 ป้องกันการสแปมและความปลอดภัย
 """
 
+import os
 import re
 import hashlib
 import time
-from typing import Dict, List, Optional
-from collections import defaultdict
+from typing import Dict, Iterator, List, Optional, Tuple
 import logging
 
+from ip_ranges import IP_LIST_REFRESH_INTERVAL, IPRangeSet
+from security_store import MemoryStateStore, StoredMap, security_state_store
+
+# ลืมจำนวน suspicious activity ของ IP ที่เงียบไปนานเท่านี้ (วินาที)
+SECURITY_SUSPICIOUS_TTL = int(os.getenv('SECURITY_SUSPICIOUS_TTL', '86400'))
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class SecurityMiddleware:
-    def __init__(self):
-        # Blacklist สำหรับ IP ที่ถูกแบน
-        self.ip_blacklist = set()
-        
-        # Whitelist สำหรับ IP ที่เชื่อถือได้
-        self.ip_whitelist = set()
+    def __init__(self, store=None):
+        # สถานะเก็บใน store ที่ทุก worker ใช้ร่วมกัน (ไม่ระบุ = เก็บใน process นี้)
+        store = store or MemoryStateStore()
         
-        # Suspicious activity tracking
-        self.suspicious_ips = defaultdict(int)
+        # Blacklist สำหรับ IP หรือช่วง CIDR ที่ถูกแบน
+        self.ip_blacklist = IPRangeSet(store, 'ip_blacklist')
         
-        # Failed attempts tracking
-        self.failed_attempts = defaultdict(list)
+        # Whitelist สำหรับ IP หรือช่วง CIDR ที่เชื่อถือได้
+        self.ip_whitelist = IPRangeSet(store, 'ip_whitelist')
         
         # Configuration
         self.max_failed_attempts = 5  # จำนวนครั้งที่ผิดพลาดสูงสุด
         self.ban_duration = 3600  # เวลาแบน (วินาที)
         self.suspicious_threshold = 10  # เกณฑ์การสงสัย
+        self.suspicious_ttl = SECURITY_SUSPICIOUS_TTL  # ล้างตัวนับเมื่อ IP ไม่มีกิจกรรมน่าสงสัยนานเท่านี้ (วินาที)
+        
+        # Suspicious activity tracking
+        self.suspicious_ips = StoredMap(store, 'suspicious_ips', int, ttl=self.suspicious_ttl)
+        
+        # Failed attempts tracking (หมดอายุพร้อมกับ ban)
+        self.failed_attempts = StoredMap(store, 'failed_attempts', list, ttl=self.ban_duration)
+        
+        # namespace -> (เวลาที่ตรวจ, มีข้อมูลหรือไม่) ใช้ข้ามการอ่านราย IP เมื่อ map ว่าง
+        self.refresh_interval = IP_LIST_REFRESH_INTERVAL
+        self._has_entries = {}
+    
+    def _may_contain(self, stored_map: StoredMap) -> bool:
+        """False ถ้า map ว่าง (ตรวจขนาดใน store ไม่บ่อยกว่า refresh_interval)"""
+        now = time.monotonic()
+        checked = self._has_entries.get(stored_map.namespace)
+        if checked is None or now - checked[0] >= self.refresh_interval:
+            checked = (now, len(stored_map) > 0)
+            self._has_entries[stored_map.namespace] = checked
+        return checked[1]
+    
+    def _mark_has_entries(self, stored_map: StoredMap):
+        self._has_entries[stored_map.namespace] = (time.monotonic(), True)
         
     def check_ip_security(self, ip_address: str) -> Dict:
         """ตรวจสอบความปลอดภัยของ IP address"""
@@ -49,16 +75,16 @@ class SecurityMiddleware:
         
         # ตรวจสอบ whitelist (ข้ามการตรวจสอบอื่นๆ)
         if ip_address in self.ip_whitelist:
+            result['whitelisted'] = True
             return result
         
         # ตรวจสอบ failed attempts
-        if ip_address in self.failed_attempts:
-            failed_times = self.failed_attempts[ip_address]
+        failed_times = self.failed_attempts[ip_address] if self._may_contain(self.failed_attempts) else None
+        if failed_times:
             current_time = time.time()
             
-            # ลบ failed attempts เก่า
+            # ไม่นับ failed attempts เก่า (ลบจริงตอนบันทึกครั้งถัดไป)
             failed_times = [t for t in failed_times if current_time - t < self.ban_duration]
-            self.failed_attempts[ip_address] = failed_times
             
             if len(failed_times) >= self.max_failed_attempts:
                 result['allowed'] = False
@@ -67,7 +93,7 @@ class SecurityMiddleware:
                 return result
         
         # ตรวจสอบ suspicious activity
-        if self.suspicious_ips[ip_address] >= self.suspicious_threshold:
+        if self._may_contain(self.suspicious_ips) and self.suspicious_ips[ip_address] >= self.suspicious_threshold:
             result['allowed'] = False
             result['reason'] = 'Suspicious activity detected'
             return result
@@ -77,35 +103,49 @@ class SecurityMiddleware:
     def record_failed_attempt(self, ip_address: str):
         """บันทึกการพยายามที่ล้มเหลว"""
         current_time = time.time()
-        self.failed_attempts[ip_address].append(current_time)
         
-        # ลบข้อมูลเก่า
-        self.failed_attempts[ip_address] = [
-            t for t in self.failed_attempts[ip_address]
+        # เพิ่มครั้งล่าสุดและลบข้อมูลเก่าใน update เดียว
+        self.failed_attempts.update(ip_address, lambda failed_times: ([
+            t for t in failed_times
             if current_time - t < self.ban_duration
-        ]
+        ] + [current_time], None))
+        self._mark_has_entries(self.failed_attempts)
         
         logger.warning(f"Failed attempt recorded for IP: {ip_address}")
     
     def record_suspicious_activity(self, ip_address: str, activity_type: str):
         """บันทึกกิจกรรมที่น่าสงสัย"""
-        self.suspicious_ips[ip_address] += 1
+        self.suspicious_ips.increment(ip_address)
+        self._mark_has_entries(self.suspicious_ips)
         logger.warning(f"Suspicious activity detected: {activity_type} from IP: {ip_address}")
     
-    def add_to_blacklist(self, ip_address: str):
-        """เพิ่ม IP ลงใน blacklist"""
-        self.ip_blacklist.add(ip_address)
-        logger.warning(f"IP added to blacklist: {ip_address}")
+    def add_to_blacklist(self, ip_address: str) -> str:
+        """เพิ่ม IP หรือช่วง CIDR ลงใน blacklist (ValueError ถ้าไม่ถูกต้อง)"""
+        entry = self.ip_blacklist.add(ip_address)
+        logger.warning(f"IP added to blacklist: {entry}")
+        return entry
     
-    def add_to_whitelist(self, ip_address: str):
-        """เพิ่ม IP ลงใน whitelist"""
-        self.ip_whitelist.add(ip_address)
-        logger.info(f"IP added to whitelist: {ip_address}")
+    def add_to_whitelist(self, ip_address: str) -> str:
+        """เพิ่ม IP หรือช่วง CIDR ลงใน whitelist (ValueError ถ้าไม่ถูกต้อง)"""
+        entry = self.ip_whitelist.add(ip_address)
+        logger.info(f"IP added to whitelist: {entry}")
+        return entry
     
     def remove_from_blacklist(self, ip_address: str):
         """ลบ IP ออกจาก blacklist"""
         self.ip_blacklist.discard(ip_address)
         logger.info(f"IP removed from blacklist: {ip_address}")
+    
+    def remove_from_whitelist(self, ip_address: str):
+        """ลบ IP ออกจาก whitelist"""
+        self.ip_whitelist.discard(ip_address)
+        logger.info(f"IP removed from whitelist: {ip_address}")
+
+# bot patterns ที่ถูกปฏิเสธ (compile ครั้งเดียว เพราะตรวจทุก request ที่ผ่าน security gate)
+BOT_USER_AGENT_PATTERN = re.compile(
+    r'bot|crawler|spider|scraper|curl|wget|python-requests|postman|insomnia',
+    re.IGNORECASE
+)
 
 class InputValidator:
     """ตรวจสอบความถูกต้องของข้อมูล input"""
@@ -151,89 +191,142 @@ class InputValidator:
             return False
         
         # ตรวจสอบ bot patterns
-        bot_patterns = [
-            r'bot', r'crawler', r'spider', r'scraper',
-            r'curl', r'wget', r'python-requests',
-            r'postman', r'insomnia'
-        ]
-        
-        user_agent_lower = user_agent.lower()
-        for pattern in bot_patterns:
-            if re.search(pattern, user_agent_lower):
-                return False
-        
-        return True
+        return not BOT_USER_AGENT_PATTERN.search(user_agent)
+
+# ขนาด window ของ rate limit (วินาที)
+RATE_LIMIT_WINDOWS = {
+    'per_minute': 60,
+    'per_hour': 3600,
+    'per_day': 86400
+}
+
+
+class SlidingWindowCounter:
+    """
+    นับ request ต่อ key (IP) แบบ sliding window counter
+
+    แต่ละ window เก็บเพียงตัวนับของช่วงปัจจุบันและช่วงก่อนหน้า แล้วประมาณจำนวนใน window
+    ที่เลื่อนตามเวลาเป็น previous * (ส่วนของช่วงก่อนหน้าที่ยังอยู่ใน window) + current
+    หน่วยความจำต่อ IP และเวลาต่อการตรวจสอบจึงคงที่ ไม่ขึ้นกับจำนวน request
+
+    ตัวนับเก็บใน store (ไม่ระบุ = เก็บใน process นี้) ใช้ SQLiteStateStore เพื่อให้ทุก worker
+    นับรวมกัน
+    """
+
+    def __init__(self, windows: Dict[str, int], store=None, namespace: str = 'rate_limit'):
+        self.windows = dict(windows)
+        self._sizes = tuple(self.windows.values())
+        self.store = store or MemoryStateStore()
+        self.namespace = namespace
+        # IP ที่ไม่มี request นานกว่า window ที่ยาวที่สุดมีตัวนับเป็น 0 แล้ว ลบทิ้งได้
+        self.store.track(namespace, max(self._sizes))
+        # ค่าใน store ต่อ key: [last_request, (start, current, previous) ต่อ window เรียงตาม self.windows]
+
+    def _roll(self, state: list, now: float):
+        """เลื่อนช่วงของทุก window ให้ตรงกับเวลาปัจจุบัน"""
+        for i, size in enumerate(self._sizes):
+            slot = 1 + i * 3
+            bucket_start = now - now % size
+            if state[slot] != bucket_start:
+                # ช่วงก่อนหน้าที่ติดกันยังนับได้ ถ้าเงียบไปนานกว่านั้นเริ่มจาก 0
+                state[slot + 2] = state[slot + 1] if bucket_start - state[slot] == size else 0
+                state[slot + 1] = 0
+                state[slot] = bucket_start
+
+    def _estimate(self, state: list, now: float) -> Dict[str, int]:
+        counts = {}
+        for i, (name, size) in enumerate(self.windows.items()):
+            slot = 1 + i * 3
+            weight = (size - (now - state[slot])) / size
+            counts[name] = int(state[slot + 2] * weight + state[slot + 1])
+        return counts
+
+    def _state(self, state: Optional[list], now: float) -> list:
+        # เริ่มใหม่ถ้ายังไม่มี หรือจำนวน window เปลี่ยนจากที่เก็บไว้
+        if state is None or len(state) != 1 + 3 * len(self._sizes):
+            state = [now] + [0, 0, 0] * len(self._sizes)
+        self._roll(state, now)
+        return state
+
+    def hit(self, key: str, limits: Dict[str, int], now: Optional[float] = None) -> Tuple[Optional[str], Dict[str, int]]:
+        """
+        ตรวจสอบ limit แล้วนับ request นี้ถ้ายังไม่เกิน (atomic)
+
+        Args:
+            key: IP address
+            limits: จำนวน request สูงสุดต่อ window (ชื่อเดียวกับ windows)
+
+        Returns:
+            (ชื่อ window ที่เกิน limit หรือ None, จำนวน request ก่อนนับครั้งนี้ต่อ window)
+        """
+        now = time.time() if now is None else now
+
+        def apply(state):
+            state = self._state(state, now)
+            counts = self._estimate(state, now)
+
+            for name, limit in limits.items():
+                if counts[name] >= limit:
+                    return state, (name, counts)
+
+            state[0] = now
+            for i in range(len(self._sizes)):
+                state[2 + i * 3] += 1
+            return state, (None, counts)
+
+        return self.store.update(self.namespace, key, apply)
+
+    def counts(self, key: str, now: Optional[float] = None) -> Dict[str, int]:
+        """จำนวน request ต่อ window ของ key (ไม่นับเพิ่ม)"""
+        now = time.time() if now is None else now
+        state = self.store.get(self.namespace, key)
+        if state is None:
+            return dict.fromkeys(self.windows, 0)
+        return self._estimate(self._state(list(state), now), now)
+
+    def active(self, window: str, now: Optional[float] = None) -> Iterator[Tuple[str, int, float]]:
+        """(key, จำนวน request, เวลา request ล่าสุด) ของ key ที่มี request ใน window (ใช้ในหน้า admin)"""
+        now = time.time() if now is None else now
+        for key, state in self.store.items(self.namespace):
+            count = self._estimate(self._state(list(state), now), now)[window]
+            if count:
+                yield key, count, state[0]
+
+    def __len__(self):
+        return self.store.count(self.namespace)
+
 
 class RateLimiter:
     """จำกัดจำนวนการเรียก API"""
     
-    def __init__(self):
-        self.requests = defaultdict(list)
+    def __init__(self, store=None):
         self.limits = {
             'per_minute': 10,
             'per_hour': 100,
             'per_day': 1000
         }
+        self.requests = SlidingWindowCounter(RATE_LIMIT_WINDOWS, store, 'rate_limiter')
     
     def check_rate_limit(self, ip_address: str) -> Dict:
         """ตรวจสอบ rate limit"""
-        current_time = time.time()
-        
-        # ลบข้อมูลเก่า
-        self.requests[ip_address] = [
-            t for t in self.requests[ip_address]
-            if current_time - t < 86400  # 24 ชั่วโมง
-        ]
+        exceeded, counts = self.requests.hit(ip_address, self.limits)
         
-        # นับจำนวนการเรียก
-        requests_last_minute = len([
-            t for t in self.requests[ip_address]
-            if current_time - t < 60
-        ])
-        
-        requests_last_hour = len([
-            t for t in self.requests[ip_address]
-            if current_time - t < 3600
-        ])
-        
-        requests_last_day = len(self.requests[ip_address])
-        
-        # ตรวจสอบ limit
-        if requests_last_minute >= self.limits['per_minute']:
-            return {
-                'allowed': False,
-                'reason': f"Rate limit exceeded: {requests_last_minute}/{self.limits['per_minute']} per minute",
-                'retry_after': 60
-            }
-        
-        if requests_last_hour >= self.limits['per_hour']:
-            return {
-                'allowed': False,
-                'reason': f"Rate limit exceeded: {requests_last_hour}/{self.limits['per_hour']} per hour",
-                'retry_after': 3600
-            }
-        
-        if requests_last_day >= self.limits['per_day']:
+        if exceeded:
+            window = exceeded.replace('per_', '')
             return {
                 'allowed': False,
-                'reason': f"Rate limit exceeded: {requests_last_day}/{self.limits['per_day']} per day",
-                'retry_after': 86400
+                'reason': f"Rate limit exceeded: {counts[exceeded]}/{self.limits[exceeded]} per {window}",
+                'retry_after': RATE_LIMIT_WINDOWS[exceeded]
             }
         
-        # เพิ่มการเรียกปัจจุบัน
-        self.requests[ip_address].append(current_time)
-        
         return {
             'allowed': True,
             'reason': 'OK',
             'limits': {
-                'per_minute': f"{requests_last_minute}/{self.limits['per_minute']}",
-                'per_hour': f"{requests_last_hour}/{self.limits['per_hour']}",
-                'per_day': f"{requests_last_day}/{self.limits['per_day']}"
+                name: f"{counts[name]}/{limit}" for name, limit in self.limits.items()
             }
         }
 
 # Global instances
-security_middleware = SecurityMiddleware()
+security_middleware = SecurityMiddleware(security_state_store)
 input_validator = InputValidator()
-rate_limiter = RateLimiter()
@@ -0,0 +1,464 @@
+"""
+Security State Store for Movie Info App
+เก็บสถานะของ rate limiter และ security middleware (ตัวนับ, blacklist, whitelist)
+ให้ทุก gunicorn worker ใช้ร่วมกันและไม่หายเมื่อ restart
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+try:
+    import resource
+except ImportError:  # Windows: ไม่มีสถิติหน่วยความจำของ process
+    resource = None
+
+# Load environment variables
+load_dotenv()
+
+# sqlite: ใช้ร่วมกันทุก process บนเครื่องเดียวกัน / memory: แยกต่อ process (แบบเดิม)
+SECURITY_STATE_BACKEND = os.getenv('SECURITY_STATE_BACKEND', 'sqlite')
+SECURITY_STATE_PATH = os.getenv(
+    'SECURITY_STATE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'security_state.sqlite3')
+)
+
+# จำนวน IP สูงสุดต่อประเภทข้อมูลที่ติดตาม (rate limit, suspicious, failed attempts)
+SECURITY_STATE_MAX_ENTRIES = int(os.getenv('SECURITY_STATE_MAX_ENTRIES', '100000'))
+# รอบการลบ IP ที่หมดอายุและตัดส่วนที่เกินขนาด (วินาที)
+SECURITY_STATE_SWEEP_INTERVAL = int(os.getenv('SECURITY_STATE_SWEEP_INTERVAL', '60'))
+
+# func(ค่าเดิมหรือ None) -> (ค่าใหม่หรือ None เพื่อลบ, ผลลัพธ์ที่คืนให้ผู้เรียก)
+UpdateFunc = Callable[[Optional[Any]], Tuple[Optional[Any], Any]]
+
+
+class _BoundedStore:
+    """
+    ส่วนที่ใช้ร่วมกันของทุก backend: TTL ต่อ namespace, sweeper เบื้องหลัง และสถิติ
+
+    namespace ที่ลงทะเบียนด้วย track() เป็นข้อมูลติดตามต่อ IP: หมดอายุเมื่อไม่ถูกเขียนนาน ttl วินาที
+    และเก็บได้ไม่เกิน max_entries (ลบ IP ที่ไม่ถูกเขียนนานที่สุดก่อน)
+    namespace อื่น (blacklist, whitelist) เก็บถาวรจนกว่าจะถูกลบ
+    """
+
+    backend = None
+
+    def __init__(self, max_entries: int, sweep_interval: int):
+        self.max_entries = max(1, max_entries)
+        self.sweep_interval = sweep_interval
+        self._ttls: Dict[str, int] = {}
+        self._stats_lock = threading.Lock()
+        self._sweeper_lock = threading.Lock()
+        self._started_pid = None
+
+        self.expirations = 0
+        self.evictions = 0
+        self.sweeps = 0
+        self.last_sweep_ms = 0.0
+
+    def track(self, namespace: str, ttl: int):
+        """กำหนดให้ namespace เป็นข้อมูลติดตามต่อ IP ที่หมดอายุหลัง ttl วินาที"""
+        self._ttls[namespace] = ttl
+
+    def _expires_at(self, namespace: str, now: float) -> Optional[float]:
+        ttl = self._ttls.get(namespace)
+        return now + ttl if ttl is not None else None
+
+    def _count(self, expirations: int = 0, evictions: int = 0):
+        if expirations or evictions:
+            with self._stats_lock:
+                self.expirations += expirations
+                self.evictions += evictions
+
+    def _ensure_sweeper(self):
+        """เริ่ม sweeper ของ process นี้ (เริ่มใหม่หลัง fork)"""
+        pid = os.getpid()
+        if self._started_pid == pid or self.sweep_interval <= 0:
+            return
+
+        with self._sweeper_lock:
+            if self._started_pid == pid:
+                return
+
+            threading.Thread(target=self._sweeper, name='security-state-sweeper', daemon=True).start()
+            self._started_pid = pid
+
+    def _sweeper(self):
+        while True:
+            time.sleep(self.sweep_interval)
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"Error sweeping security state: {e}")
+
+    def sweep(self):
+        """ลบ IP ที่หมดอายุและตัดส่วนที่เกิน max_entries ของทุก namespace ที่ติดตาม"""
+        start = time.perf_counter()
+        now = time.time()
+        for namespace in list(self._ttls):
+            expired, evicted = self._sweep_namespace(namespace, now)
+            self._count(expired, evicted)
+
+        with self._stats_lock:
+            self.sweeps += 1
+            self.last_sweep_ms = round((time.perf_counter() - start) * 1000, 2)
+
+    def _sweep_namespace(self, namespace: str, now: float) -> Tuple[int, int]:
+        raise NotImplementedError
+
+    def _size_bytes(self) -> int:
+        raise NotImplementedError
+
+    def stats(self) -> Dict:
+        """จำนวน IP ต่อ namespace, การลบ และขนาดของสถานะ"""
+        with self._stats_lock:
+            stats = {
+                'backend': self.backend,
+                'max_entries': self.max_entries,
+                'expirations': self.expirations,
+                'evictions': self.evictions,
+                'sweeps': self.sweeps,
+                'last_sweep_ms': self.last_sweep_ms
+            }
+
+        stats['namespaces'] = {
+            namespace: {'entries': self.count(namespace), 'ttl': ttl} for namespace, ttl in self._ttls.items()
+        }
+        stats['size_bytes'] = self._size_bytes()
+        if resource is not None:
+            # ru_maxrss เป็น KB บน Linux และ byte บน macOS
+            max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+            stats['process_max_rss_mb'] = round(max_rss / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+        return stats
+
+
+class MemoryStateStore(_BoundedStore):
+    """เก็บสถานะใน dict ของ process นี้ (ใช้เมื่อมี worker เดียวหรือระหว่างทดสอบ)"""
+
+    backend = 'memory'
+
+    def __init__(self, max_entries: int = SECURITY_STATE_MAX_ENTRIES,
+                 sweep_interval: int = SECURITY_STATE_SWEEP_INTERVAL):
+        super().__init__(max_entries, sweep_interval)
+        # namespace -> OrderedDict(key -> (expires_at, value)) เรียงตามเวลาที่เขียนล่าสุด
+        self._data: Dict[str, OrderedDict] = {}
+        self._lock = threading.Lock()
+
+    def _live(self, entries: OrderedDict, key: str, now: float):
+        entry = entries.get(key)
+        if entry is not None and entry[0] is not None and entry[0] <= now:
+            del entries[key]
+            self._count(expirations=1)
+            return None
+        return entry
+
+    def update(self, namespace: str, key: str, func: UpdateFunc):
+        """อ่าน-แก้ไข-เขียนค่าของ key แบบ atomic"""
+        self._ensure_sweeper()
+        now = time.time()
+        with self._lock:
+            entries = self._data.setdefault(namespace, OrderedDict())
+            entry = self._live(entries, key, now)
+            value, result = func(entry[1] if entry else None)
+            if value is None:
+                entries.pop(key, None)
+                return result
+
+            entries[key] = (self._expires_at(namespace, now), value)
+            entries.move_to_end(key)
+            if namespace in self._ttls and len(entries) > self.max_entries:
+                entries.popitem(last=False)
+                self._count(evictions=1)
+            return result
+
+    def put_many(self, namespace: str, values: Dict[str, Any]):
+        """เขียนหลาย key พร้อมกัน (ใช้กับ namespace ที่ไม่ติดตาม เช่น blacklist)"""
+        now = time.time()
+        with self._lock:
+            entries = self._data.setdefault(namespace, OrderedDict())
+            for key, value in values.items():
+                entries[key] = (self._expires_at(namespace, now), value)
+                entries.move_to_end(key)
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        with self._lock:
+            entries = self._data.get(namespace)
+            entry = self._live(entries, key, time.time()) if entries is not None else None
+            return entry[1] if entry else None
+
+    def delete(self, namespace: str, key: str):
+        with self._lock:
+            self._data.get(namespace, {}).pop(key, None)
+
+    def items(self, namespace: str) -> List[Tuple[str, Any]]:
+        now = time.time()
+        with self._lock:
+            return [
+                (key, value) for key, (expires_at, value) in self._data.get(namespace, {}).items()
+                if expires_at is None or expires_at > now
+            ]
+
+    def count(self, namespace: str) -> int:
+        """จำนวน key (รวมที่หมดอายุแต่ sweeper ยังไม่ลบ)"""
+        with self._lock:
+            return len(self._data.get(namespace, {}))
+
+    def _sweep_namespace(self, namespace: str, now: float) -> Tuple[int, int]:
+        # TTL เท่ากันทั้ง namespace รายการที่หมดอายุจึงอยู่ต้น OrderedDict เสมอ
+        expired = 0
+        with self._lock:
+            entries = self._data.get(namespace, OrderedDict())
+            while entries:
+                expires_at = next(iter(entries.values()))[0]
+                if expires_at is None or expires_at > now:
+                    break
+                entries.popitem(last=False)
+                expired += 1
+        return expired, 0
+
+    def _size_bytes(self) -> int:
+        """ประมาณขนาดจาก 256 รายการแรกของแต่ละ namespace"""
+        with self._lock:
+            total = 0
+            for entries in self._data.values():
+                sample = list(islice(entries.items(), 256))
+                if sample:
+                    sample_size = sum(
+                        sys.getsizeof(key) + sys.getsizeof(entry) + sys.getsizeof(entry[1]) for key, entry in sample
+                    )
+                    total += sample_size * len(entries) // len(sample)
+            return total
+
+
+class SQLiteStateStore(_BoundedStore):
+    """
+    เก็บสถานะใน SQLite (WAL) ที่ทุก process ใช้ไฟล์เดียวกัน
+
+    update() ทำใน transaction แบบ BEGIN IMMEDIATE จึงไม่มี worker สองตัวนับทับกัน
+    ขนาดสูงสุดบังคับโดย sweeper (ข้อมูลอยู่บน disk ไม่ได้อยู่ในหน่วยความจำของ worker)
+    """
+
+    backend = 'sqlite'
+
+    def __init__(self, path: str = SECURITY_STATE_PATH, max_entries: int = SECURITY_STATE_MAX_ENTRIES,
+                 sweep_interval: int = SECURITY_STATE_SWEEP_INTERVAL):
+        super().__init__(max_entries, sweep_interval)
+        self.path = path
+        self._local = threading.local()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS security_state ('
+            ' namespace TEXT NOT NULL,'
+            ' key TEXT NOT NULL,'
+            ' value TEXT NOT NULL,'
+            ' expires_at REAL,'
+            ' PRIMARY KEY (namespace, key)) WITHOUT ROWID'
+        )
+        # ไฟล์ที่สร้างก่อนมี TTL
+        columns = [row[1] for row in conn.execute('PRAGMA table_info(security_state)')]
+        if 'expires_at' not in columns:
+            conn.execute('ALTER TABLE security_state ADD COLUMN expires_at REAL')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_security_state_expires_at ON security_state(namespace, expires_at)')
+
+    def _connection(self) -> sqlite3.Connection:
+        """คืนค่า connection ของ thread/process ปัจจุบัน (autocommit, เปิด transaction เอง)"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def update(self, namespace: str, key: str, func: UpdateFunc):
+        """อ่าน-แก้ไข-เขียนค่าของ key แบบ atomic (ระหว่าง thread และระหว่าง process)"""
+        self._ensure_sweeper()
+        now = time.time()
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute(
+                'SELECT value, expires_at FROM security_state WHERE namespace = ? AND key = ?', (namespace, key)
+            ).fetchone()
+            if row and row[1] is not None and row[1] <= now:
+                self._count(expirations=1)
+                current = None
+            else:
+                current = json.loads(row[0]) if row else None
+
+            value, result = func(current)
+
+            if value is None:
+                if row:
+                    conn.execute('DELETE FROM security_state WHERE namespace = ? AND key = ?', (namespace, key))
+            else:
+                conn.execute(
+                    'INSERT OR REPLACE INTO security_state (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)',
+                    (namespace, key, json.dumps(value), self._expires_at(namespace, now))
+                )
+            conn.execute('COMMIT')
+            return result
+
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def put_many(self, namespace: str, values: Dict[str, Any]):
+        """เขียนหลาย key ใน transaction เดียว (ใช้กับ namespace ที่ไม่ติดตาม เช่น blacklist)"""
+        expires_at = self._expires_at(namespace, time.time())
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.executemany(
+                'INSERT OR REPLACE INTO security_state (namespace, key, value, expires_at) VALUES (?, ?, ?, ?)',
+                [(namespace, key, json.dumps(value), expires_at) for key, value in values.items()]
+            )
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def get(self, namespace: str, key: str) -> Optional[Any]:
+        row = self._connection().execute(
+            'SELECT value FROM security_state WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)',
+            (namespace, key, time.time())
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def delete(self, namespace: str, key: str):
+        self._connection().execute('DELETE FROM security_state WHERE namespace = ? AND key = ?', (namespace, key))
+
+    def items(self, namespace: str) -> List[Tuple[str, Any]]:
+        rows = self._connection().execute(
+            'SELECT key, value FROM security_state WHERE namespace = ? AND (expires_at IS NULL OR expires_at > ?)',
+            (namespace, time.time())
+        ).fetchall()
+        return [(key, json.loads(value)) for key, value in rows]
+
+    def count(self, namespace: str) -> int:
+        return self._connection().execute(
+            'SELECT COUNT(*) FROM security_state WHERE namespace = ? AND (expires_at IS NULL OR expires_at > ?)',
+            (namespace, time.time())
+        ).fetchone()[0]
+
+    def _sweep_namespace(self, namespace: str, now: float) -> Tuple[int, int]:
+        conn = self._connection()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            expired = conn.execute(
+                'DELETE FROM security_state WHERE namespace = ? AND expires_at <= ?', (namespace, now)
+            ).rowcount
+
+            # TTL เท่ากันทั้ง namespace: expires_at น้อยสุด = เขียนล่าสุดนานที่สุด
+            overflow = conn.execute(
+                'SELECT COUNT(*) FROM security_state WHERE namespace = ?', (namespace,)
+            ).fetchone()[0] - self.max_entries
+            evicted = 0
+            if overflow > 0:
+                evicted = conn.execute(
+                    'DELETE FROM security_state WHERE namespace = ? AND key IN '
+                    '(SELECT key FROM security_state WHERE namespace = ? ORDER BY expires_at ASC LIMIT ?)',
+                    (namespace, namespace, overflow)
+                ).rowcount
+            conn.execute('COMMIT')
+            return expired, evicted
+
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _size_bytes(self) -> int:
+        """ขนาดไฟล์ฐานข้อมูลรวม WAL"""
+        return sum(os.path.getsize(self.path + suffix) for suffix in ('', '-wal') if os.path.exists(self.path + suffix))
+
+
+class StoredSet:
+    """ชุดของ IP (เช่น blacklist) ที่เก็บใน store ใช้งานเหมือน set"""
+
+    def __init__(self, store, namespace: str):
+        self.store = store
+        self.namespace = namespace
+
+    def add(self, value: str):
+        self.store.update(self.namespace, value, lambda _: (1, None))
+
+    def add_many(self, values: Iterable[str]):
+        self.store.put_many(self.namespace, dict.fromkeys(values, 1))
+
+    def discard(self, value: str):
+        self.store.delete(self.namespace, value)
+
+    def __contains__(self, value: str) -> bool:
+        return self.store.get(self.namespace, value) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter([key for key, _ in self.store.items(self.namespace)])
+
+    def __len__(self) -> int:
+        return self.store.count(self.namespace)
+
+
+class StoredMap:
+    """ค่าต่อ IP (เช่น จำนวน suspicious activity) ที่เก็บใน store ใช้งานเหมือน dict"""
+
+    def __init__(self, store, namespace: str, default: Callable[[], Any] = int, ttl: Optional[int] = None):
+        self.store = store
+        self.namespace = namespace
+        self.default = default
+        if ttl is not None:
+            store.track(namespace, ttl)
+
+    def update(self, key: str, func: UpdateFunc):
+        """แก้ไขค่าของ key แบบ atomic (func ได้รับค่า default ถ้ายังไม่มี)"""
+        return self.store.update(
+            self.namespace, key, lambda value: func(self.default() if value is None else value)
+        )
+
+    def increment(self, key: str, amount: int = 1) -> int:
+        """เพิ่มค่าแบบ atomic แล้วคืนค่าใหม่"""
+        return self.update(key, lambda value: (value + amount, value + amount))
+
+    def __getitem__(self, key: str):
+        value = self.store.get(self.namespace, key)
+        return self.default() if value is None else value
+
+    def __delitem__(self, key: str):
+        self.store.delete(self.namespace, key)
+
+    def __contains__(self, key: str) -> bool:
+        return self.store.get(self.namespace, key) is not None
+
+    def items(self) -> List[Tuple[str, Any]]:
+        return self.store.items(self.namespace)
+
+    def __len__(self) -> int:
+        return self.store.count(self.namespace)
+
+
+def create_state_store(backend: str = SECURITY_STATE_BACKEND):
+    """สร้าง store ตาม SECURITY_STATE_BACKEND (ใช้ memory ถ้าเปิด SQLite ไม่ได้)"""
+    if backend == 'sqlite':
+        try:
+            return SQLiteStateStore()
+        except sqlite3.Error as e:
+            print(f"Security state store falling back to memory: {e}")
+
+    return MemoryStateStore()
+
+
+# Global instance
+security_state_store = create_state_store()
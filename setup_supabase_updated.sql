@@ -4,6 +4,9 @@
 -- Drop existing table if exists
 DROP TABLE IF EXISTS movies;
 
+-- Trigram matching for search_text
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
 -- Create movies table with update management
 CREATE TABLE movies (
     id SERIAL PRIMARY KEY,
@@ -17,6 +20,11 @@ CREATE TABLE movies (
     cast_data JSONB,
     poster_path TEXT,
     streaming_providers JSONB,
+    display_year TEXT,
+    display_genres TEXT,
+    display_cast TEXT,
+    -- lower-cased title, original_title, director and cast names (filled by movie_store.build_movie_record)
+    search_text TEXT,
     created_at TIMESTAMP WITH TIME ZONE DEFAULT NOW(),
     updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
 );
@@ -27,6 +35,12 @@ CREATE INDEX idx_movies_title ON movies(title);
 CREATE INDEX idx_movies_year ON movies(year);
 CREATE INDEX idx_movies_updated_at ON movies(updated_at);
 
+-- Index for keyset pagination of the movie list (ORDER BY created_at DESC, id DESC)
+CREATE INDEX idx_movies_created_at_id ON movies(created_at DESC, id DESC);
+
+-- Full-text style search: pg_trgm GIN index on search_text
+CREATE INDEX idx_movies_search_text_trgm ON movies USING GIN (search_text gin_trgm_ops);
+
 -- Enable Row Level Security (RLS)
 ALTER TABLE movies ENABLE ROW LEVEL SECURITY;
 
@@ -49,12 +63,36 @@ CREATE TRIGGER update_movies_updated_at
     FOR EACH ROW 
     EXECUTE FUNCTION update_updated_at_column();
 
+-- Ranked search used by the app (falls back to ilike on title when this function is missing)
+CREATE OR REPLACE FUNCTION search_movies_ranked(search_query TEXT, max_results INTEGER DEFAULT 10)
+RETURNS SETOF movies
+LANGUAGE sql STABLE
+AS $$
+    WITH q AS (
+        SELECT lower(trim(search_query)) AS term,
+               '%' || replace(replace(replace(lower(trim(search_query)), '\', '\\'), '%', '\%'), '_', '\_') || '%' AS pattern
+    )
+    SELECT m.*
+    FROM movies m, q
+    WHERE m.search_text ILIKE q.pattern
+       OR q.term <% m.search_text
+    ORDER BY lower(m.title) = q.term DESC,
+             word_similarity(q.term, lower(m.title)) DESC,
+             word_similarity(q.term, m.search_text) DESC,
+             m.id DESC
+    LIMIT max_results;
+$$;
+
+GRANT EXECUTE ON FUNCTION search_movies_ranked(TEXT, INTEGER) TO anon;
+GRANT EXECUTE ON FUNCTION search_movies_ranked(TEXT, INTEGER) TO authenticated;
+
 -- Insert sample data (optional)
-INSERT INTO movies (tmdb_id, title, original_title, year, genres, trailer_id, director, cast_data, poster_path, streaming_providers) VALUES
+INSERT INTO movies (tmdb_id, title, original_title, year, genres, trailer_id, director, cast_data, poster_path, streaming_providers, search_text) VALUES
 (575265, 'Mission: Impossible - The Final Reckoning', 'Mission: Impossible - Dead Reckoning Part Two', '2025', ARRAY['Action', 'Adventure', 'Thriller'], 'abc123', 'Christopher McQuarrie', 
 '[{"name": "Tom Cruise", "character": "Ethan Hunt"}, {"name": "Hayley Atwell", "character": "Grace"}, {"name": "Ving Rhames", "character": "Luther Stickell"}]',
 '/poster_path_1.jpg',
-'{"streaming": [{"provider_name": "Netflix", "logo_path": "/netflix_logo.png", "provider_id": 8}], "rent": [{"provider_name": "iTunes", "logo_path": "/itunes_logo.png", "provider_id": 2}]}'
+'{"streaming": [{"provider_name": "Netflix", "logo_path": "/netflix_logo.png", "provider_id": 8}], "rent": [{"provider_name": "iTunes", "logo_path": "/itunes_logo.png", "provider_id": 2}]}',
+'mission: impossible - the final reckoning mission: impossible - dead reckoning part two christopher mcquarrie tom cruise hayley atwell ving rhames'
 );
 
 -- Grant permissions
@@ -79,3 +117,19 @@ FROM movies;
 -- Grant permissions on view
 GRANT SELECT ON movie_update_stats TO anon;
 GRANT SELECT ON movie_update_stats TO authenticated;
+
+-- Create table for sync watermarks (incremental refresh from TMDB /movie/changes)
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE sync_state ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow all operations" ON sync_state;
+CREATE POLICY "Allow all operations" ON sync_state
+    FOR ALL USING (true);
+
+GRANT ALL ON sync_state TO anon;
+GRANT ALL ON sync_state TO authenticated;
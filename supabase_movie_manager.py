@@ -6,6 +6,8 @@ from typing import Dict, List, Optional
 import json
 from datetime import datetime
 import time
+from tmdb_client import get_tmdb_client
+from movie_store import upsert_movie, upsert_movies
 
 # Load environment variables
 load_dotenv()
@@ -20,7 +22,7 @@ class SupabaseMovieManager:
             raise ValueError("Missing required environment variables")
         
         self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
-        self.tmdb_base_url = "https://api.themoviedb.org/3"
+        self.tmdb = get_tmdb_client(self.tmdb_api_key)
         
         print("🎬 Supabase Movie Manager initialized!")
         print(f"📊 Supabase URL: {self.supabase_url}")
@@ -29,17 +31,8 @@ class SupabaseMovieManager:
     def get_movie_from_tmdb(self, movie_id: int) -> Dict:
         """ดึงข้อมูลหนังจาก TMDB API"""
         try:
-            url = f"{self.tmdb_base_url}/movie/{movie_id}"
-            params = {
-                'api_key': self.tmdb_api_key,
-                'append_to_response': 'credits,videos'
-            }
-            
             print(f"🔍 Fetching movie data for ID: {movie_id}")
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            
-            return response.json()
+            return self.tmdb.get_movie(movie_id)
             
         except requests.exceptions.RequestException as e:
             print(f"❌ Error fetching movie data: {e}")
@@ -92,39 +85,27 @@ class SupabaseMovieManager:
         }
     
     def save_movie_to_database(self, movie_data: Dict) -> Optional[int]:
-        """บันทึกข้อมูลหนังลง Supabase"""
+        """บันทึกข้อมูลหนังลง Supabase (upsert ตาม tmdb_id)"""
         try:
-            # ตรวจสอบว่ามีหนังนี้ในฐานข้อมูลแล้วหรือไม่
-            existing = self.supabase.table('movies').select('id').eq('tmdb_id', movie_data['tmdb_id']).execute()
-            
-            movie_record = {
-                'tmdb_id': movie_data['tmdb_id'],
-                'title': movie_data['title'],
-                'original_title': movie_data['original_title'],
-                'year': movie_data['year'],
-                'genres': movie_data['genres'],
-                'trailer_id': movie_data['trailer_id'],
-                'director': movie_data['director'],
-                'cast_data': movie_data['cast_data']
-            }
-            
-            if existing.data:
-                # อัพเดทข้อมูล
-                movie_id = existing.data[0]['id']
-                self.supabase.table('movies').update(movie_record).eq('id', movie_id).execute()
-                print(f"🔄 Updated movie: {movie_data['title']}")
-            else:
-                # เพิ่มข้อมูลใหม่
-                result = self.supabase.table('movies').insert(movie_record).execute()
-                movie_id = result.data[0]['id']
-                print(f"✅ Added new movie: {movie_data['title']}")
-            
+            movie_id = upsert_movie(self.supabase, movie_data)
+            print(f"💾 Saved movie: {movie_data['title']}")
             return movie_id
             
         except Exception as e:
             print(f"❌ Error saving movie to database: {e}")
             return None
     
+    def save_movies_to_database(self, movies: List[Dict]) -> Dict[int, int]:
+        """บันทึกข้อมูลหนังหลายเรื่องลง Supabase ในคำสั่งเดียว"""
+        try:
+            saved = upsert_movies(self.supabase, movies)
+            print(f"💾 Saved {len(saved)} movies")
+            return saved
+            
+        except Exception as e:
+            print(f"❌ Error saving movies to database: {e}")
+            return {}
+    
     def import_movie(self, movie_id: int) -> bool:
         """นำเข้าข้อมูลหนังครบถ้วน"""
         try:
@@ -256,7 +237,7 @@ def test_supabase_connection():
 
 def import_multiple_movies():
     """นำเข้าหนังหลายเรื่อง"""
-    manager = SupabaseMovieManager()
+    from batch_importer import BatchImporter
     
     # รายการหนังที่ต้องการนำเข้า
     movie_ids = [
@@ -272,23 +253,19 @@ def import_multiple_movies():
     print(f"🎬 Importing {len(movie_ids)} movies...")
     print("=" * 60)
     
-    successful_imports = 0
+    result = BatchImporter().import_ids(movie_ids)
+    summary = result['summary']
     
-    for i, movie_id in enumerate(movie_ids, 1):
-        print(f"\n📋 [{i}/{len(movie_ids)}] Processing movie ID: {movie_id}")
-        
-        success = manager.import_movie(movie_id)
-        if success:
-            successful_imports += 1
-        
-        # หน่วงเวลาเล็กน้อย
-        time.sleep(1)
+    for item in result['results']:
+        status = "✅" if item['result']['success'] else "❌"
+        print(f"{status} [{item['tmdb_id']}] {item['result']['message']}")
     
     print(f"\n{'='*60}")
     print("📊 IMPORT SUMMARY")
     print(f"{'='*60}")
-    print(f"✅ Successful imports: {successful_imports}/{len(movie_ids)}")
-    print(f"❌ Failed imports: {len(movie_ids) - successful_imports}/{len(movie_ids)}")
+    print(f"✅ Successful imports: {summary['imported']}/{summary['total']}")
+    print(f"❌ Failed imports: {summary['failed']}/{summary['total']}")
+    print(f"⚡ Throughput: {summary['items_per_sec']} items/sec")
 
 def main():
     """เมนูหลัก"""
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test Batch Import Jobs
+ทดสอบงานนำเข้าแบบ batch ที่รันเบื้องหลัง (ขีดจำกัด, ความคืบหน้า, สถานะสุดท้าย)
+"""
+
+import os
+import sys
+
+os.environ.setdefault('SUPABASE_URL', 'http://127.0.0.1:9')
+os.environ.setdefault('SUPABASE_ANON_KEY', 'test-key')
+os.environ.setdefault('TMDB_API_KEY', 'test-key')
+
+import batch_importer
+from batch_importer import BatchImportJobs
+from security_store import MemoryStateStore
+
+
+class FakeImporter:
+    """แทน BatchImporter: เรื่องที่ ID เป็นเลขคี่นำเข้าไม่สำเร็จ"""
+
+    created = []
+
+    def __init__(self, workers, chunk_size):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        FakeImporter.created.append(self)
+
+    def import_ids(self, tmdb_ids, on_progress=None):
+        results = [
+            {'tmdb_id': tmdb_id, 'title': None, 'result': {'success': tmdb_id % 2 == 0, 'message': 'x'}}
+            for tmdb_id in tmdb_ids
+        ]
+        imported = sum(1 for item in results if item['result']['success'])
+        if on_progress:
+            on_progress({'done': len(tmdb_ids), 'imported': imported, 'failed': len(tmdb_ids) - imported})
+        return {
+            'success': True,
+            'message': 'done',
+            'summary': {'total': len(tmdb_ids), 'imported': imported, 'failed': len(tmdb_ids) - imported},
+            'results': results
+        }
+
+
+def make_jobs():
+    return BatchImportJobs(MemoryStateStore(sweep_interval=0), importer_factory=FakeImporter)
+
+
+def test_job_runs_in_background_and_reports_failures():
+    """งานเสร็จแล้วมีสรุปผลและรายการที่ล้มเหลว (ID ซ้ำถูกตัดออก)"""
+    jobs = make_jobs()
+    job_id = jobs.submit([2, 3, 4, 4, 5])
+    jobs._executor.shutdown(wait=True)
+
+    job = jobs.get(job_id)
+    assert job['status'] == 'completed', job
+    assert job['total'] == 4 and job['done'] == 4
+    assert job['imported'] == 2 and job['failed'] == 2
+    assert [item['tmdb_id'] for item in job['failures']] == [3, 5]
+    assert jobs.get('missing') is None
+
+
+def test_limits():
+    """workers / chunk_size ถูกจำกัด และรายการที่ยาวเกินหรือว่างถูกปฏิเสธ"""
+    jobs = make_jobs()
+    FakeImporter.created.clear()
+    jobs.submit([1], workers=10_000, chunk_size=0)
+    jobs._executor.shutdown(wait=True)
+    assert FakeImporter.created[0].workers == batch_importer.BATCH_IMPORT_MAX_WORKERS
+    assert FakeImporter.created[0].chunk_size == 1
+
+    for tmdb_ids in ([], list(range(batch_importer.BATCH_IMPORT_MAX_IDS + 1)), ['abc']):
+        try:
+            jobs.submit(tmdb_ids)
+            assert False, f'accepted {len(tmdb_ids)} ids'
+        except ValueError:
+            pass
+
+
+def test_update_job_in_background():
+    """งานอัปเดตใช้คิวเดียวกัน: ความคืบหน้า, failures จากผลลัพธ์ และผลที่ไม่สำเร็จเป็นสถานะ failed"""
+    jobs = make_jobs()
+
+    def update(on_progress):
+        on_progress({'done': 3, 'imported': 2, 'failed': 1})
+        return {
+            'success': True,
+            'message': 'Update completed: 2 updated, 1 failed',
+            'summary': {'total': 3, 'updated': 2, 'failed': 1},
+            'results': [{'tmdb_id': 7, 'result': {'success': False, 'message': 'Movie not found in database'}}]
+        }
+
+    done_id = jobs.run_in_background('update_ids', update, total=3)
+    failed_id = jobs.run_in_background('update_changes', lambda on_progress: {'success': False, 'message': 'TMDB down'})
+    jobs._executor.shutdown(wait=True)
+
+    job = jobs.get(done_id)
+    assert (job['kind'], job['status'], job['done'], job['total']) == ('update_ids', 'completed', 3, 3)
+    assert job['summary']['updated'] == 2
+    assert [item['tmdb_id'] for item in job['failures']] == [7]
+
+    job = jobs.get(failed_id)
+    assert (job['status'], job['message']) == ('failed', 'TMDB down')
+
+
+def main():
+    """Main test function"""
+    print("📦 Batch Import Jobs Test")
+    print("=" * 50)
+
+    tests = [
+        test_job_runs_in_background_and_reports_failures,
+        test_limits,
+        test_update_job_in_background
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test HTTP Cache Headers
+ทดสอบ ETag, 304 Not Modified และการปิด cache ของหน้าที่มี flash message
+"""
+
+import sys
+
+from flask import Flask, flash, jsonify
+
+from http_cache import CACHE_POLICIES, cacheable
+
+UPDATED_AT = '2025-01-02T03:04:05+00:00'
+
+
+def make_client():
+    """app จำลองที่ส่ง response ผ่าน cacheable เหมือน route ใน app.py"""
+    app = Flask(__name__)
+    app.secret_key = 'test-secret'
+    movie = {'id': 1, 'title': 'Dune'}
+
+    @app.route('/api/movie/1')
+    def movie_detail():
+        return cacheable(jsonify(movie), 'detail', UPDATED_AT)
+
+    @app.route('/movie/1')
+    def movie_page():
+        flash('นำเข้าหนังสำเร็จ', 'success')
+        return cacheable(jsonify(movie), 'detail', UPDATED_AT)
+
+    return app.test_client(), movie
+
+
+def test_etag_and_cache_control():
+    """response 200 มี strong ETag, Last-Modified และ Cache-Control ตาม policy"""
+    client, _ = make_client()
+    response = client.get('/api/movie/1')
+
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == CACHE_POLICIES['detail']
+    assert response.headers['ETag'].startswith('"')
+    assert response.headers['Last-Modified'] == 'Thu, 02 Jan 2025 03:04:05 GMT'
+    assert client.get('/api/movie/1').headers['ETag'] == response.headers['ETag']
+
+
+def test_if_none_match_returns_304():
+    """ETag ตรงกันได้ 304 ไม่มี body และ ETag ใหม่หลังข้อมูลเปลี่ยน"""
+    client, movie = make_client()
+    etag = client.get('/api/movie/1').headers['ETag']
+
+    response = client.get('/api/movie/1', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+    response = client.get('/api/movie/1', headers={'If-Modified-Since': 'Thu, 02 Jan 2025 03:04:05 GMT'})
+    assert response.status_code == 304
+
+    movie['title'] = 'Dune: Part Two'
+    response = client.get('/api/movie/1', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+def test_modified_session_is_not_cached():
+    """หน้าที่เขียน session (flash message) ได้ private, no-store และไม่มี ETag"""
+    client, _ = make_client()
+    etag = client.get('/api/movie/1').headers['ETag']
+
+    response = client.get('/movie/1', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'private, no-store'
+    assert 'ETag' not in response.headers
+
+
+def main():
+    """Main test function"""
+    print("🏷️ HTTP Cache Headers Test")
+    print("=" * 50)
+
+    tests = [
+        test_etag_and_cache_control,
+        test_if_none_match_returns_304,
+        test_modified_session_is_not_cached
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
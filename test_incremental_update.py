@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Test Incremental Update
+ทดสอบการอัปเดตเฉพาะหนังที่เปลี่ยนแปลง (TMDB /movie/changes) กับ stub ของ TMDB
+ที่ตอบด้วยข้อมูลที่บันทึกไว้ใน fixtures/tmdb และฐานข้อมูลจำลองในหน่วยความจำ
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+os.environ.setdefault('SUPABASE_URL', 'http://127.0.0.1:9')
+os.environ.setdefault('SUPABASE_ANON_KEY', 'test-key')
+os.environ.setdefault('TMDB_API_KEY', 'test-key')
+os.environ['TMDB_CACHE_ENABLED'] = '0'
+os.environ['TMDB_RATE_STATE_PATH'] = os.path.join(tempfile.mkdtemp(), 'tmdb_rate.state')
+
+from tmdb_client import TMDBClient
+from tmdb_rate_governor import TMDBRateGovernor
+import update_manager
+from update_manager import MovieUpdateManager
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 'tmdb')
+
+
+class FixtureTMDBHandler(BaseHTTPRequestHandler):
+    """Stub ของ TMDB ที่ตอบด้วยไฟล์ใน fixtures/tmdb"""
+
+    requests_seen = []
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        FixtureTMDBHandler.requests_seen.append((url.path, params))
+
+        if url.path == '/3/movie/changes':
+            fixture = f"movie_changes_page_{params.get('page', '1')}.json"
+        else:
+            fixture = f"movie_{url.path.rsplit('/', 1)[-1]}.json"
+
+        fixture_path = os.path.join(FIXTURES_DIR, fixture)
+        if not os.path.exists(fixture_path):
+            body = json.dumps({'status_code': 34, 'status_message': 'The resource you requested could not be found.'}).encode()
+            self.send_response(404)
+        else:
+            with open(fixture_path, 'rb') as f:
+                body = f.read()
+            self.send_response(200)
+
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeQuery:
+    """รองรับเฉพาะ query builder ที่ update_manager ใช้"""
+
+    def __init__(self, table):
+        self.table = table
+        self.filters = []
+        self.upsert_rows = None
+        self.on_conflict = None
+
+    def select(self, columns):
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda row: row.get(column) == value)
+        return self
+
+    def in_(self, column, values):
+        values = set(values)
+        self.filters.append(lambda row: row.get(column) in values)
+        return self
+
+    def upsert(self, rows, on_conflict=None):
+        self.upsert_rows = rows if isinstance(rows, list) else [rows]
+        self.on_conflict = on_conflict
+        return self
+
+    def execute(self):
+        if self.upsert_rows is None:
+            return FakeResult([dict(row) for row in self.table if all(f(row) for f in self.filters)])
+
+        saved = []
+        for record in self.upsert_rows:
+            existing = next((row for row in self.table if row.get(self.on_conflict) == record[self.on_conflict]), None)
+            if existing is None:
+                existing = {'id': len(self.table) + 1}
+                self.table.append(existing)
+            existing.update(record)
+            saved.append(dict(existing))
+        return FakeResult(saved)
+
+
+class FakeSupabase:
+    def __init__(self, tables):
+        self.tables = tables
+
+    def table(self, name):
+        return FakeQuery(self.tables.setdefault(name, []))
+
+
+def start_stub_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FixtureTMDBHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def create_manager(server, tables):
+    manager = MovieUpdateManager()
+    manager.supabase = FakeSupabase(tables)
+    manager.tmdb = TMDBClient(
+        api_key='test-key',
+        base_url=f"http://127.0.0.1:{server.server_address[1]}/3",
+        rate_governor=TMDBRateGovernor(rate=0)
+    )
+    return manager
+
+
+def catalog():
+    return {
+        'movies': [
+            {'id': 1, 'tmdb_id': 550, 'title': 'Fight Club (old)'},
+            {'id': 2, 'tmdb_id': 13, 'title': 'Forrest Gump (old)'},
+            {'id': 3, 'tmdb_id': 680, 'title': 'Pulp Fiction'}
+        ],
+        'sync_state': [{'key': 'tmdb_movie_changes', 'value': '2025-01-01'}]
+    }
+
+
+def test_incremental_update_refreshes_only_changed_movies():
+    """อัปเดตเฉพาะหนังที่อยู่ทั้งใน changes feed และในฐานข้อมูล แล้วเลื่อน watermark"""
+    server = start_stub_server()
+    try:
+        tables = catalog()
+        FixtureTMDBHandler.requests_seen = []
+        result = create_manager(server, tables).update_changed_movies()
+
+        assert result['success'], result
+        summary = result['summary']
+        assert summary['changed_on_tmdb'] == 3
+        assert summary['in_catalog'] == 2
+        assert summary['updated'] == 2
+        assert summary['failed'] == 0
+
+        movies = {row['tmdb_id']: row for row in tables['movies']}
+        assert movies[550]['title'] == 'Fight Club'
+        assert movies[550]['director'] == 'David Fincher'
+        assert movies[550]['streaming_providers']['streaming'][0]['provider_name'] == 'Netflix'
+        assert movies[13]['title'] == 'Forrest Gump'
+        assert movies[680]['title'] == 'Pulp Fiction'
+
+        # อ่าน changes feed ตั้งแต่ watermark เดิม (แบ่งช่วงไม่เกิน 14 วัน)
+        change_requests = [params for path, params in FixtureTMDBHandler.requests_seen if path == '/3/movie/changes']
+        assert change_requests[0]['start_date'] == '2025-01-01'
+        assert change_requests[0]['end_date'] == '2025-01-14'
+
+        # ไม่ดึงข้อมูลหนังที่ไม่อยู่ในฐานข้อมูล
+        movie_paths = {path for path, params in FixtureTMDBHandler.requests_seen if path != '/3/movie/changes'}
+        assert movie_paths == {'/3/movie/550', '/3/movie/13'}
+
+        assert tables['sync_state'][0]['value'] == datetime.now(timezone.utc).date().isoformat()
+    finally:
+        server.shutdown()
+
+
+def test_watermark_kept_when_refresh_fails():
+    """watermark ไม่เลื่อนถ้ามีหนังที่อัปเดตไม่สำเร็จ"""
+    server = start_stub_server()
+    try:
+        tables = catalog()
+        tables['movies'].append({'id': 4, 'tmdb_id': 999999, 'title': 'Missing on TMDB'})
+        result = create_manager(server, tables).update_changed_movies(since='2025-06-01')
+
+        assert result['success'], result
+        assert result['summary']['failed'] == 1
+        assert result['summary']['watermark'] == '2025-01-01'
+        assert tables['sync_state'][0]['value'] == '2025-01-01'
+    finally:
+        server.shutdown()
+
+
+def test_update_all_keeps_counters_and_bounded_failures():
+    """update_all_movies นับผลทุกเรื่อง แต่คืนรายการที่ล้มเหลวไม่เกิน UPDATE_MAX_FAILURES"""
+    server = start_stub_server()
+    try:
+        manager = create_manager(server, catalog())
+        pages = [[{'id': i, 'tmdb_id': i, 'title': f'Movie {i}'} for i in range(start, start + 100)]
+                 for start in range(0, 300, 100)]
+        manager.count_movies = lambda: 350
+        manager.iter_stale_movies = lambda days_threshold, force_update: iter(pages)
+        manager.update_single_movie = lambda db_id, tmdb_id: (
+            {'success': True} if tmdb_id % 3 else {'success': False, 'message': 'TMDB error'}
+        )
+
+        update_manager.UPDATE_MAX_FAILURES, max_failures = 10, update_manager.UPDATE_MAX_FAILURES
+        try:
+            result = manager.update_all_movies()
+        finally:
+            update_manager.UPDATE_MAX_FAILURES = max_failures
+
+        assert result['summary'] == {'total': 350, 'updated': 200, 'failed': 100, 'skipped': 50}
+        assert 'results' not in result
+        assert len(result['failures']) == 10
+        assert result['failures'][0] == {'tmdb_id': 0, 'title': 'Movie 0', 'message': 'TMDB error'}
+    finally:
+        server.shutdown()
+
+
+def main():
+    """Main test function"""
+    print("🎬 Incremental Update Test")
+    print("=" * 50)
+
+    tests = [
+        test_incremental_update_refreshes_only_changed_movies,
+        test_watermark_kept_when_refresh_fails,
+        test_update_all_keeps_counters_and_bounded_failures
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
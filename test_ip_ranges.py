@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Test IP Ranges
+ทดสอบ blacklist / whitelist แบบ CIDR (IPv4 / IPv6) และ prefix tree
+"""
+
+import sys
+
+from ip_ranges import IPRangeSet, read_ranges
+from security_middleware import SecurityMiddleware
+from security_store import MemoryStateStore
+
+
+def test_cidr_match_ipv4_and_ipv6():
+    """IP ในช่วง CIDR ถูกจับได้ และคืนช่วงที่เจาะจงที่สุด"""
+    ranges = IPRangeSet(MemoryStateStore(sweep_interval=0), 'ip_blacklist')
+    ranges.add('203.0.113.0/24')
+    ranges.add('203.0.113.128/25')
+    ranges.add('2001:db8::/32')
+    ranges.add('198.51.100.7')
+
+    assert ranges.match('203.0.113.5') == '203.0.113.0/24'
+    assert ranges.match('203.0.113.200') == '203.0.113.128/25'
+    assert ranges.match('2001:db8:1::42') == '2001:db8::/32'
+    assert ranges.match('::ffff:198.51.100.7') == '198.51.100.7'
+    assert '203.0.114.1' not in ranges
+    assert 'not-an-ip' not in ranges
+
+
+def test_add_normalizes_and_rejects_invalid():
+    """host bits ถูกตัด และข้อความที่ไม่ใช่ IP ถูกปฏิเสธ"""
+    ranges = IPRangeSet(MemoryStateStore(sweep_interval=0), 'ip_blacklist')
+    assert ranges.add('10.1.2.3/8') == '10.0.0.0/8'
+
+    try:
+        ranges.add('10.0.0.0/33')
+        assert False, 'invalid CIDR accepted'
+    except ValueError:
+        pass
+
+    added, invalid = ranges.add_many(read_ranges(['# scanners', '192.0.2.0/24  # lab', '', 'bogus']))
+    assert added == ['192.0.2.0/24'] and invalid == ['bogus']
+    assert sorted(ranges) == ['10.0.0.0/8', '192.0.2.0/24']
+
+
+def test_changes_visible_to_other_workers():
+    """worker อื่นที่ใช้ store เดียวกันเห็นการเพิ่ม/ลบเมื่อครบ refresh interval"""
+    store = MemoryStateStore(sweep_interval=0)
+    admin = SecurityMiddleware(store)
+    worker = SecurityMiddleware(store)
+    assert worker.check_ip_security('203.0.113.9')['allowed']
+
+    # ภายใน interval ใช้ tree เดิมโดยไม่อ่าน store
+    admin.add_to_blacklist('203.0.113.0/24')
+    assert worker.check_ip_security('203.0.113.9')['allowed']
+    admin.remove_from_blacklist('203.0.113.0/24')
+
+    worker.ip_blacklist.refresh_interval = 0
+
+    admin.add_to_blacklist('203.0.113.0/24')
+    assert worker.check_ip_security('203.0.113.9')['reason'] == 'IP is blacklisted'
+
+    admin.remove_from_blacklist('203.0.113.0/24')
+    assert worker.check_ip_security('203.0.113.9')['allowed']
+
+
+def main():
+    """Main test function"""
+    print("🌐 IP Ranges Test")
+    print("=" * 50)
+
+    tests = [
+        test_cidr_match_ipv4_and_ipv6,
+        test_add_normalizes_and_rejects_invalid,
+        test_changes_visible_to_other_workers
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
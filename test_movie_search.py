@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+"""
+Test Movie Search
+ทดสอบการค้นหาของ SupabaseMovieManager กับ Supabase / TMDB จำลอง
+(คำค้นที่ส่งไปค้นจริงเป็นรูปเดียวกับ key ของ search_result_cache)
+"""
+
+import os
+import sys
+import tempfile
+
+os.environ.setdefault('SUPABASE_URL', 'http://127.0.0.1:9')
+os.environ.setdefault('SUPABASE_ANON_KEY', 'test-key')
+os.environ.setdefault('TMDB_API_KEY', 'test-key')
+os.environ.setdefault('SECURITY_STATE_PATH', os.path.join(tempfile.mkdtemp(), 'security_state.sqlite3'))
+os.environ.setdefault('SEARCH_INDEX_ENABLED', '0')
+os.environ.setdefault('SUGGEST_INDEX_ENABLED', '0')
+
+import app
+from app import SupabaseMovieManager
+from movie_store import build_movie_record
+from search_cache import search_result_cache
+from utils import build_search_text
+
+ROW = {'id': 1, 'tmdb_id': 11, 'title': 'Star Wars', 'year': '1977', 'director': 'George Lucas',
+       'genres': ['Sci-Fi'], 'cast_data': [], 'poster_path': None}
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeRPC:
+    def __init__(self, supabase, params):
+        self.supabase = supabase
+        self.params = params
+
+    def execute(self):
+        if self.supabase.rpc_error:
+            raise Exception(self.supabase.rpc_error)
+        return FakeResult([dict(ROW)])
+
+
+class FakeTable:
+    def __init__(self, supabase):
+        self.supabase = supabase
+
+    def select(self, columns):
+        return self
+
+    def ilike(self, column, pattern):
+        self.supabase.ilike_calls.append((column, pattern))
+        return self
+
+    def limit(self, count):
+        return self
+
+    def execute(self):
+        return FakeResult([dict(ROW)])
+
+
+class FakeSupabase:
+    """บันทึกการเรียก rpc / ilike และจำลอง PostgREST ที่ยังไม่มี function (PGRST202)"""
+
+    def __init__(self, rpc_error=None):
+        self.rpc_error = rpc_error
+        self.rpc_calls = []
+        self.ilike_calls = []
+
+    def rpc(self, name, params):
+        self.rpc_calls.append((name, params))
+        return FakeRPC(self, params)
+
+    def table(self, name):
+        return FakeTable(self)
+
+
+class FakeTMDB:
+    def __init__(self):
+        self.queries = []
+
+    def search_movies(self, query):
+        self.queries.append(query)
+        return [{'id': 11, 'title': 'Star Wars'}]
+
+
+def make_manager(rpc_error=None):
+    """manager ที่ใช้ client จำลอง (ไม่สร้าง connection จริง) และ cache ว่าง"""
+    app.SEARCH_INDEX_ENABLED = False
+    search_result_cache.clear()
+
+    manager = SupabaseMovieManager.__new__(SupabaseMovieManager)
+    manager.supabase = FakeSupabase(rpc_error)
+    manager.tmdb = FakeTMDB()
+    manager.ranked_search_available = True
+    return manager
+
+
+def test_query_variants_share_one_backend_call():
+    """ตัวพิมพ์ ช่องว่าง NFC/NFD และ zero-width เป็นคำค้นเดียวกัน ทั้งที่ส่งไปค้นและใน cache"""
+    manager = make_manager()
+    for query in ('star wars', '  Star   Wars ', 'star\u200b wars', '\ufeffSTAR\tWARS'):
+        assert [row['title'] for row in manager.search_movie_rows(query)] == ['Star Wars']
+        assert manager.search_tmdb_movies(query) == [{'id': 11, 'title': 'Star Wars'}]
+
+    assert [params['search_query'] for _, params in manager.supabase.rpc_calls] == ['star wars']
+    assert manager.tmdb.queries == ['star wars']
+
+    # "é" แบบ NFD (e + combining acute) กับ NFC
+    manager.search_tmdb_movies('Ame\u0301lie')
+    manager.search_tmdb_movies('am\u00e9lie')
+    assert manager.tmdb.queries[1:] == ['am\u00e9lie']
+
+    # วรรณยุกต์ไทยยังแยกคำค้น
+    manager.search_tmdb_movies('พี่มาก')
+    manager.search_tmdb_movies('พีมาก')
+    assert manager.tmdb.queries[2:] == ['พี่มาก', 'พีมาก']
+
+
+def test_blank_query_skips_backends():
+    """คำค้นที่เหลือแต่ช่องว่าง / zero-width ไม่ถูกส่งไปค้น"""
+    manager = make_manager()
+    assert manager.search_movie_rows(' \u200b ') == []
+    assert manager.search_all('\u200d') == ([], [], False)
+    assert manager.supabase.rpc_calls == [] and manager.tmdb.queries == []
+
+
+def test_ranked_search_uses_rpc():
+    """ค้นผ่าน search_movies_ranked พร้อม limit และไม่ใช้ ilike"""
+    manager = make_manager()
+    rows = manager.search_movie_rows('Star Wars', limit=5)
+
+    assert [row['title'] for row in rows] == ['Star Wars']
+    assert manager.supabase.rpc_calls == [('search_movies_ranked', {'search_query': 'star wars', 'max_results': 5})]
+    assert manager.supabase.ilike_calls == []
+
+
+def test_missing_rpc_falls_back_to_ilike():
+    """PGRST202 (ยังไม่ได้รัน migration) ใช้ ilike บน title และไม่ลอง RPC อีกใน process นี้"""
+    manager = make_manager(rpc_error="{'code': 'PGRST202', 'message': 'Could not find the function'}")
+
+    assert [row['title'] for row in manager.search_movie_rows('star')] == ['Star Wars']
+    assert manager.supabase.ilike_calls == [('title', '%star%')]
+    assert manager.ranked_search_available is False
+
+    manager.search_movie_rows('wars')
+    assert len(manager.supabase.rpc_calls) == 1
+    assert manager.supabase.ilike_calls[-1] == ('title', '%wars%')
+
+
+def test_other_rpc_errors_keep_trying_rpc():
+    """ข้อผิดพลาดอื่น (เช่น timeout) ใช้ ilike ครั้งนั้น แต่ครั้งถัดไปยังลอง RPC"""
+    manager = make_manager(rpc_error='timeout')
+    manager.search_movie_rows('star')
+    manager.search_movie_rows('wars')
+
+    assert manager.ranked_search_available is True
+    assert len(manager.supabase.rpc_calls) == 2 and len(manager.supabase.ilike_calls) == 2
+
+
+def test_search_text_fields():
+    """search_text มี title, original_title, ผู้กำกับและนักแสดง (ไทยและอังกฤษ) เป็นตัวพิมพ์เล็ก"""
+    movie = {
+        'tmdb_id': 140420,
+        'title': 'พี่มาก..พระโขนง',
+        'original_title': 'Pee Mak',
+        'director': 'บรรจง ปิสัญธนะกูล',
+        'cast_data': '[{"name": "มาริโอ้ เมาเร่อ"}, {"name": "Davika Hoorne"}, {"character": "no name"}]'
+    }
+    search_text = build_search_text(movie)
+
+    for part in ('พี่มาก..พระโขนง', 'pee mak', 'บรรจง ปิสัญธนะกูล', 'มาริโอ้ เมาเร่อ', 'davika hoorne'):
+        assert part in search_text, part
+    assert search_text == search_text.lower()
+
+    assert build_movie_record(movie)['search_text'] == search_text
+    # record ที่อัปเดตบางคอลัมน์ (เช่น poster) ไม่เขียนทับ search_text เดิม
+    assert 'search_text' not in build_movie_record({'tmdb_id': 140420, 'title': 'พี่มาก..พระโขนง', 'poster_path': '/p.jpg'})
+    assert build_search_text(dict(movie, original_title=None, cast_data=None)) == 'พี่มาก..พระโขนง บรรจง ปิสัญธนะกูล'
+
+
+def main():
+    """Main test function"""
+    print("🎬 Movie Search Test")
+    print("=" * 50)
+
+    tests = [
+        test_query_variants_share_one_backend_call,
+        test_blank_query_skips_backends,
+        test_ranked_search_uses_rpc,
+        test_missing_rpc_falls_back_to_ilike,
+        test_other_rpc_errors_keep_trying_rpc,
+        test_search_text_fields
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Test Movie Store
+ทดสอบว่า upsert หลายเรื่องที่มีคอลัมน์ต่างกันไม่เขียน NULL ทับข้อมูลเดิม
+"""
+
+import sys
+
+from movie_store import upsert_movies
+
+
+class FakeResult:
+    def __init__(self, data):
+        self.data = data
+
+
+class FakeUpsert:
+    """upsert แบบ PostgREST: ใช้คอลัมน์รวมของทุก record และใส่ NULL ให้คอลัมน์ที่ record ไม่มี"""
+
+    def __init__(self, table, calls):
+        self.table = table
+        self.calls = calls
+        self.records = None
+
+    def upsert(self, records, on_conflict=None):
+        self.records = records
+        self.on_conflict = on_conflict
+        return self
+
+    def execute(self):
+        columns = set().union(*(record.keys() for record in self.records))
+        self.calls.append(columns)
+
+        saved = []
+        for record in self.records:
+            row = self.table.setdefault(record[self.on_conflict], {'id': len(self.table) + 1})
+            row.update({column: record.get(column) for column in columns})
+            saved.append(dict(row))
+        return FakeResult(saved)
+
+
+class FakeSupabase:
+    def __init__(self, rows):
+        self.rows = {row['tmdb_id']: dict(row) for row in rows}
+        self.calls = []
+
+    def table(self, name):
+        return FakeUpsert(self.rows, self.calls)
+
+
+def test_mixed_chunk_keeps_other_columns():
+    """chunk ที่อัปเดต poster ของเรื่องหนึ่งและ providers ของอีกเรื่องไม่ลบข้อมูลของกันและกัน"""
+    supabase = FakeSupabase([
+        {'id': 1, 'tmdb_id': 10, 'title': 'A', 'poster_path': '/a.jpg', 'streaming_providers': None},
+        {'id': 2, 'tmdb_id': 20, 'title': 'B', 'poster_path': None, 'streaming_providers': {'flatrate': ['Netflix']}},
+        {'id': 3, 'tmdb_id': 30, 'title': 'C', 'poster_path': None, 'streaming_providers': None}
+    ])
+
+    saved = upsert_movies(supabase, [
+        {'tmdb_id': 10, 'title': 'A', 'streaming_providers': {'flatrate': ['Disney+']}},
+        {'tmdb_id': 20, 'title': 'B', 'poster_path': '/b.jpg'},
+        {'tmdb_id': 30, 'title': 'C', 'poster_path': '/c.jpg', 'streaming_providers': {'rent': ['Apple TV']}}
+    ])
+
+    assert saved == {10: 1, 20: 2, 30: 3}
+    assert len(supabase.calls) == 3
+    assert supabase.rows[10]['poster_path'] == '/a.jpg'
+    assert supabase.rows[10]['streaming_providers'] == {'flatrate': ['Disney+']}
+    assert supabase.rows[20]['streaming_providers'] == {'flatrate': ['Netflix']}
+    assert supabase.rows[20]['poster_path'] == '/b.jpg'
+    assert supabase.rows[30]['poster_path'] == '/c.jpg'
+
+
+def test_same_columns_single_upsert():
+    """record ที่มีคอลัมน์เหมือนกันยังส่งใน upsert เดียว"""
+    supabase = FakeSupabase([])
+    upsert_movies(supabase, [{'tmdb_id': i, 'title': f'M{i}', 'poster_path': f'/{i}.jpg'} for i in range(5)])
+    assert len(supabase.calls) == 1
+    assert upsert_movies(supabase, []) == {}
+
+
+def main():
+    """Main test function"""
+    print("💾 Movie Store Test")
+    print("=" * 50)
+
+    tests = [
+        test_mixed_chunk_keeps_other_columns,
+        test_same_columns_single_upsert
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
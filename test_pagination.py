@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Test Keyset Pagination
+ทดสอบ cursor, เงื่อนไข PostgREST และการเดินหน้า/ย้อนกลับทีละหน้า (รวม created_at ที่ซ้ำกัน)
+"""
+
+import base64
+import json
+import os
+import re
+import sys
+import tempfile
+
+os.environ.setdefault('SUPABASE_URL', 'http://127.0.0.1:9')
+os.environ.setdefault('SUPABASE_ANON_KEY', 'test-key')
+os.environ.setdefault('TMDB_API_KEY', 'test-key')
+os.environ.setdefault('SECURITY_STATE_PATH', os.path.join(tempfile.mkdtemp(), 'security_state.sqlite3'))
+os.environ.setdefault('SEARCH_INDEX_ENABLED', '0')
+os.environ.setdefault('SUGGEST_INDEX_ENABLED', '0')
+
+from app import SupabaseMovieManager
+from pagination import build_page, clamp_page_size, decode_cursor, encode_cursor, keyset_filter
+
+T1 = '2025-01-01T00:00:00+00:00'
+T2 = '2025-01-02T00:00:00+00:00'
+T3 = '2025-01-03T12:30:00.123456+00:00'
+
+# created_at ซ้ำกัน 3 แถว (T2) ต้องเรียงต่อด้วย id
+ROWS = [
+    {'id': 1, 'created_at': T1, 'title': 'A'},
+    {'id': 2, 'created_at': T2, 'title': 'B'},
+    {'id': 3, 'created_at': T2, 'title': 'C'},
+    {'id': 4, 'created_at': T2, 'title': 'D'},
+    {'id': 5, 'created_at': T3, 'title': 'E'},
+]
+
+FILTER_PATTERN = re.compile(r'created_at\.(lt|gt)\."([^"]+)",and\(created_at\.eq\."\2",id\.\1\.(\d+)\)')
+
+
+def raw_cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip('=')
+
+
+class FakeMoviesQuery:
+    """
+    แทน supabase.table('movies') ที่ตีความเงื่อนไข .or_ จาก keyset_filter จริง
+    (เงื่อนไขที่รูปแบบผิดทำให้ test ล้ม)
+    """
+
+    def __init__(self, rows, filters):
+        self.rows = list(rows)
+        self.filters = filters
+        self.orders = []
+
+    def select(self, columns):
+        return self
+
+    def or_(self, expression):
+        self.filters.append(expression)
+        match = FILTER_PATTERN.fullmatch(expression)
+        assert match, expression
+        op, created_at, row_id = match.group(1), match.group(2), int(match.group(3))
+        key = (created_at, row_id)
+        if op == 'lt':
+            self.rows = [row for row in self.rows if (row['created_at'], row['id']) < key]
+        else:
+            self.rows = [row for row in self.rows if (row['created_at'], row['id']) > key]
+        return self
+
+    def order(self, column, desc=False):
+        self.orders.append((column, desc))
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    def execute(self):
+        assert self.orders[0][0] == 'created_at' and self.orders[1][0] == 'id'
+        desc = self.orders[0][1]
+        rows = sorted(self.rows, key=lambda row: (row['created_at'], row['id']), reverse=desc)
+        return type('Result', (), {'data': [dict(row) for row in rows[:self.count]]})
+
+
+class FakeSupabase:
+    def __init__(self, rows):
+        self.rows = rows
+        self.filters = []
+
+    def table(self, name):
+        return FakeMoviesQuery(self.rows, self.filters)
+
+
+def make_manager():
+    manager = SupabaseMovieManager.__new__(SupabaseMovieManager)
+    manager.supabase = FakeSupabase(ROWS)
+    return manager
+
+
+def ids(page):
+    return [row['id'] for row in page['movies']]
+
+
+def test_cursor_round_trip():
+    """encode -> decode ได้ created_at, id และทิศทางเดิม"""
+    for row in ROWS:
+        for direction in ('next', 'prev'):
+            cursor = encode_cursor(row, direction)
+            assert '=' not in cursor
+            assert decode_cursor(cursor) == (row['created_at'], row['id'], direction)
+
+    assert decode_cursor(encode_cursor({'created_at': '2025-01-02 00:00:00Z', 'id': 7}, 'next'))[1] == 7
+
+
+def test_bad_cursor_falls_back_to_first_page():
+    """cursor ที่เสียหรือถูกแก้คืน None (หน้าแรก) และไม่ไปถึงเงื่อนไขของ PostgREST"""
+    injected = 'x",id.gt.0,title.eq."y'
+    bad_cursors = [
+        '',
+        'not-a-cursor',
+        '!!!!',
+        encode_cursor(ROWS[0], 'next')[:-3],
+        raw_cursor(['k', 'd']),
+        raw_cursor({'k': [T1], 'd': 'next'}),
+        raw_cursor({'k': [T1, 'abc'], 'd': 'next'}),
+        raw_cursor({'k': [T1, True], 'd': 'next'}),
+        raw_cursor({'k': [T1, 1], 'd': 'sideways'}),
+        raw_cursor({'k': [12345, 1], 'd': 'next'}),
+        raw_cursor({'k': [injected, 1], 'd': 'next'}),
+        raw_cursor({'k': [T1 + '",id.gt.0', 1], 'd': 'prev'}),
+    ]
+    for cursor in bad_cursors:
+        assert decode_cursor(cursor) is None, cursor
+
+    manager = make_manager()
+    page = manager.list_movies_page(2, decode_cursor(raw_cursor({'k': [injected, 1], 'd': 'next'})))
+    assert ids(page) == [5, 4]
+    assert manager.supabase.filters == []
+
+
+def test_keyset_filter_with_tied_created_at():
+    """เงื่อนไขที่ส่งให้ PostgREST ตรงตัว: created_at ที่เท่ากันเทียบต่อด้วย id"""
+    assert keyset_filter(T2, 3, 'next') == \
+        'created_at.lt."2025-01-02T00:00:00+00:00",and(created_at.eq."2025-01-02T00:00:00+00:00",id.lt.3)'
+    assert keyset_filter(T2, 3, 'prev') == \
+        'created_at.gt."2025-01-02T00:00:00+00:00",and(created_at.eq."2025-01-02T00:00:00+00:00",id.gt.3)'
+
+    # หน้าที่ตัดกลางกลุ่ม created_at เดียวกันไม่ซ้ำและไม่ข้ามแถว
+    manager = make_manager()
+    page = manager.list_movies_page(2, decode_cursor(encode_cursor({'created_at': T2, 'id': 4}, 'next')))
+    assert ids(page) == [3, 2]
+    assert manager.supabase.filters == [keyset_filter(T2, 4, 'next')]
+
+
+def test_build_page_cursors():
+    """cursor ของหน้าแรก หน้ากลาง และหน้าสุดท้าย"""
+    newest_first = sorted(ROWS, key=lambda row: (row['created_at'], row['id']), reverse=True)
+
+    first = build_page([dict(row) for row in newest_first[:3]], 2, None)
+    assert ids(first) == [5, 4]
+    assert first['prev_cursor'] is None
+    assert decode_cursor(first['next_cursor']) == (T2, 4, 'next')
+
+    middle = build_page([dict(row) for row in newest_first[2:5]], 2, 'next')
+    assert ids(middle) == [3, 2]
+    assert decode_cursor(middle['prev_cursor']) == (T2, 3, 'prev')
+    assert decode_cursor(middle['next_cursor']) == (T2, 2, 'next')
+
+    last = build_page([dict(row) for row in newest_first[4:]], 2, 'next')
+    assert ids(last) == [1]
+    assert last['next_cursor'] is None
+    assert decode_cursor(last['prev_cursor']) == (T1, 1, 'prev')
+
+    # ย้อนกลับ: แถวมาจากเก่าไปใหม่ และถึงหน้าแรกแล้วไม่มี prev_cursor
+    back = build_page([dict(row) for row in reversed(newest_first[:2])], 2, 'prev')
+    assert ids(back) == [5, 4]
+    assert back['prev_cursor'] is None and back['next_cursor'] is not None
+
+    assert build_page([], 2, None) == {'movies': [], 'next_cursor': None, 'prev_cursor': None}
+
+
+def test_walk_forward_and_back():
+    """เดินหน้าจนหมดแล้วย้อนกลับได้ทุกแถวตามลำดับ (รวมแถวที่ created_at ซ้ำกัน)"""
+    manager = make_manager()
+
+    pages = [manager.list_movies_page(2, None)]
+    while pages[-1]['next_cursor']:
+        pages.append(manager.list_movies_page(2, decode_cursor(pages[-1]['next_cursor'])))
+    assert [ids(page) for page in pages] == [[5, 4], [3, 2], [1]]
+
+    back = [pages[-1]]
+    while back[-1]['prev_cursor']:
+        back.append(manager.list_movies_page(2, decode_cursor(back[-1]['prev_cursor'])))
+    assert [ids(page) for page in back] == [[1], [3, 2], [5, 4]]
+
+
+def test_clamp_page_size():
+    """page size ที่ไม่ใช่ตัวเลขใช้ค่าเริ่มต้น และถูกจำกัดช่วง"""
+    assert clamp_page_size('abc', default=50) == 50
+    assert clamp_page_size('0') == 1
+    assert clamp_page_size('100000') == clamp_page_size('100')
+
+
+def main():
+    """Main test function"""
+    print("📄 Keyset Pagination Test")
+    print("=" * 50)
+
+    tests = [
+        test_cursor_round_trip,
+        test_bad_cursor_falls_back_to_first_page,
+        test_keyset_filter_with_tied_created_at,
+        test_build_page_cursors,
+        test_walk_forward_and_back,
+        test_clamp_page_size
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
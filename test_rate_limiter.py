@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Test Rate Limiter
+ทดสอบ sliding window counter ที่ใช้จำกัดจำนวนการเรียก API ต่อ IP
+"""
+
+import os
+import sys
+import tempfile
+
+from security_middleware import RateLimiter, SecurityMiddleware, SlidingWindowCounter
+from security_store import MemoryStateStore, SQLiteStateStore, StoredMap
+
+WINDOWS = {'per_minute': 60, 'per_hour': 3600}
+LIMITS = {'per_minute': 10, 'per_hour': 100}
+
+
+def test_blocks_after_limit():
+    """request ที่ 11 ในนาทีเดียวกันถูกปฏิเสธ และไม่ถูกนับ"""
+    counter = SlidingWindowCounter(WINDOWS)
+    for i in range(10):
+        assert counter.hit('1.1.1.1', LIMITS, now=120 + i) == (None, {'per_minute': i, 'per_hour': i})
+
+    assert counter.hit('1.1.1.1', LIMITS, now=130)[0] == 'per_minute'
+    assert counter.counts('1.1.1.1', now=130)['per_hour'] == 10
+    assert counter.hit('2.2.2.2', LIMITS, now=130)[0] is None
+
+
+def test_previous_window_decays():
+    """request ของนาทีก่อนหน้าถูกนับตามสัดส่วนที่ยังอยู่ใน window"""
+    counter = SlidingWindowCounter(WINDOWS)
+    for i in range(10):
+        counter.hit('1.1.1.1', LIMITS, now=60 + i)
+
+    assert counter.counts('1.1.1.1', now=120)['per_minute'] == 10
+    assert counter.hit('1.1.1.1', LIMITS, now=120)[0] == 'per_minute'
+    assert counter.counts('1.1.1.1', now=150)['per_minute'] == 5
+    assert counter.hit('1.1.1.1', LIMITS, now=150)[0] is None
+    # เงียบไปนานกว่า 1 window ไม่เหลือ request ค้าง
+    assert counter.counts('1.1.1.1', now=300)['per_minute'] == 0
+
+
+def test_hour_limit():
+    """limit ต่อชั่วโมงทำงานแม้อัตราต่อนาทีไม่เกิน"""
+    counter = SlidingWindowCounter(WINDOWS)
+    limits = {'per_minute': 10, 'per_hour': 30}
+    # ทุก 7 วินาที (ประมาณ 8.6 ครั้งต่อนาที)
+    for i in range(30):
+        assert counter.hit('1.1.1.1', limits, now=i * 7)[0] is None
+
+    assert counter.hit('1.1.1.1', limits, now=210)[0] == 'per_hour'
+
+
+def test_rate_limiter_result():
+    """RateLimiter คืนผลรูปแบบเดิม"""
+    limiter = RateLimiter()
+    result = limiter.check_rate_limit('3.3.3.3')
+    assert result['allowed'] and result['limits']['per_minute'] == '0/10'
+
+    for _ in range(9):
+        limiter.check_rate_limit('3.3.3.3')
+    result = limiter.check_rate_limit('3.3.3.3')
+    assert not result['allowed'] and result['retry_after'] == 60
+    assert [ip for ip, _, _ in limiter.requests.active('per_hour')] == ['3.3.3.3']
+
+
+def test_sqlite_store_shared_between_workers():
+    """worker สองตัวที่ใช้ไฟล์เดียวกันนับรวมกัน และสถานะยังอยู่หลังเปิดใหม่"""
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'state.sqlite3')
+        worker_a = SlidingWindowCounter(WINDOWS, SQLiteStateStore(path))
+        worker_b = SlidingWindowCounter(WINDOWS, SQLiteStateStore(path))
+
+        for i in range(5):
+            assert worker_a.hit('1.1.1.1', LIMITS, now=120 + i)[0] is None
+            assert worker_b.hit('1.1.1.1', LIMITS, now=120 + i)[0] is None
+        assert worker_a.hit('1.1.1.1', LIMITS, now=130)[0] == 'per_minute'
+
+        restarted = SecurityMiddleware(SQLiteStateStore(path))
+        SecurityMiddleware(SQLiteStateStore(path)).add_to_blacklist('6.6.6.6')
+        assert not restarted.check_ip_security('6.6.6.6')['allowed']
+        assert SlidingWindowCounter(WINDOWS, SQLiteStateStore(path)).counts('1.1.1.1', now=130)['per_minute'] == 10
+
+
+def test_idle_ips_are_bounded():
+    """IP ที่ไม่ถูกเขียนนานที่สุดถูกลบเมื่อเกินขนาด และ IP ที่หมดอายุถูก sweeper ลบ"""
+    store = MemoryStateStore(max_entries=3, sweep_interval=0)
+    counter = SlidingWindowCounter(WINDOWS, store)
+    for i in range(5):
+        counter.hit(f'10.0.0.{i}', LIMITS)
+
+    assert len(counter) == 3 and store.evictions == 2
+    assert counter.counts('10.0.0.0')['per_minute'] == 0
+    assert counter.counts('10.0.0.4')['per_minute'] == 1
+
+    suspicious = StoredMap(store, 'suspicious_ips', int, ttl=0)
+    suspicious.increment('10.0.0.1')
+    suspicious.increment('10.0.0.2')
+    assert suspicious['10.0.0.1'] == 0
+    store.sweep()
+    assert len(suspicious) == 0 and store.expirations == 2
+
+    with tempfile.TemporaryDirectory() as directory:
+        store = SQLiteStateStore(os.path.join(directory, 'state.sqlite3'), max_entries=3, sweep_interval=0)
+        counter = SlidingWindowCounter(WINDOWS, store)
+        for i in range(5):
+            counter.hit(f'10.0.0.{i}', LIMITS)
+        store.sweep()
+        assert len(counter) == 3 and store.evictions == 2
+
+
+def main():
+    """Main test function"""
+    print("🚦 Rate Limiter Test")
+    print("=" * 50)
+
+    tests = [
+        test_blocks_after_limit,
+        test_previous_window_decays,
+        test_hour_limit,
+        test_rate_limiter_result,
+        test_sqlite_store_shared_between_workers,
+        test_idle_ips_are_bounded
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
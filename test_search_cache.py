@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Test Search Result Cache
+ทดสอบ key, TTL และการล้างผลค้นหาจากฐานข้อมูล (local) และ TMDB
+"""
+
+import sys
+import time
+
+from search_cache import SearchResultCache, search_key
+
+
+def test_tone_marks_do_not_collide():
+    """คำค้นที่ต่างกันแค่วรรณยุกต์เป็นคนละ key ทั้ง 2 แหล่ง แต่ตัวพิมพ์และช่องว่างหัวท้ายไม่มีผล"""
+    cache = SearchResultCache()
+    for kind in ('local', 'tmdb'):
+        cache.set(kind, 'พี่มาก', [{'title': f'พี่มาก..พระโขนง ({kind})'}])
+
+        assert cache.get(kind, 'พีมาก') is None
+        assert cache.get(kind, '  พี่มาก ') == [{'title': f'พี่มาก..พระโขนง ({kind})'}]
+
+    cache.set('tmdb', 'Dune', [{'title': 'Dune'}])
+    assert cache.get('tmdb', ' dune') == [{'title': 'Dune'}]
+    assert cache.get('local', 'dune') is None
+    assert cache.get('tmdb', '   ') is None
+
+
+def test_key_normalization_variants():
+    """ช่องว่างภายใน, NFC/NFD, zero-width และตัวพิมพ์ใช้ key เดียวกัน (และเรียก search_key ซ้ำได้ผลเดิม)"""
+    assert search_key('star  wars') == search_key(' Star\tWars\n') == 'star wars'
+    assert search_key('Ame\u0301lie') == search_key('am\u00e9lie') == 'am\u00e9lie'
+    assert search_key('\u0e1e\u0e35\u0e48\u0e21\u0e32\u0e01') == 'พี่มาก'
+    assert search_key('พี่\u200bมาก\u200c') == search_key('\ufeffพี่มาก\u200d') == 'พี่มาก'
+    assert search_key('พีมาก') != search_key('พี่มาก')
+    assert search_key(search_key('  Star   Wars ')) == search_key('  Star   Wars ')
+    assert search_key(None) == search_key('\u200b') == ''
+
+    cache = SearchResultCache()
+    cache.set('local', 'Star  Wars', [{'id': 1}], limit=10)
+    cache.set('tmdb', 'Ame\u0301lie', [{'id': 194}])
+    assert cache.get('local', 'star wars\u200b', limit=10) == [{'id': 1}]
+    assert cache.get('tmdb', 'AM\u00c9LIE') == [{'id': 194}]
+    assert cache.stats()['size'] == 2
+
+
+def test_local_results_cleared_after_import():
+    """บันทึกหนังแล้วผล local ถูกล้าง (ผล TMDB ยังอยู่) และผลที่ค้นก่อนการ import ไม่ถูกเก็บ"""
+    cache = SearchResultCache()
+    cache.set('local', 'dune', [], limit=10)
+    cache.set('tmdb', 'dune', [{'id': 438631}])
+
+    generation = cache.local_generation
+    cache.invalidate_local()
+    assert cache.get('local', 'dune', limit=10) is None
+    assert cache.get('tmdb', 'dune') == [{'id': 438631}]
+
+    cache.set('local', 'dune', [], limit=10, generation=generation)
+    assert cache.get('local', 'dune', limit=10) is None
+
+
+def test_ttl_per_kind_and_lru():
+    """ผล local หมดอายุตาม local_ttl ผล TMDB อยู่ได้นานกว่า และรายการเก่าสุดถูกลบเมื่อเต็ม"""
+    cache = SearchResultCache(max_entries=3, local_ttl=0.1, tmdb_ttl=60)
+    cache.set('local', 'alien', [])
+    cache.set('tmdb', 'alien', [])
+
+    time.sleep(0.15)
+    assert cache.get('local', 'alien') is None
+    assert cache.get('tmdb', 'alien') == []
+    assert cache.expirations == 1
+
+    for query in ('a', 'b', 'c'):
+        cache.set('tmdb', query, [])
+    assert cache.get('tmdb', 'alien') is None
+    assert cache.evictions == 1
+    assert cache.stats()['tmdb']['hits'] == 1
+
+
+def main():
+    """Main test function"""
+    print("🔎 Search Result Cache Test")
+    print("=" * 50)
+
+    tests = [
+        test_tone_marks_do_not_collide,
+        test_key_normalization_variants,
+        test_local_results_cleared_after_import,
+        test_ttl_per_kind_and_lru
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
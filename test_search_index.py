@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Test Search Index
+ทดสอบ inverted index ในหน่วยความจำ (ภาษาไทยไม่เว้นวรรค วรรณยุกต์ การอัปเดตทีละเรื่อง)
+"""
+
+import sys
+
+from search_index import SUGGEST_INDEX_COLUMNS, SearchIndex, TitleSuggestIndex, normalize_text
+
+
+def sample_rows():
+    return [
+        {'id': 1, 'title': 'ฉลาดเกมส์โกง', 'original_title': 'Bad Genius', 'director': 'นัฐวุฒิ พูนพิริยะ',
+         'genres': ['Thriller'], 'cast_data': '[{"name": "ชุติมณฑน์ จึงเจริญสุขยิ่ง"}]'},
+        {'id': 2, 'title': 'พี่มาก..พระโขนง', 'original_title': 'Pee Mak', 'director': 'บรรจง ปิสัญธนะกูล',
+         'genres': ['Comedy', 'Horror'], 'cast_data': [{'name': 'มาริโอ้ เมาเร่อ'}]},
+        {'id': 3, 'title': 'Fight Club', 'original_title': 'Fight Club', 'director': 'David Fincher',
+         'genres': ['Drama'], 'cast_data': [{'name': 'Brad Pitt'}]},
+        {'id': 4, 'title': 'Club Zero', 'original_title': 'Club Zero', 'director': 'Jessica Hausner',
+         'genres': ['Drama'], 'cast_data': []}
+    ]
+
+
+def titles(results):
+    return [row['title'] for row in results]
+
+
+def test_not_ready_returns_none():
+    """ยังไม่ build ต้องคืน None เพื่อให้ไปค้นในฐานข้อมูล"""
+    assert SearchIndex().search('club') is None
+
+
+def test_thai_substring_without_word_boundaries():
+    """ค้นคำไทยกลางประโยคได้ และไม่ต้องพิมพ์วรรณยุกต์"""
+    index = SearchIndex()
+    index.build(sample_rows())
+
+    assert titles(index.search('เกมส์')) == ['ฉลาดเกมส์โกง']
+    assert titles(index.search('พระโขนง')) == ['พี่มาก..พระโขนง']
+    assert titles(index.search('พีมาก')) == ['พี่มาก..พระโขนง']
+    assert titles(index.search('จึงเจริญ')) == ['ฉลาดเกมส์โกง']
+    assert normalize_text('พี่มาก') == normalize_text('พีมาก')
+
+
+def test_title_matches_rank_first():
+    """title ขึ้นต้นด้วยคำค้นมาก่อน title ที่มีคำค้น และก่อน field อื่น"""
+    index = SearchIndex()
+    index.build(sample_rows())
+
+    assert titles(index.search('club')) == ['Club Zero', 'Fight Club']
+    assert titles(index.search('fincher')) == ['Fight Club']
+    assert titles(index.search('drama')) == ['Club Zero', 'Fight Club']
+
+
+def test_incremental_upsert():
+    """upsert แทนที่ข้อมูลเดิมของหนังเรื่องนั้น"""
+    index = SearchIndex()
+    index.build(sample_rows())
+    index.upsert({'id': 3, 'title': 'Se7en', 'original_title': 'Se7en', 'director': 'David Fincher',
+                  'genres': ['Crime'], 'cast_data': []})
+
+    assert titles(index.search('club')) == ['Club Zero']
+    assert titles(index.search('fincher')) == ['Se7en']
+
+
+def test_suggest_prefix():
+    """autocomplete: title ขึ้นต้นด้วยคำค้นมาก่อน title ที่มีคำขึ้นต้นด้วยคำค้น"""
+    index = TitleSuggestIndex()
+    assert index.suggest('cl') is None
+    index.build(sample_rows())
+
+    assert titles(index.suggest('cl')) == ['Club Zero', 'Fight Club']
+    assert titles(index.suggest('ฉลาด')) == ['ฉลาดเกมส์โกง']
+    assert titles(index.suggest('bad gen')) == ['ฉลาดเกมส์โกง']
+
+    index.upsert({'id': 4, 'title': 'Zero Dark Thirty', 'original_title': 'Zero Dark Thirty',
+                  'director': 'Kathryn Bigelow', 'genres': [], 'cast_data': []})
+    assert titles(index.suggest('cl')) == ['Fight Club']
+
+
+class FakeQuery:
+    """แทน supabase.table('movies') ที่อ่านทีละหน้าด้วย gt('id') / limit"""
+
+    def __init__(self, rows, selects):
+        self.rows = rows
+        self.selects = selects
+
+    def select(self, columns):
+        self.selects.append(columns)
+        self.columns = [column.strip() for column in columns.split(',')]
+        return self
+
+    def gt(self, column, value):
+        self.after = value
+        return self
+
+    def order(self, column):
+        return self
+
+    def limit(self, count):
+        self.count = count
+        return self
+
+    def execute(self):
+        page = [row for row in self.rows if row['id'] > self.after][:self.count]
+        return type('Result', (), {'data': [{column: row.get(column) for column in self.columns} for row in page]})
+
+
+class FakeSupabase:
+    def __init__(self, rows):
+        self.rows = rows
+        self.selects = []
+
+    def table(self, name):
+        return FakeQuery(self.rows, self.selects)
+
+
+def test_suggest_index_loads_only_title_columns():
+    """suggest index โหลดเฉพาะคอลัมน์ชื่อหนังทีละหน้า และเก็บแค่ id, title, original_title, year"""
+    supabase = FakeSupabase(sample_rows())
+    index = TitleSuggestIndex()
+    index.build(index.load_rows(supabase, page_size=3))
+
+    assert supabase.selects == [SUGGEST_INDEX_COLUMNS, SUGGEST_INDEX_COLUMNS]
+    assert titles(index.suggest('pee')) == ['พี่มาก..พระโขนง']
+    assert index.stats()['movies'] == 4
+
+    # แถวเต็มที่ movie_store ส่งมาหลังบันทึกเพิ่มเข้า index ทันที
+    index.upsert(dict(sample_rows()[2], id=5, title='Fight Club 2'))
+    assert titles(index.suggest('fight')) == ['Fight Club', 'Fight Club 2']
+
+
+def main():
+    """Main test function"""
+    print("🔎 Search Index Test")
+    print("=" * 50)
+
+    tests = [
+        test_not_ready_returns_none,
+        test_thai_substring_without_word_boundaries,
+        test_title_matches_rank_first,
+        test_incremental_upsert,
+        test_suggest_prefix,
+        test_suggest_index_loads_only_title_columns
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
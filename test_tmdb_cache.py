@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test TMDB Cache
+ทดสอบ cache ของ payload จาก TMDB (hit, หมดอายุ, invalidate และการดึงใหม่ผ่าน TMDBClient)
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+from tmdb_cache import TMDBCache, movie_cache_key
+from tmdb_client import TMDBClient
+from tmdb_rate_governor import TMDBRateGovernor
+
+
+class FakeResponse:
+    status_code = 200
+    headers = {}
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def raise_for_status(self):
+        pass
+
+    def json(self):
+        return self.payload
+
+
+class FakeSession:
+    """แทน requests.Session: นับจำนวนครั้งที่เรียก TMDB"""
+
+    def __init__(self):
+        self.calls = []
+
+    def get(self, url, params=None, timeout=None):
+        self.calls.append(url)
+        return FakeResponse({'url': url, 'fetch': len(self.calls)})
+
+
+def make_client(cache):
+    client = TMDBClient(api_key='test-key', cache=cache, rate_governor=TMDBRateGovernor(rate=0))
+    client.session = FakeSession()
+    return client
+
+
+def test_hit_and_invalidate():
+    """รายการที่บันทึกแล้วอ่านได้ (นับเป็น hit) และหายไปหลัง invalidate"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TMDBCache(os.path.join(directory, 'tmdb.sqlite3'), ttl=3600)
+        key = movie_cache_key(550, 'credits')
+
+        assert cache.get(key) is None
+        cache.set(key, {'id': 550, 'title': 'Fight Club'})
+        assert cache.get(key) == {'id': 550, 'title': 'Fight Club'}
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        # process อื่นที่เปิดไฟล์เดียวกันเห็นข้อมูลเดียวกัน
+        assert TMDBCache(cache.path).get(key) == {'id': 550, 'title': 'Fight Club'}
+
+        cache.invalidate(key)
+        assert cache.get(key) is None
+        assert cache.stats()['size'] == 0
+
+
+def test_expired_entry_is_removed():
+    """รายการที่เกิน TTL ไม่ถูกคืนค่าและถูกลบออกจากไฟล์"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TMDBCache(os.path.join(directory, 'tmdb.sqlite3'), ttl=0.2)
+        cache.set('movie:1:credits', {'id': 1})
+        assert cache.get('movie:1:credits') == {'id': 1}
+
+        time.sleep(0.25)
+        assert cache.get('movie:1:credits') is None
+        assert cache.stats()['size'] == 0
+
+
+def test_lru_eviction():
+    """เกิน max_entries แล้วลบรายการที่ถูกอ่านนานที่สุด"""
+    with tempfile.TemporaryDirectory() as directory:
+        cache = TMDBCache(os.path.join(directory, 'tmdb.sqlite3'), ttl=3600, max_entries=2)
+        cache.set('a', {'id': 'a'})
+        time.sleep(0.01)
+        cache.set('b', {'id': 'b'})
+        time.sleep(0.01)
+        cache.get('a')
+        cache.set('c', {'id': 'c'})
+
+        assert cache.get('b') is None
+        assert cache.get('a') == {'id': 'a'} and cache.get('c') == {'id': 'c'}
+        assert cache.evictions == 1
+
+
+def test_client_refetches_after_expiry():
+    """get_movie อ่านจาก cache ภายใน TTL และเรียก TMDB ใหม่เมื่อหมดอายุหรือถูก invalidate"""
+    with tempfile.TemporaryDirectory() as directory:
+        client = make_client(TMDBCache(os.path.join(directory, 'tmdb.sqlite3'), ttl=0.2))
+
+        first = client.get_movie(550)
+        assert client.get_movie(550) == first
+        assert len(client.session.calls) == 1
+
+        time.sleep(0.25)
+        assert client.get_movie(550)['fetch'] == 2
+
+        client.invalidate_movie(550)
+        assert client.get_movie(550)['fetch'] == 3
+        assert client.get_movie(550, use_cache=False)['fetch'] == 4
+        assert len(client.session.calls) == 4
+
+
+def main():
+    """Main test function"""
+    print("🗄️ TMDB Cache Test")
+    print("=" * 50)
+
+    tests = [
+        test_hit_and_invalidate,
+        test_expired_entry_is_removed,
+        test_lru_eviction,
+        test_client_refetches_after_expiry
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
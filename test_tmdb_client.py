@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Test TMDB Client
+ทดสอบการรวม request ที่เหมือนกันซึ่งเกิดพร้อมกัน (SingleFlight) ให้เรียก TMDB ครั้งเดียว
+"""
+
+import sys
+import threading
+import time
+
+from tmdb_client import SingleFlight, TMDBClient
+from tmdb_rate_governor import TMDBRateGovernor
+
+
+def _wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.001)
+
+
+def _run_concurrently(count, func):
+    """เรียก func ใน thread ตามจำนวน และคืนผลลัพธ์หรือ exception ของแต่ละ thread"""
+    results = [None] * count
+
+    def run(index):
+        try:
+            results[index] = func()
+        except Exception as e:
+            results[index] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_concurrent_calls_share_one_upstream_call():
+    """thread ที่สองที่เรียก key เดียวกันระหว่างที่ตัวแรกยังทำงานได้ผลเดียวกันโดยไม่เรียกซ้ำ"""
+    flight = SingleFlight()
+    release = threading.Event()
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        release.wait(2)
+        return {'id': 550}
+
+    threads, results = _run_concurrently(2, lambda: flight.do('movie:550', fetch))
+    _wait_for(lambda: flight.coalesced == 1)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert results[0] is results[1] and results[0] == {'id': 550}
+    assert flight.stats() == {'executed': 1, 'coalesced': 1, 'in_flight': 0, 'saved_percentage': 50.0}
+
+    # หลังเสร็จแล้ว key เดิมเรียกจริงอีกครั้ง
+    flight.do('movie:550', fetch)
+    assert len(calls) == 2
+
+
+def test_error_shared_and_not_cached():
+    """exception ของผู้เรียกจริงถูกส่งต่อให้ทุก thread ที่รออยู่ และ request ถัดไปลองใหม่"""
+    flight = SingleFlight()
+    release = threading.Event()
+
+    def failing():
+        release.wait(2)
+        raise ValueError('TMDB down')
+
+    threads, results = _run_concurrently(3, lambda: flight.do('k', failing))
+    _wait_for(lambda: flight.coalesced == 2)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert all(isinstance(result, ValueError) for result in results)
+    assert flight.do('k', lambda: 'ok') == 'ok'
+
+
+def test_client_coalesces_identical_requests():
+    """TMDBClient.get รวมเฉพาะ request ที่ path และ params เหมือนกัน"""
+    release = threading.Event()
+    calls = []
+
+    class FakeResponse:
+        status_code = 200
+        headers = {}
+
+        def raise_for_status(self):
+            pass
+
+        def json(self):
+            return {'results': []}
+
+    class SlowSession:
+        def get(self, url, params=None, timeout=None):
+            calls.append((url, params.get('query')))
+            release.wait(2)
+            return FakeResponse()
+
+    client = TMDBClient(api_key='test-key', rate_governor=TMDBRateGovernor(rate=0))
+    client.session = SlowSession()
+
+    threads, _ = _run_concurrently(3, lambda: client.get('/search/movie', {'query': 'dune'}))
+    other, _ = _run_concurrently(1, lambda: client.get('/search/movie', {'query': 'alien'}))
+    _wait_for(lambda: client.single_flight.coalesced == 2 and len(calls) == 2)
+    release.set()
+    for thread in threads + other:
+        thread.join()
+
+    assert sorted(query for _, query in calls) == ['alien', 'dune']
+
+
+def main():
+    """Main test function"""
+    print("🔀 TMDB Client Test")
+    print("=" * 50)
+
+    tests = [
+        test_concurrent_calls_share_one_upstream_call,
+        test_error_shared_and_not_cached,
+        test_client_coalesces_identical_requests
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
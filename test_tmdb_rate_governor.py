@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+Test TMDB Rate Governor
+ทดสอบ token bucket ที่ทุก process ใช้ร่วมกันผ่านไฟล์สถานะ (fcntl.flock)
+"""
+
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import tmdb_rate_governor
+from tmdb_rate_governor import TMDBRateGovernor
+
+RATE = 50
+BURST = 5
+REQUESTS_PER_PROCESS = 15
+
+
+def _acquire_many(path, start, count):
+    """process ลูก: รอเริ่มพร้อมกันแล้วขอ token ตามจำนวน"""
+    governor = TMDBRateGovernor(rate=RATE, burst=BURST, path=path)
+    start.wait()
+    for _ in range(count):
+        governor.acquire()
+
+
+def test_bucket_shared_between_processes():
+    """2 process ที่ใช้ไฟล์เดียวกันแบ่ง quota เดียวกัน (ไม่ได้คนละ BURST + RATE)"""
+    if tmdb_rate_governor.fcntl is None:
+        print("⚠️ fcntl not available, skipped")
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'rate.state')
+        context = multiprocessing.get_context('fork')
+        start = context.Event()
+        workers = [
+            context.Process(target=_acquire_many, args=(path, start, REQUESTS_PER_PROCESS))
+            for _ in range(2)
+        ]
+        for worker in workers:
+            worker.start()
+
+        started_at = time.monotonic()
+        start.set()
+        for worker in workers:
+            worker.join(timeout=10)
+        elapsed = time.monotonic() - started_at
+
+        assert all(worker.exitcode == 0 for worker in workers)
+        # 30 request: 5 จาก burst อีก 25 ต้องรอเติมที่ 50/s = 0.5 วินาที
+        # ถ้าแต่ละ process มี bucket ของตัวเองจะใช้แค่ (15 - 5) / 50 = 0.2 วินาที
+        shared_minimum = (2 * REQUESTS_PER_PROCESS - BURST) / RATE
+        assert elapsed >= shared_minimum * 0.9, f'{elapsed:.3f}s < {shared_minimum:.3f}s'
+
+
+def test_block_for_pauses_other_instances():
+    """Retry-After ที่ instance หนึ่งได้รับทำให้ instance อื่นบนไฟล์เดียวกันหยุดรอด้วย"""
+    if tmdb_rate_governor.fcntl is None:
+        print("⚠️ fcntl not available, skipped")
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'rate.state')
+        worker_a = TMDBRateGovernor(rate=1000, path=path)
+        worker_b = TMDBRateGovernor(rate=1000, path=path)
+
+        started_at = time.monotonic()
+        worker_b.acquire()
+        assert time.monotonic() - started_at < 0.1
+
+        worker_a.block_for(0.3)
+        started_at = time.monotonic()
+        worker_b.acquire()
+        assert time.monotonic() - started_at >= 0.25
+
+
+def test_disabled_rate_never_waits():
+    """rate = 0 ปิดการจำกัด"""
+    governor = TMDBRateGovernor(rate=0, path=os.path.join(tempfile.gettempdir(), 'unused.state'))
+    started_at = time.monotonic()
+    for _ in range(1000):
+        governor.acquire()
+    assert time.monotonic() - started_at < 0.5
+
+
+def main():
+    """Main test function"""
+    print("⏱️ TMDB Rate Governor Test")
+    print("=" * 50)
+
+    tests = [
+        test_bucket_shared_between_processes,
+        test_block_for_pauses_other_instances,
+        test_disabled_rate_never_waits
+    ]
+
+    passed = 0
+    for test in tests:
+        try:
+            test()
+            passed += 1
+            print(f"✅ {test.__name__}")
+        except AssertionError as e:
+            print(f"❌ {test.__name__}: {e}")
+
+    print(f"\n📊 {passed}/{len(tests)} tests passed")
+    return passed == len(tests)
+
+
+if __name__ == '__main__':
+    success = main()
+    sys.exit(0 if success else 1)
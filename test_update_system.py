@@ -31,15 +31,15 @@ def test_update_system():
         print(f"Never updated: {stats.get('never_updated', 0)}")
         print(f"Update percentage: {stats.get('update_percentage', 0)}%")
         
-        # ทดสอบการดึงรายการหนัง
+        # ทดสอบการดึงรายการหนัง (หน้าแรกของหนังที่จะถูกอัปเดต)
         print("\n📋 Testing Movie List...")
-        movies = update_manager.get_all_movies_from_database()
-        print(f"Found {len(movies)} movies in database")
+        print(f"Found {update_manager.count_movies()} movies in database")
+        movies = update_manager.get_stale_movies_page(page_size=3, force_update=True)
         
         if movies:
             # แสดงหนัง 3 เรื่องแรก
             print("\n🎬 Sample Movies:")
-            for i, movie in enumerate(movies[:3]):
+            for i, movie in enumerate(movies):
                 print(f"  {i+1}. {movie.get('title', 'Unknown')} (TMDB ID: {movie.get('tmdb_id', 'N/A')})")
                 print(f"     Updated: {movie.get('updated_at', 'Never')}")
             
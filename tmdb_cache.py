@@ -0,0 +1,158 @@
+"""
+TMDB Cache for Movie Info App
+เก็บ payload ดิบจาก TMDB ลง SQLite เพื่อใช้ร่วมกันระหว่าง web app และ update script
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+TMDB_CACHE_ENABLED = os.getenv('TMDB_CACHE_ENABLED', '1') == '1'
+TMDB_CACHE_PATH = os.getenv(
+    'TMDB_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'tmdb_cache.sqlite3')
+)
+TMDB_CACHE_TTL = int(os.getenv('TMDB_CACHE_TTL', '3600'))  # วินาที
+TMDB_CACHE_MAX_ENTRIES = int(os.getenv('TMDB_CACHE_MAX_ENTRIES', '5000'))
+
+
+class TMDBCache:
+    """Cache แบบ TTL + LRU บน SQLite (ใช้ได้หลาย process พร้อมกัน)"""
+
+    def __init__(self, path: str = TMDB_CACHE_PATH, ttl: int = TMDB_CACHE_TTL,
+                 max_entries: int = TMDB_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._stats_lock = threading.Lock()
+        self._local = threading.local()
+
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        conn = self._connection()
+        conn.execute(
+            'CREATE TABLE IF NOT EXISTS tmdb_cache ('
+            ' key TEXT PRIMARY KEY,'
+            ' payload TEXT NOT NULL,'
+            ' fetched_at REAL NOT NULL,'
+            ' accessed_at REAL NOT NULL)'
+        )
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_tmdb_cache_accessed_at ON tmdb_cache(accessed_at)')
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """คืนค่า connection ของ thread/process ปัจจุบัน"""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _record(self, hit: bool):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, key: str) -> Optional[Dict]:
+        """ดึง payload จาก cache (None ถ้าไม่มีหรือหมดอายุ)"""
+        try:
+            conn = self._connection()
+            row = conn.execute('SELECT payload, fetched_at FROM tmdb_cache WHERE key = ?', (key,)).fetchone()
+            now = time.time()
+
+            if row is None:
+                self._record(False)
+                return None
+
+            payload, fetched_at = row
+            if now - fetched_at >= self.ttl:
+                conn.execute('DELETE FROM tmdb_cache WHERE key = ?', (key,))
+                conn.commit()
+                self._record(False)
+                return None
+
+            conn.execute('UPDATE tmdb_cache SET accessed_at = ? WHERE key = ?', (now, key))
+            conn.commit()
+            self._record(True)
+            return json.loads(payload)
+
+        except sqlite3.Error as e:
+            print(f"Error reading TMDB cache: {e}")
+            self._record(False)
+            return None
+
+    def set(self, key: str, payload: Dict):
+        """บันทึก payload ลง cache และตัดรายการที่ใช้น้อยที่สุดเมื่อเกินขนาด"""
+        try:
+            conn = self._connection()
+            now = time.time()
+            conn.execute(
+                'INSERT OR REPLACE INTO tmdb_cache (key, payload, fetched_at, accessed_at) VALUES (?, ?, ?, ?)',
+                (key, json.dumps(payload), now, now)
+            )
+
+            overflow = conn.execute('SELECT COUNT(*) FROM tmdb_cache').fetchone()[0] - self.max_entries
+            if overflow > 0:
+                conn.execute(
+                    'DELETE FROM tmdb_cache WHERE key IN '
+                    '(SELECT key FROM tmdb_cache ORDER BY accessed_at ASC LIMIT ?)',
+                    (overflow,)
+                )
+                with self._stats_lock:
+                    self.evictions += overflow
+
+            conn.commit()
+
+        except sqlite3.Error as e:
+            print(f"Error writing TMDB cache: {e}")
+
+    def invalidate(self, key: str):
+        """ลบ payload ออกจาก cache"""
+        try:
+            conn = self._connection()
+            conn.execute('DELETE FROM tmdb_cache WHERE key = ?', (key,))
+            conn.commit()
+        except sqlite3.Error as e:
+            print(f"Error invalidating TMDB cache: {e}")
+
+    def stats(self) -> Dict:
+        """สถิติการใช้งาน cache ของ process นี้"""
+        try:
+            size = self._connection().execute('SELECT COUNT(*) FROM tmdb_cache').fetchone()[0]
+        except sqlite3.Error:
+            size = 0
+
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'size': size,
+            'max_entries': self.max_entries,
+            'ttl': self.ttl,
+            'hit_rate': round(self.hits / total * 100, 2) if total > 0 else 0
+        }
+
+
+def movie_cache_key(movie_id: int, append_to_response: str) -> str:
+    """สร้าง key สำหรับ payload ของหนัง (แยกตามชุด append_to_response)"""
+    return f"movie:{movie_id}:{append_to_response}"
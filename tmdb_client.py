@@ -0,0 +1,316 @@
+"""
+TMDB Client for Movie Info App
+เรียก TMDB API ผ่าน connection pool (keep-alive) ที่ใช้ร่วมกันทุก manager
+"""
+
+import os
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+from tmdb_cache import TMDB_CACHE_ENABLED, TMDBCache, movie_cache_key
+from tmdb_rate_governor import TMDBRateGovernor, get_rate_governor
+
+# Load environment variables
+load_dotenv()
+
+TMDB_BASE_URL = os.getenv('TMDB_BASE_URL', 'https://api.themoviedb.org/3')
+
+# จำนวน connection ใน pool ต่อ process (gunicorn worker ละ 1 pool)
+TMDB_POOL_SIZE = int(os.getenv('TMDB_POOL_SIZE', '10'))
+
+# จำนวนครั้งที่ลองใหม่เมื่อ TMDB ตอบ 429 (Too Many Requests)
+TMDB_MAX_RETRIES = int(os.getenv('TMDB_MAX_RETRIES', '3'))
+
+# ขอ credits, videos และ watch providers มาใน request เดียวกัน
+TMDB_MOVIE_APPEND = 'credits,videos,watch/providers'
+
+# Timeout แยกตาม endpoint: (connect timeout, read timeout) หน่วยวินาที
+TMDB_TIMEOUTS = {
+    'movie': (3.05, 15),
+    'watch_providers': (3.05, 10),
+    'search': (3.05, 5),
+    'changes': (3.05, 15),
+    'default': (3.05, 30)
+}
+
+
+def parse_streaming_providers(data: Dict, region: str = 'TH', limit: int = 5) -> Dict:
+    """
+    แปลงข้อมูล watch/providers จาก TMDB เป็นรูปแบบที่บันทึกลงฐานข้อมูล
+
+    Args:
+        data: ข้อมูลจาก TMDB (มี key 'results' แยกตามประเทศ)
+        region: รหัสประเทศ
+        limit: จำนวน providers สูงสุดต่อประเภท
+
+    Returns:
+        dict ที่มี key streaming / rent / buy (เฉพาะประเภทที่มีข้อมูล)
+    """
+    providers = {}
+    region_providers = (data or {}).get('results', {}).get(region, {})
+
+    # TMDB ใช้ 'flatrate' สำหรับ streaming
+    for source_key, target_key in (('flatrate', 'streaming'), ('rent', 'rent'), ('buy', 'buy')):
+        entries = region_providers.get(source_key, [])
+        if entries:
+            providers[target_key] = [
+                {
+                    'provider_name': provider.get('provider_name', ''),
+                    'logo_path': provider.get('logo_path', ''),
+                    'provider_id': provider.get('provider_id', '')
+                }
+                for provider in entries[:limit]
+            ]
+
+    return providers
+
+
+class _Call:
+    """request ที่กำลังทำงานอยู่ 1 รายการ"""
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    รวม request ที่เหมือนกันซึ่งเกิดพร้อมกันให้เหลือ 1 ครั้ง
+
+    thread แรกที่เรียก key หนึ่งจะเป็นผู้เรียกจริง thread อื่นที่เรียก key เดียวกัน
+    ระหว่างนั้นจะรอและได้ผลลัพธ์ (หรือ exception) เดียวกัน
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict = {}
+        self.executed = 0
+        self.coalesced = 0
+
+    def do(self, key, func):
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self.coalesced += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                self.executed += 1
+                leader = True
+
+        if not leader:
+            call.event.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.event.set()
+
+        return call.result
+
+    def stats(self) -> Dict:
+        """จำนวน request ที่เรียกจริง และจำนวนที่ประหยัดได้จากการรวม"""
+        with self._lock:
+            in_flight = len(self._calls)
+        total = self.executed + self.coalesced
+        return {
+            'executed': self.executed,
+            'coalesced': self.coalesced,
+            'in_flight': in_flight,
+            'saved_percentage': round(self.coalesced / total * 100, 2) if total > 0 else 0
+        }
+
+
+def parse_retry_after(value: Optional[str], default: float = 1.0) -> float:
+    """แปลงค่า Retry-After (จำนวนวินาทีหรือ HTTP date) เป็นวินาที"""
+    if not value:
+        return default
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, retry_at.timestamp() - time.time())
+    except (TypeError, ValueError):
+        return default
+
+
+class TMDBClient:
+    """HTTP client สำหรับ TMDB ที่ใช้ requests.Session ร่วมกัน"""
+
+    def __init__(self, api_key: Optional[str] = None, base_url: str = TMDB_BASE_URL,
+                 pool_size: int = TMDB_POOL_SIZE, timeouts: Optional[Dict] = None,
+                 cache: Optional[TMDBCache] = None, rate_governor: Optional[TMDBRateGovernor] = None):
+        self.api_key = api_key or os.getenv('TMDB_API_KEY')
+        self.base_url = base_url.rstrip('/')
+        self.cache = cache
+        self.rate_governor = rate_governor or get_rate_governor()
+        self.single_flight = SingleFlight()
+        self.timeouts = dict(TMDB_TIMEOUTS)
+        if timeouts:
+            self.timeouts.update(timeouts)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def get(self, path: str, params: Optional[Dict] = None, endpoint: str = 'default') -> Dict:
+        """
+        เรียก TMDB แบบ GET และคืนค่า JSON
+
+        Raises:
+            requests.exceptions.RequestException: เมื่อเรียกไม่สำเร็จ
+        """
+        # request ที่มี path และ params เหมือนกันจะถูกรวมเป็นครั้งเดียว
+        key = (path, tuple(sorted((params or {}).items())))
+        return self.single_flight.do(key, lambda: self._request(path, params, endpoint))
+
+    def _request(self, path: str, params: Optional[Dict], endpoint: str) -> Dict:
+        query = {'api_key': self.api_key}
+        if params:
+            query.update(params)
+
+        timeout = self.timeouts.get(endpoint, self.timeouts['default'])
+
+        for attempt in range(TMDB_MAX_RETRIES + 1):
+            self.rate_governor.acquire()
+            response = self.session.get(f"{self.base_url}{path}", params=query, timeout=timeout)
+
+            if response.status_code != 429 or attempt == TMDB_MAX_RETRIES:
+                break
+
+            # TMDB ขอให้รอ: หยุดทุก process ตาม Retry-After แล้วลองใหม่
+            self.rate_governor.block_for(parse_retry_after(response.headers.get('Retry-After')))
+
+        response.raise_for_status()
+
+        return response.json()
+
+    def get_movie(self, movie_id: int, append_to_response: str = TMDB_MOVIE_APPEND,
+                  use_cache: bool = True) -> Dict:
+        """ดึงข้อมูลหนังจาก TMDB (อ่านจาก cache ก่อนถ้ามี)"""
+        key = movie_cache_key(movie_id, append_to_response)
+        if use_cache and self.cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        movie_data = self.get(
+            f"/movie/{movie_id}",
+            {'append_to_response': append_to_response},
+            endpoint='movie'
+        )
+
+        if self.cache:
+            self.cache.set(key, movie_data)
+
+        return movie_data
+
+    def invalidate_movie(self, movie_id: int, append_to_response: str = TMDB_MOVIE_APPEND):
+        """ลบข้อมูลหนังออกจาก cache (ใช้เมื่อรู้ว่าข้อมูลบน TMDB เปลี่ยนแล้ว)"""
+        if self.cache:
+            self.cache.invalidate(movie_cache_key(movie_id, append_to_response))
+
+    def get_movie_changes(self, start_date: str, end_date: str) -> List[int]:
+        """
+        ดึง TMDB IDs ของหนังที่มีการเปลี่ยนแปลงในช่วงวันที่ (YYYY-MM-DD, ไม่เกิน 14 วัน)
+
+        อ่านครบทุกหน้าของ /movie/changes
+        """
+        movie_ids = []
+        page = 1
+        while True:
+            data = self.get(
+                '/movie/changes',
+                {'start_date': start_date, 'end_date': end_date, 'page': page},
+                endpoint='changes'
+            )
+            movie_ids.extend(item['id'] for item in data.get('results', []) if item.get('id'))
+
+            if page >= data.get('total_pages', 1):
+                break
+            page += 1
+
+        return movie_ids
+
+    def get_streaming_providers(self, movie_id: int, region: str = 'TH') -> Dict:
+        """ดึงข้อมูล streaming providers ของหนังจาก TMDB"""
+        data = self.get(f"/movie/{movie_id}/watch/providers", endpoint='watch_providers')
+        return parse_streaming_providers(data, region)
+
+    def get_streaming_providers_for_movie(self, movie_data: Dict, region: str = 'TH') -> Dict:
+        """
+        อ่าน streaming providers จากข้อมูลหนังที่ได้จาก get_movie
+
+        ถ้า payload ไม่มี block 'watch/providers' (เช่น ข้อมูลจาก cache เก่า)
+        จะเรียก endpoint watch/providers แยกแทน
+        """
+        if 'watch/providers' in movie_data:
+            return parse_streaming_providers(movie_data['watch/providers'], region)
+
+        return self.get_streaming_providers(movie_data.get('id'), region)
+
+    def get_provider_list(self, region: str = 'TH') -> List[Dict]:
+        """ดึงรายชื่อ watch providers ทั้งหมดของหนังในประเทศที่กำหนด (มี provider_id และ logo_path)"""
+        data = self.get('/watch/providers/movie', {'watch_region': region}, endpoint='watch_providers')
+        return data.get('results', [])
+
+    def search_movies(self, query: str, page: int = 1, limit: int = 10) -> List[Dict]:
+        """ค้นหาหนังใน TMDB"""
+        data = self.get('/search/movie', {'query': query, 'page': page}, endpoint='search')
+        return data.get('results', [])[:limit]
+
+
+_client: Optional[TMDBClient] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+
+def _create_cache() -> Optional[TMDBCache]:
+    """สร้าง cache ที่ใช้ร่วมกันทุก process (ปิดได้ด้วย TMDB_CACHE_ENABLED=0)"""
+    if not TMDB_CACHE_ENABLED:
+        return None
+
+    try:
+        return TMDBCache()
+    except Exception as e:
+        print(f"TMDB cache disabled: {e}")
+        return None
+
+
+def get_tmdb_client(api_key: Optional[str] = None) -> TMDBClient:
+    """
+    คืนค่า TMDBClient ที่ใช้ร่วมกันภายใน process
+
+    สร้างใหม่เมื่อ process ถูก fork (เช่น gunicorn worker) เพื่อไม่ให้ใช้ socket ร่วมกับ parent
+    """
+    global _client, _client_pid
+
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = TMDBClient(api_key=api_key, cache=_create_cache())
+                _client_pid = pid
+
+    return _client
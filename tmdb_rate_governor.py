@@ -0,0 +1,140 @@
+"""
+TMDB Rate Governor for Movie Info App
+Token bucket สำหรับจำกัดจำนวน request ไป TMDB ที่ใช้ร่วมกันทุก process บนเครื่องเดียวกัน
+"""
+
+import os
+import struct
+import tempfile
+import threading
+import time
+from typing import Optional
+
+from dotenv import load_dotenv
+
+try:
+    import fcntl
+except ImportError:  # Windows: ใช้ได้เฉพาะภายใน process เดียว
+    fcntl = None
+
+# Load environment variables
+load_dotenv()
+
+# จำนวน request ต่อวินาทีสูงสุดที่ส่งไป TMDB (รวมทุก process บนเครื่อง)
+TMDB_RATE_LIMIT = float(os.getenv('TMDB_RATE_LIMIT', '40'))
+TMDB_RATE_BURST = float(os.getenv('TMDB_RATE_BURST', '0')) or None
+TMDB_RATE_STATE_PATH = os.getenv(
+    'TMDB_RATE_STATE_PATH',
+    os.path.join(tempfile.gettempdir(), 'movie_info_tmdb_rate.state')
+)
+
+# tokens, updated_at, blocked_until
+_STATE_FORMAT = 'ddd'
+_STATE_SIZE = struct.calcsize(_STATE_FORMAT)
+
+
+class TMDBRateGovernor:
+    """
+    Token bucket ที่เก็บสถานะไว้ในไฟล์และล็อกด้วย fcntl.flock
+
+    ทุก process (gunicorn workers, update script, import script) ที่ใช้ไฟล์เดียวกัน
+    จะแบ่ง quota เดียวกัน และหยุดรอพร้อมกันเมื่อ TMDB ตอบ 429 พร้อม Retry-After
+    """
+
+    def __init__(self, rate: float = TMDB_RATE_LIMIT, burst: Optional[float] = TMDB_RATE_BURST,
+                 path: str = TMDB_RATE_STATE_PATH):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.path = path
+        self._lock = threading.Lock()
+        self._fd = None
+        self._fd_pid = None
+        self._memory_state = (self.burst, time.time(), 0.0)
+
+    def _file(self) -> Optional[int]:
+        """เปิดไฟล์สถานะ (เปิดใหม่หลัง fork)"""
+        if fcntl is None:
+            return None
+
+        if self._fd is None or self._fd_pid != os.getpid():
+            self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o666)
+            self._fd_pid = os.getpid()
+        return self._fd
+
+    def _read_state(self, fd: Optional[int]):
+        if fd is None:
+            return self._memory_state
+
+        data = os.pread(fd, _STATE_SIZE, 0)
+        if len(data) < _STATE_SIZE:
+            return (self.burst, time.time(), 0.0)
+        return struct.unpack(_STATE_FORMAT, data)
+
+    def _write_state(self, fd: Optional[int], state):
+        if fd is None:
+            self._memory_state = state
+        else:
+            os.pwrite(fd, struct.pack(_STATE_FORMAT, *state), 0)
+
+    def _update(self, func):
+        """อ่าน-แก้ไข-เขียนสถานะภายใต้ lock (ทั้งระหว่าง thread และระหว่าง process)"""
+        with self._lock:
+            fd = self._file()
+            if fd is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                state, result = func(self._read_state(fd), time.time())
+                self._write_state(fd, state)
+                return result
+            finally:
+                if fd is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+
+    def _try_acquire(self, state, now):
+        tokens, updated_at, blocked_until = state
+
+        # เติม token ตามเวลาที่ผ่านไป
+        tokens = min(self.burst, tokens + max(0.0, now - updated_at) * self.rate)
+
+        if blocked_until > now:
+            return (tokens, now, blocked_until), blocked_until - now
+
+        if tokens >= 1:
+            return (tokens - 1, now, blocked_until), 0.0
+
+        return (tokens, now, blocked_until), (1 - tokens) / self.rate
+
+    def acquire(self):
+        """รอจนกว่าจะได้ token 1 อัน"""
+        if self.rate <= 0:
+            return
+
+        while True:
+            wait = self._update(self._try_acquire)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def block_for(self, seconds: float):
+        """หยุดทุก process เป็นเวลา seconds วินาที (ใช้กับ Retry-After)"""
+        def apply(state, now):
+            tokens, updated_at, blocked_until = state
+            return (0.0, now, max(blocked_until, now + seconds)), None
+
+        self._update(apply)
+
+
+_governor: Optional[TMDBRateGovernor] = None
+_governor_lock = threading.Lock()
+
+
+def get_rate_governor() -> TMDBRateGovernor:
+    """คืนค่า governor ที่ใช้ร่วมกันภายใน process"""
+    global _governor
+
+    if _governor is None:
+        with _governor_lock:
+            if _governor is None:
+                _governor = TMDBRateGovernor()
+
+    return _governor
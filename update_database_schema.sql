@@ -34,9 +34,27 @@ BEGIN
     END IF;
 END $$;
 
+-- Add precomputed display columns (filled at write time by movie_store.build_movie_record)
+ALTER TABLE movies ADD COLUMN IF NOT EXISTS display_year TEXT;
+ALTER TABLE movies ADD COLUMN IF NOT EXISTS display_genres TEXT;
+ALTER TABLE movies ADD COLUMN IF NOT EXISTS display_cast TEXT;
+
+-- Backfill display_year/display_genres for existing rows without touching updated_at
+-- (display_cast is filled on the next TMDB refresh; the app formats it on read until then)
+ALTER TABLE movies DISABLE TRIGGER USER;
+UPDATE movies SET
+    display_year = CASE WHEN year IS NULL OR year IN ('', 'None') THEN 'ไม่ระบุปี' ELSE year END,
+    display_genres = CASE WHEN genres IS NULL OR cardinality(genres) = 0 THEN 'ไม่ระบุประเภท'
+                          ELSE array_to_string(genres, ', ') END
+WHERE display_year IS NULL;
+ALTER TABLE movies ENABLE TRIGGER USER;
+
 -- Create index for updated_at if it doesn't exist
 CREATE INDEX IF NOT EXISTS idx_movies_updated_at ON movies(updated_at);
 
+-- Index for keyset pagination of the movie list (ORDER BY created_at DESC, id DESC)
+CREATE INDEX IF NOT EXISTS idx_movies_created_at_id ON movies(created_at DESC, id DESC);
+
 -- Create or replace function to update updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()
 RETURNS TRIGGER AS $$
@@ -72,6 +90,67 @@ FROM movies;
 GRANT SELECT ON movie_update_stats TO anon;
 GRANT SELECT ON movie_update_stats TO authenticated;
 
+-- Create table for sync watermarks (incremental refresh from TMDB /movie/changes)
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    updated_at TIMESTAMP WITH TIME ZONE DEFAULT NOW()
+);
+
+ALTER TABLE sync_state ENABLE ROW LEVEL SECURITY;
+
+DROP POLICY IF EXISTS "Allow all operations" ON sync_state;
+CREATE POLICY "Allow all operations" ON sync_state
+    FOR ALL USING (true);
+
+GRANT ALL ON sync_state TO anon;
+GRANT ALL ON sync_state TO authenticated;
+
+-- Full-text style search: pg_trgm GIN index on search_text
+-- (lower-cased title, original_title, director and cast names, filled by movie_store.build_movie_record)
+-- A fresh setup_supabase_updated.sql already creates the column, index and function;
+-- this block upgrades tables created before search_text existed
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE movies ADD COLUMN IF NOT EXISTS search_text TEXT;
+
+-- Backfill search_text for existing rows without touching updated_at
+ALTER TABLE movies DISABLE TRIGGER USER;
+UPDATE movies SET search_text = lower(concat_ws(' ',
+    title,
+    original_title,
+    director,
+    (SELECT string_agg(person->>'name', ' ')
+     FROM jsonb_array_elements(CASE WHEN jsonb_typeof(cast_data) = 'array' THEN cast_data ELSE '[]'::jsonb END) AS person)
+))
+WHERE search_text IS NULL;
+ALTER TABLE movies ENABLE TRIGGER USER;
+
+CREATE INDEX IF NOT EXISTS idx_movies_search_text_trgm ON movies USING GIN (search_text gin_trgm_ops);
+
+-- Ranked search used by the app (falls back to ilike on title when this function is missing)
+CREATE OR REPLACE FUNCTION search_movies_ranked(search_query TEXT, max_results INTEGER DEFAULT 10)
+RETURNS SETOF movies
+LANGUAGE sql STABLE
+AS $$
+    WITH q AS (
+        SELECT lower(trim(search_query)) AS term,
+               '%' || replace(replace(replace(lower(trim(search_query)), '\', '\\'), '%', '\%'), '_', '\_') || '%' AS pattern
+    )
+    SELECT m.*
+    FROM movies m, q
+    WHERE m.search_text ILIKE q.pattern
+       OR q.term <% m.search_text
+    ORDER BY lower(m.title) = q.term DESC,
+             word_similarity(q.term, lower(m.title)) DESC,
+             word_similarity(q.term, m.search_text) DESC,
+             m.id DESC
+    LIMIT max_results;
+$$;
+
+GRANT EXECUTE ON FUNCTION search_movies_ranked(TEXT, INTEGER) TO anon;
+GRANT EXECUTE ON FUNCTION search_movies_ranked(TEXT, INTEGER) TO authenticated;
+
 -- Show current schema status
 SELECT 
     'Schema updated successfully!' as status,
@@ -6,13 +6,17 @@ Update Existing Movies
 
 import os
 import sys
-import time
 from dotenv import load_dotenv
 from supabase import create_client, Client
+from tmdb_client import get_tmdb_client
+from movie_store import upsert_movies
 
 # Load environment variables
 load_dotenv()
 
+# จำนวนหนังต่อการ upsert 1 ครั้ง
+UPSERT_CHUNK_SIZE = 100
+
 def update_existing_movies():
     """อัปเดตข้อมูล poster และ streaming providers ให้หนังที่มีอยู่แล้ว"""
     print("🔄 Updating Existing Movies with Poster and Streaming Data")
@@ -30,8 +34,8 @@ def update_existing_movies():
         
         supabase: Client = create_client(supabase_url, supabase_key)
         
-        # ดึงหนังทั้งหมดที่ยังไม่มี poster_path หรือ streaming_providers
-        movies = supabase.table('movies').select('id, tmdb_id, title').execute()
+        # ดึงหนังทั้งหมดพร้อม poster_path และ streaming_providers ใน query เดียว
+        movies = supabase.table('movies').select('id, tmdb_id, title, poster_path, streaming_providers').execute()
         
         if not movies.data:
             print("ℹ️ No movies found in database")
@@ -39,15 +43,11 @@ def update_existing_movies():
         
         print(f"📊 Found {len(movies.data)} movies in database")
         
-        # นับหนังที่ต้องอัปเดต
-        movies_to_update = []
-        for movie in movies.data:
-            # ตรวจสอบว่าหนังนี้มี poster_path หรือไม่
-            movie_detail = supabase.table('movies').select('poster_path, streaming_providers').eq('id', movie['id']).execute()
-            if movie_detail.data:
-                current_data = movie_detail.data[0]
-                if not current_data.get('poster_path') or not current_data.get('streaming_providers'):
-                    movies_to_update.append(movie)
+        # นับหนังที่ต้องอัปเดต (ยังไม่มี poster_path หรือ streaming_providers)
+        movies_to_update = [
+            movie for movie in movies.data
+            if not movie.get('poster_path') or not movie.get('streaming_providers')
+        ]
         
         print(f"🎯 Found {len(movies_to_update)} movies that need updating")
         
@@ -55,14 +55,28 @@ def update_existing_movies():
             print("✅ All movies already have poster and streaming data")
             return True
         
-        # อัปเดตหนังทีละเรื่อง
+        # ดึงข้อมูลทีละเรื่อง แล้วบันทึกลงฐานข้อมูลด้วย upsert ทีละ chunk
         updated_count = 0
         failed_count = 0
+        pending_records = []
+        
+        def flush_pending():
+            nonlocal updated_count, failed_count
+            if not pending_records:
+                return
+            try:
+                saved = upsert_movies(supabase, pending_records)
+                updated_count += len(saved)
+                failed_count += len(pending_records) - len(saved)
+                print(f"   💾 Saved {len(saved)} movies")
+            except Exception as e:
+                print(f"   ❌ Error saving movies: {str(e)}")
+                failed_count += len(pending_records)
+            pending_records.clear()
         
         for movie in movies_to_update:
             tmdb_id = movie['tmdb_id']
             title = movie['title']
-            db_id = movie['id']
             
             print(f"\n🔄 Updating: {title} (TMDB ID: {tmdb_id})")
             
@@ -76,9 +90,9 @@ def update_existing_movies():
                 
                 # ดึงข้อมูล poster และ streaming providers
                 poster_path = movie_data.get('poster_path', '')
-                streaming_providers = get_streaming_providers(tmdb_id, tmdb_api_key)
+                streaming_providers = get_streaming_providers(movie_data, tmdb_api_key)
                 
-                # อัปเดตฐานข้อมูล
+                # เตรียมข้อมูลสำหรับอัปเดต (tmdb_id และ title ใช้เป็น key ของ upsert)
                 update_data = {}
                 if poster_path:
                     update_data['poster_path'] = poster_path
@@ -86,21 +100,21 @@ def update_existing_movies():
                     update_data['streaming_providers'] = streaming_providers
                 
                 if update_data:
-                    supabase.table('movies').update(update_data).eq('id', db_id).execute()
-                    updated_count += 1
-                    print(f"   ✅ Updated successfully")
+                    pending_records.append(dict(update_data, tmdb_id=tmdb_id, title=title))
                     print(f"      Poster: {poster_path if poster_path else 'None'}")
                     print(f"      Streaming providers: {len(streaming_providers) if streaming_providers else 0} providers")
                 else:
                     print(f"   ⚠️ No new data to update")
                 
-                # รอสักครู่เพื่อไม่ให้เกิน rate limit
-                time.sleep(0.5)
+                if len(pending_records) >= UPSERT_CHUNK_SIZE:
+                    flush_pending()
                 
             except Exception as e:
                 print(f"   ❌ Error updating movie: {str(e)}")
                 failed_count += 1
         
+        flush_pending()
+        
         # สรุปผลลัพธ์
         print(f"\n📊 Update Summary:")
         print(f"Total movies: {len(movies.data)}")
@@ -119,77 +133,16 @@ def get_movie_from_tmdb(movie_id, api_key):
     import requests
     
     try:
-        url = f"https://api.themoviedb.org/3/movie/{movie_id}"
-        params = {
-            'api_key': api_key,
-            'append_to_response': 'credits,videos'
-        }
-        
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        
-        return response.json()
+        return get_tmdb_client(api_key).get_movie(movie_id)
         
     except requests.exceptions.RequestException as e:
         print(f"Error fetching movie data: {e}")
         return {}
 
-def get_streaming_providers(movie_id, api_key):
-    """ดึงข้อมูล streaming providers จาก TMDB"""
-    import requests
-    
+def get_streaming_providers(movie_data, api_key):
+    """ดึงข้อมูล streaming providers จากข้อมูลหนังที่ดึงมาแล้ว (append_to_response)"""
     try:
-        url = f"https://api.themoviedb.org/3/movie/{movie_id}/watch/providers"
-        params = {
-            'api_key': api_key
-        }
-        
-        response = requests.get(url, params=params, timeout=30)
-        response.raise_for_status()
-        
-        data = response.json()
-        providers = {}
-        
-        # ดึง providers จากประเทศไทย (TH)
-        th_providers = data.get('results', {}).get('TH', {})
-        
-        # ดึง streaming providers
-        streaming = th_providers.get('flatrate', [])
-        if streaming:
-            providers['streaming'] = [
-                {
-                    'provider_name': provider.get('provider_name', ''),
-                    'logo_path': provider.get('logo_path', ''),
-                    'provider_id': provider.get('provider_id', '')
-                }
-                for provider in streaming[:5]
-            ]
-        
-        # ดึง rent providers
-        rent = th_providers.get('rent', [])
-        if rent:
-            providers['rent'] = [
-                {
-                    'provider_name': provider.get('provider_name', ''),
-                    'logo_path': provider.get('logo_path', ''),
-                    'provider_id': provider.get('provider_id', '')
-                }
-                for provider in rent[:5]
-            ]
-        
-        # ดึง buy providers
-        buy = th_providers.get('buy', [])
-        if buy:
-            providers['buy'] = [
-                {
-                    'provider_name': provider.get('provider_name', ''),
-                    'logo_path': provider.get('logo_path', ''),
-                    'provider_id': provider.get('provider_id', '')
-                }
-                for provider in buy[:5]
-            ]
-        
-        return providers
+        return get_tmdb_client(api_key).get_streaming_providers_for_movie(movie_data)
         
     except Exception as e:
         print(f"Error fetching streaming providers: {e}")
@@ -6,15 +6,29 @@ Update Manager for Movie Info App
 import os
 import requests
 import time
-from typing import Dict, List, Optional
-from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Set
+from datetime import date, datetime, timedelta, timezone
 from supabase import create_client, Client
 from dotenv import load_dotenv
+from tmdb_client import get_tmdb_client
+from movie_store import upsert_movie, upsert_movies
 from utils import download_and_save_poster, format_streaming_providers
 
 # Load environment variables
 load_dotenv()
 
+# TMDB /movie/changes รองรับช่วงวันที่ไม่เกิน 14 วันต่อครั้ง
+TMDB_CHANGES_MAX_DAYS = 14
+
+# จำนวนหนังต่อหน้าเมื่อเลือกหนังที่ต้องอัปเดต
+STALE_PAGE_SIZE = 500
+
+# จำนวนหนังที่อัปเดตไม่สำเร็จสูงสุดที่คืนในผลลัพธ์ (นับทั้งหมดใน summary)
+UPDATE_MAX_FAILURES = 100
+
+# key ของ watermark ในตาราง sync_state
+CHANGES_WATERMARK_KEY = 'tmdb_movie_changes'
+
 class MovieUpdateManager:
     def __init__(self):
         self.supabase_url = os.getenv('SUPABASE_URL')
@@ -25,21 +39,12 @@ class MovieUpdateManager:
             raise ValueError("Missing required environment variables")
         
         self.supabase: Client = create_client(self.supabase_url, self.supabase_key)
-        self.tmdb_base_url = "https://api.themoviedb.org/3"
+        self.tmdb = get_tmdb_client(self.tmdb_api_key)
     
     def get_movie_from_tmdb(self, movie_id: int) -> Dict:
         """ดึงข้อมูลหนังจาก TMDB API"""
         try:
-            url = f"{self.tmdb_base_url}/movie/{movie_id}"
-            params = {
-                'api_key': self.tmdb_api_key,
-                'append_to_response': 'credits,videos'
-            }
-            
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            
-            return response.json()
+            return self.tmdb.get_movie(movie_id)
             
         except requests.exceptions.RequestException as e:
             print(f"Error fetching movie data: {e}")
@@ -48,57 +53,16 @@ class MovieUpdateManager:
     def get_streaming_providers(self, movie_id: int) -> Dict:
         """ดึงข้อมูล streaming providers จาก TMDB"""
         try:
-            url = f"{self.tmdb_base_url}/movie/{movie_id}/watch/providers"
-            params = {
-                'api_key': self.tmdb_api_key
-            }
+            return self.tmdb.get_streaming_providers(movie_id)
             
-            response = requests.get(url, params=params, timeout=30)
-            response.raise_for_status()
-            
-            data = response.json()
-            providers = {}
-            
-            # ดึง providers จากประเทศไทย (TH)
-            th_providers = data.get('results', {}).get('TH', {})
-            
-            # ดึง streaming providers
-            streaming = th_providers.get('flatrate', [])
-            if streaming:
-                providers['streaming'] = [
-                    {
-                        'provider_name': provider.get('provider_name', ''),
-                        'logo_path': provider.get('logo_path', ''),
-                        'provider_id': provider.get('provider_id', '')
-                    }
-                    for provider in streaming[:5]
-                ]
-            
-            # ดึง rent providers
-            rent = th_providers.get('rent', [])
-            if rent:
-                providers['rent'] = [
-                    {
-                        'provider_name': provider.get('provider_name', ''),
-                        'logo_path': provider.get('logo_path', ''),
-                        'provider_id': provider.get('provider_id', '')
-                    }
-                    for provider in rent[:5]
-                ]
-            
-            # ดึง buy providers
-            buy = th_providers.get('buy', [])
-            if buy:
-                providers['buy'] = [
-                    {
-                        'provider_name': provider.get('provider_name', ''),
-                        'logo_path': provider.get('logo_path', ''),
-                        'provider_id': provider.get('provider_id', '')
-                    }
-                    for provider in buy[:5]
-                ]
-            
-            return providers
+        except Exception as e:
+            print(f"Error fetching streaming providers: {e}")
+            return {}
+    
+    def get_streaming_providers_for_movie(self, movie_data: Dict) -> Dict:
+        """ดึง streaming providers จากข้อมูลหนังที่ดึงมาแล้ว (append_to_response)"""
+        try:
+            return self.tmdb.get_streaming_providers_for_movie(movie_data)
             
         except Exception as e:
             print(f"Error fetching streaming providers: {e}")
@@ -142,8 +106,8 @@ class MovieUpdateManager:
         # ดึง poster path
         poster_path = movie_data.get('poster_path', '')
         
-        # ดึง streaming providers
-        streaming_providers = self.get_streaming_providers(movie_data.get('id'))
+        # ดึง streaming providers (มาพร้อมข้อมูลหนังผ่าน append_to_response)
+        streaming_providers = self.get_streaming_providers_for_movie(movie_data)
         
         return {
             'tmdb_id': movie_data.get('id'),
@@ -158,56 +122,60 @@ class MovieUpdateManager:
             'streaming_providers': streaming_providers
         }
     
-    def get_all_movies_from_database(self) -> List[Dict]:
-        """ดึงรายการหนังทั้งหมดจากฐานข้อมูล"""
-        try:
-            movies = self.supabase.table('movies').select('id, tmdb_id, title, updated_at').execute()
-            return movies.data
-        except Exception as e:
-            print(f"Error getting movies from database: {e}")
-            return []
+    def get_stale_movies_page(self, days_threshold: int = 7, after_id: int = 0,
+                              page_size: int = STALE_PAGE_SIZE, force_update: bool = False) -> List[Dict]:
+        """
+        ดึงหนังที่ต้องอัปเดต 1 หน้า โดยให้ฐานข้อมูลกรอง updated_at เอง
+        
+        ใช้ keyset pagination ตาม id (after_id = id สุดท้ายของหน้าก่อน)
+        """
+        query = self.supabase.table('movies').select('id, tmdb_id, title, updated_at')
+        
+        if not force_update:
+            cutoff = (datetime.now(timezone.utc) - timedelta(days=days_threshold)).strftime('%Y-%m-%dT%H:%M:%SZ')
+            query = query.or_(f'updated_at.is.null,updated_at.lt.{cutoff}')
+        
+        result = query.gt('id', after_id).order('id').limit(page_size).execute()
+        return result.data
+    
+    def iter_stale_movies(self, days_threshold: int = 7, force_update: bool = False,
+                          page_size: int = STALE_PAGE_SIZE):
+        """วนหนังที่ต้องอัปเดตทีละหน้า (ใช้หน่วยความจำคงที่ไม่ว่าตารางจะใหญ่แค่ไหน)"""
+        after_id = 0
+        while True:
+            page = self.get_stale_movies_page(days_threshold, after_id, page_size, force_update)
+            if not page:
+                return
+            
+            yield page
+            
+            if len(page) < page_size:
+                return
+            after_id = page[-1]['id']
+    
+    def count_movies(self) -> int:
+        """นับจำนวนหนังทั้งหมดในฐานข้อมูล (นับฝั่ง database)"""
+        result = self.supabase.table('movies').select('id', count='exact').limit(1).execute()
+        return result.count or 0
     
     def update_movie_data(self, db_movie_id: int, movie_data: Dict) -> bool:
-        """อัปเดตข้อมูลหนังในฐานข้อมูล"""
+        """อัปเดตข้อมูลหนังในฐานข้อมูล (upsert ตาม tmdb_id)"""
         try:
-            movie_record = {
-                'title': movie_data['title'],
-                'original_title': movie_data['original_title'],
-                'year': movie_data['year'],
-                'genres': movie_data['genres'],
-                'trailer_id': movie_data['trailer_id'],
-                'director': movie_data['director'],
-                'cast_data': movie_data['cast_data'],
-                'poster_path': movie_data.get('poster_path', ''),
-                'streaming_providers': movie_data.get('streaming_providers', {}),
-                'updated_at': datetime.now().isoformat()
-            }
-            
-            self.supabase.table('movies').update(movie_record).eq('id', db_movie_id).execute()
-            return True
+            movie_record = dict(movie_data, updated_at=datetime.now().isoformat())
+            return upsert_movie(self.supabase, movie_record) is not None
             
         except Exception as e:
             print(f"Error updating movie data: {e}")
             return False
     
-    def check_movie_needs_update(self, movie: Dict, days_threshold: int = 7) -> bool:
-        """ตรวจสอบว่าหนังต้องการการอัปเดตหรือไม่"""
+    def save_movies_to_database(self, movies: List[Dict]) -> Dict[int, int]:
+        """บันทึกข้อมูลหนังหลายเรื่องลงฐานข้อมูลในคำสั่งเดียว"""
         try:
-            updated_at = movie.get('updated_at')
-            if not updated_at:
-                return True
-            
-            # แปลง string เป็น datetime
-            if isinstance(updated_at, str):
-                updated_at = datetime.fromisoformat(updated_at.replace('Z', '+00:00'))
-            
-            # ตรวจสอบว่าผ่านไปกี่วันแล้ว
-            days_since_update = (datetime.now() - updated_at).days
-            return days_since_update >= days_threshold
+            return upsert_movies(self.supabase, movies)
             
         except Exception as e:
-            print(f"Error checking update status: {e}")
-            return True
+            print(f"Error saving movies to database: {e}")
+            return {}
     
     def update_single_movie(self, db_movie_id: int, tmdb_id: int) -> Dict:
         """อัปเดตหนัง 1 เรื่อง"""
@@ -240,104 +208,106 @@ class MovieUpdateManager:
         except Exception as e:
             return {'success': False, 'message': f'Error updating movie: {str(e)}'}
     
-    def update_all_movies(self, force_update: bool = False, days_threshold: int = 7) -> Dict:
-        """อัปเดตหนังทั้งหมดที่ต้องการการอัปเดต"""
+    def update_all_movies(self, force_update: bool = False, days_threshold: int = 7,
+                          on_progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        อัปเดตหนังทั้งหมดที่ต้องการการอัปเดต
+        
+        Args:
+            on_progress: เรียกหลังแต่ละหน้าด้วย {'done', 'updated', 'failed'} (ความคืบหน้าของงานเบื้องหลัง)
+        """
         try:
-            # ดึงรายการหนังทั้งหมด
-            movies = self.get_all_movies_from_database()
-            if not movies:
+            total_movies = self.count_movies()
+            if not total_movies:
                 return {'success': False, 'message': 'No movies found in database'}
             
             updated_count = 0
             failed_count = 0
-            skipped_count = 0
-            results = []
-            
-            print(f"Found {len(movies)} movies in database")
-            
-            for movie in movies:
-                db_movie_id = movie['id']
-                tmdb_id = movie['tmdb_id']
-                title = movie['title']
+            # เก็บเฉพาะรายการที่ไม่สำเร็จ (จำกัดจำนวน) หน่วยความจำจึงไม่โตตามจำนวนหนัง
+            failures = []
+            
+            print(f"Found {total_movies} movies in database")
+            if on_progress:
+                on_progress({'total': total_movies})
+            
+            # ดึงเฉพาะหนังที่ต้องอัปเดตทีละหน้า
+            for page in self.iter_stale_movies(days_threshold, force_update):
+                for movie in page:
+                    db_movie_id = movie['id']
+                    tmdb_id = movie['tmdb_id']
+                    title = movie['title']
+                    
+                    # อัปเดตหนัง
+                    result = self.update_single_movie(db_movie_id, tmdb_id)
+                    
+                    if result['success']:
+                        updated_count += 1
+                        print(f"✅ Updated: {title}")
+                    else:
+                        failed_count += 1
+                        print(f"❌ Failed: {title} - {result['message']}")
+                        if len(failures) < UPDATE_MAX_FAILURES:
+                            failures.append({'tmdb_id': tmdb_id, 'title': title, 'message': result['message']})
                 
-                # ตรวจสอบว่าต้องการอัปเดตหรือไม่
-                if not force_update and not self.check_movie_needs_update(movie, days_threshold):
-                    print(f"Skipping {title} (recently updated)")
-                    skipped_count += 1
-                    continue
-                
-                # อัปเดตหนัง
-                result = self.update_single_movie(db_movie_id, tmdb_id)
-                results.append({
-                    'tmdb_id': tmdb_id,
-                    'title': title,
-                    'result': result
-                })
-                
-                if result['success']:
-                    updated_count += 1
-                    print(f"✅ Updated: {title}")
-                else:
-                    failed_count += 1
-                    print(f"❌ Failed: {title} - {result['message']}")
-                
-                # รอสักครู่เพื่อไม่ให้เกิน rate limit
-                time.sleep(0.5)
+                if on_progress:
+                    on_progress({'done': updated_count + failed_count, 'updated': updated_count, 'failed': failed_count})
+            
+            skipped_count = max(0, total_movies - updated_count - failed_count)
             
             return {
                 'success': True,
                 'message': f'Update completed: {updated_count} updated, {failed_count} failed, {skipped_count} skipped',
                 'summary': {
-                    'total': len(movies),
+                    'total': total_movies,
                     'updated': updated_count,
                     'failed': failed_count,
                     'skipped': skipped_count
                 },
-                'results': results
+                'failures': failures
             }
             
         except Exception as e:
             return {'success': False, 'message': f'Error updating movies: {str(e)}'}
     
-    def update_movies_by_ids(self, tmdb_ids: List[int]) -> Dict:
-        """อัปเดตหนังตาม TMDB IDs ที่ระบุ"""
+    def update_movies_by_ids(self, tmdb_ids: List[int], on_progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        อัปเดตหนังตาม TMDB IDs ที่ระบุ (ดึงข้อมูลพร้อมกันผ่าน BatchImporter)
+        
+        Args:
+            on_progress: ส่งต่อให้ BatchImporter.import_ids (ความคืบหน้าของงานเบื้องหลัง)
+        """
+        from batch_importer import BatchImporter
+        
         try:
-            updated_count = 0
-            failed_count = 0
-            results = []
+            tmdb_ids = list(dict.fromkeys(int(tmdb_id) for tmdb_id in tmdb_ids))
             
-            for tmdb_id in tmdb_ids:
-                # หา movie ในฐานข้อมูล
-                movie = self.supabase.table('movies').select('id, title').eq('tmdb_id', tmdb_id).execute()
-                
-                if not movie.data:
-                    failed_count += 1
-                    results.append({
-                        'tmdb_id': tmdb_id,
-                        'result': {'success': False, 'message': 'Movie not found in database'}
-                    })
-                    continue
-                
-                db_movie_id = movie.data[0]['id']
-                title = movie.data[0]['title']
-                
-                # อัปเดตหนัง
-                result = self.update_single_movie(db_movie_id, tmdb_id)
-                results.append({
+            # หา movie ในฐานข้อมูล (ทีละ 500 IDs เพื่อไม่ให้ URL ยาวเกินไป)
+            existing_ids = set()
+            for offset in range(0, len(tmdb_ids), 500):
+                movies = self.supabase.table('movies').select('tmdb_id').in_('tmdb_id', tmdb_ids[offset:offset + 500]).execute()
+                existing_ids.update(movie['tmdb_id'] for movie in movies.data)
+            
+            results = [
+                {
                     'tmdb_id': tmdb_id,
-                    'title': title,
-                    'result': result
-                })
-                
-                if result['success']:
-                    updated_count += 1
-                    print(f"✅ Updated: {title}")
+                    'result': {'success': False, 'message': 'Movie not found in database'}
+                }
+                for tmdb_id in tmdb_ids if tmdb_id not in existing_ids
+            ]
+            
+            batch_result = BatchImporter(self).import_ids(
+                [tmdb_id for tmdb_id in tmdb_ids if tmdb_id in existing_ids], on_progress=on_progress
+            )
+            results.extend(batch_result['results'])
+            
+            updated_count = batch_result['summary']['imported']
+            failed_count = len(tmdb_ids) - updated_count
+            
+            for item in batch_result['results']:
+                if item['result']['success']:
+                    print(f"✅ Updated: {item['title']}")
                 else:
-                    failed_count += 1
-                    print(f"❌ Failed: {title} - {result['message']}")
-                
-                # รอสักครู่
-                time.sleep(0.5)
+                    print(f"❌ Failed: {item['tmdb_id']} - {item['result']['message']}")
             
             return {
                 'success': True,
@@ -345,7 +315,8 @@ class MovieUpdateManager:
                 'summary': {
                     'total': len(tmdb_ids),
                     'updated': updated_count,
-                    'failed': failed_count
+                    'failed': failed_count,
+                    'items_per_sec': batch_result['summary']['items_per_sec']
                 },
                 'results': results
             }
@@ -353,32 +324,151 @@ class MovieUpdateManager:
         except Exception as e:
             return {'success': False, 'message': f'Error updating movies: {str(e)}'}
     
-    def get_update_statistics(self) -> Dict:
-        """ดึงสถิติการอัปเดต"""
+    def get_sync_watermark(self, key: str = CHANGES_WATERMARK_KEY) -> Optional[str]:
+        """ดึง watermark ของการ sync ล่าสุดจากตาราง sync_state"""
         try:
-            movies = self.get_all_movies_from_database()
-            
-            total_movies = len(movies)
-            needs_update = 0
-            recently_updated = 0
-            never_updated = 0
-            
-            for movie in movies:
-                if not movie.get('updated_at'):
-                    never_updated += 1
-                elif self.check_movie_needs_update(movie):
-                    needs_update += 1
-                else:
-                    recently_updated += 1
+            result = self.supabase.table('sync_state').select('value').eq('key', key).execute()
+            return result.data[0]['value'] if result.data else None
+        except Exception as e:
+            print(f"Error getting sync watermark: {e}")
+            return None
+    
+    def set_sync_watermark(self, value: str, key: str = CHANGES_WATERMARK_KEY) -> bool:
+        """บันทึก watermark ของการ sync ลงตาราง sync_state"""
+        try:
+            self.supabase.table('sync_state').upsert({
+                'key': key,
+                'value': value,
+                'updated_at': datetime.now(timezone.utc).isoformat()
+            }, on_conflict='key').execute()
+            return True
+        except Exception as e:
+            print(f"Error saving sync watermark: {e}")
+            return False
+    
+    def get_changed_tmdb_ids(self, start_date: date, end_date: date) -> Set[int]:
+        """ดึง TMDB IDs ที่เปลี่ยนแปลงระหว่าง start_date ถึง end_date (แบ่งช่วงละ 14 วัน)"""
+        changed_ids = set()
+        window_start = start_date
+        while window_start <= end_date:
+            window_end = min(end_date, window_start + timedelta(days=TMDB_CHANGES_MAX_DAYS - 1))
+            changed_ids.update(self.tmdb.get_movie_changes(window_start.isoformat(), window_end.isoformat()))
+            window_start = window_end + timedelta(days=1)
+        return changed_ids
+    
+    def get_catalog_movies_by_tmdb_ids(self, tmdb_ids: List[int]) -> List[Dict]:
+        """หาหนังในฐานข้อมูลที่ตรงกับ TMDB IDs (query ทีละ 500 IDs)"""
+        movies = []
+        for offset in range(0, len(tmdb_ids), 500):
+            result = self.supabase.table('movies').select('id, tmdb_id, title').in_('tmdb_id', tmdb_ids[offset:offset + 500]).execute()
+            movies.extend(result.data)
+        return movies
+    
+    def update_changed_movies(self, since: Optional[str] = None, default_days: int = 1,
+                              on_progress: Optional[Callable[[Dict], None]] = None) -> Dict:
+        """
+        อัปเดตเฉพาะหนังที่ TMDB แจ้งว่ามีการเปลี่ยนแปลงตั้งแต่ sync ครั้งล่าสุด
+        
+        Args:
+            since: วันที่เริ่มต้น (YYYY-MM-DD) ถ้าไม่ระบุจะใช้ watermark ที่บันทึกไว้
+            default_days: จำนวนวันย้อนหลังเมื่อยังไม่เคย sync
+            on_progress: ส่งต่อให้ update_movies_by_ids (ความคืบหน้าของงานเบื้องหลัง)
+        """
+        try:
+            sync_started = datetime.now(timezone.utc).date()
+            stored_watermark = self.get_sync_watermark()
+            watermark = since or stored_watermark
+            if watermark:
+                start_date = date.fromisoformat(watermark[:10])
+            else:
+                start_date = sync_started - timedelta(days=default_days)
+            
+            # ดึงรายการหนังที่เปลี่ยนแปลงจาก TMDB
+            changed_ids = self.get_changed_tmdb_ids(start_date, sync_started)
+            print(f"TMDB reports {len(changed_ids)} changed movies since {start_date.isoformat()}")
+            
+            # เลือกเฉพาะหนังที่อยู่ในฐานข้อมูลของเรา
+            movies = self.get_catalog_movies_by_tmdb_ids(sorted(changed_ids))
+            tmdb_ids = [movie['tmdb_id'] for movie in movies]
+            print(f"Found {len(tmdb_ids)} changed movies in database")
+            if on_progress:
+                on_progress({'total': len(tmdb_ids)})
+            
+            # ข้อมูลใน cache เก่ากว่าการเปลี่ยนแปลง
+            for tmdb_id in tmdb_ids:
+                self.tmdb.invalidate_movie(tmdb_id)
+            
+            result = self.update_movies_by_ids(tmdb_ids, on_progress=on_progress) if tmdb_ids else {
+                'success': True,
+                'summary': {'total': 0, 'updated': 0, 'failed': 0},
+                'results': []
+            }
+            if not result['success']:
+                return result
+            
+            summary = result['summary']
+            
+            # เลื่อน watermark เมื่ออัปเดตครบทุกเรื่องเท่านั้น (เรื่องที่ล้มเหลวจะถูกลองใหม่รอบหน้า)
+            watermark_saved = False
+            if summary['failed'] == 0:
+                watermark_saved = self.set_sync_watermark(sync_started.isoformat())
             
             return {
-                'total_movies': total_movies,
-                'needs_update': needs_update,
-                'recently_updated': recently_updated,
-                'never_updated': never_updated,
-                'update_percentage': round((recently_updated / total_movies * 100), 2) if total_movies > 0 else 0
+                'success': True,
+                'message': f'Incremental update completed: {summary["updated"]} updated, {summary["failed"]} failed',
+                'summary': {
+                    'since': start_date.isoformat(),
+                    'changed_on_tmdb': len(changed_ids),
+                    'in_catalog': len(tmdb_ids),
+                    'updated': summary['updated'],
+                    'failed': summary['failed'],
+                    'watermark': sync_started.isoformat() if watermark_saved else stored_watermark
+                },
+                'results': result['results']
             }
             
+        except Exception as e:
+            return {'success': False, 'message': f'Error updating changed movies: {str(e)}'}
+    
+    def get_update_statistics(self) -> Dict:
+        """ดึงสถิติการอัปเดต (คำนวณใน database ผ่าน view movie_update_stats)"""
+        try:
+            result = self.supabase.table('movie_update_stats').select('*').execute()
+            if result.data:
+                row = result.data[0]
+                return {
+                    'total_movies': row.get('total_movies') or 0,
+                    'needs_update': row.get('needs_update') or 0,
+                    'recently_updated': row.get('recently_updated') or 0,
+                    'never_updated': row.get('never_updated') or 0,
+                    'update_percentage': float(row.get('update_percentage') or 0)
+                }
+        except Exception as e:
+            print(f"Error reading movie_update_stats view, falling back to counts: {e}")
+        
+        try:
+            return self.count_update_statistics()
         except Exception as e:
             print(f"Error getting update statistics: {e}")
             return {}
+    
+    def count_update_statistics(self, days_threshold: int = 7) -> Dict:
+        """คำนวณสถิติการอัปเดตด้วย count query (ใช้เมื่อไม่มี view)"""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=days_threshold)).strftime('%Y-%m-%dT%H:%M:%SZ')
+        
+        def count(apply_filter):
+            query = self.supabase.table('movies').select('id', count='exact')
+            return apply_filter(query).limit(1).execute().count or 0
+        
+        total_movies = count(lambda query: query)
+        never_updated = count(lambda query: query.is_('updated_at', 'null'))
+        needs_update = count(lambda query: query.lt('updated_at', cutoff))
+        recently_updated = count(lambda query: query.gte('updated_at', cutoff))
+        
+        return {
+            'total_movies': total_movies,
+            'needs_update': needs_update,
+            'recently_updated': recently_updated,
+            'never_updated': never_updated,
+            'update_percentage': round((recently_updated / total_movies * 100), 2) if total_movies > 0 else 0
+        }
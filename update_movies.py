@@ -16,6 +16,8 @@ def main():
     parser.add_argument('--ids', nargs='+', type=int, help='Update specific TMDB IDs')
     parser.add_argument('--stats', action='store_true', help='Show update statistics')
     parser.add_argument('--single', type=int, help='Update single movie by TMDB ID')
+    parser.add_argument('--changes', action='store_true', help='Update only movies changed on TMDB since the last sync')
+    parser.add_argument('--since', help='Start date for --changes (YYYY-MM-DD, default: last sync watermark)')
     
     args = parser.parse_args()
     
@@ -73,6 +75,25 @@ def main():
             
             return
         
+        # อัปเดตเฉพาะหนังที่เปลี่ยนแปลงบน TMDB
+        if args.changes:
+            print(f"\n🔄 Updating movies changed on TMDB (since: {args.since or 'last sync'})")
+            result = update_manager.update_changed_movies(since=args.since)
+            
+            if result['success']:
+                summary = result['summary']
+                print(f"✅ Update completed:")
+                print(f"   - Since: {summary['since']}")
+                print(f"   - Changed on TMDB: {summary['changed_on_tmdb']}")
+                print(f"   - In catalog: {summary['in_catalog']}")
+                print(f"   - Updated: {summary['updated']}")
+                print(f"   - Failed: {summary['failed']}")
+                print(f"   - Watermark: {summary['watermark']}")
+            else:
+                print(f"❌ Update failed: {result['message']}")
+            
+            return
+        
         # อัปเดตหนังทั้งหมด
         if args.all:
             print(f"\n🔄 Updating all movies (force: {args.force}, days threshold: {args.days})")
@@ -8,6 +8,8 @@ import requests
 import hashlib
 from pathlib import Path
 
+from provider_logos import provider_logo_manifest
+
 def get_poster_url(poster_path: str, size: str = 'w185') -> str:
     """
     สร้าง URL สำหรับ poster image (ใช้ขนาดเล็กเพื่อประหยัด bandwidth)
@@ -25,6 +27,22 @@ def get_poster_url(poster_path: str, size: str = 'w185') -> str:
     base_url = 'https://image.tmdb.org/t/p'
     return f"{base_url}/{size}{poster_path}"
 
+POSTERS_DIR = Path("static/images/posters")
+
+def get_poster_filename(poster_path: str, tmdb_id: int) -> str:
+    """
+    สร้างชื่อไฟล์ poster ที่บันทึกไว้ที่เซิร์ฟเวอร์ (TMDB ID + hash ของ poster path)
+    
+    Args:
+        poster_path: Path ของ poster จาก TMDB
+        tmdb_id: TMDB ID ของหนัง
+    
+    Returns:
+        ชื่อไฟล์ใน static/images/posters
+    """
+    file_hash = hashlib.md5(poster_path.encode()).hexdigest()[:8]
+    return f"{tmdb_id}_{file_hash}.jpg"
+
 def download_and_save_poster(poster_path: str, tmdb_id: int, size: str = 'w185') -> str:
     """
     ดาวน์โหลด poster และบันทึกไว้ที่เซิร์ฟเวอร์
@@ -42,13 +60,11 @@ def download_and_save_poster(poster_path: str, tmdb_id: int, size: str = 'w185')
     
     try:
         # สร้างชื่อไฟล์จาก TMDB ID และ hash ของ poster path
-        file_hash = hashlib.md5(poster_path.encode()).hexdigest()[:8]
-        filename = f"{tmdb_id}_{file_hash}.jpg"
+        filename = get_poster_filename(poster_path, tmdb_id)
         
         # Path สำหรับบันทึกไฟล์
-        static_dir = Path("static/images/posters")
-        static_dir.mkdir(parents=True, exist_ok=True)
-        file_path = static_dir / filename
+        POSTERS_DIR.mkdir(parents=True, exist_ok=True)
+        file_path = POSTERS_DIR / filename
         
         # ตรวจสอบว่ามีไฟล์อยู่แล้วหรือไม่
         if file_path.exists():
@@ -71,52 +87,6 @@ def download_and_save_poster(poster_path: str, tmdb_id: int, size: str = 'w185')
         # หากดาวน์โหลดไม่สำเร็จ ให้ใช้ URL ต้นฉบับ
         return get_poster_url(poster_path, size)
 
-def download_and_save_provider_logo(logo_path: str, provider_id: int, size: str = 'w45') -> str:
-    """
-    ดาวน์โหลด provider logo และบันทึกไว้ที่เซิร์ฟเวอร์
-    
-    Args:
-        logo_path: Path ของ logo จาก TMDB
-        provider_id: ID ของ provider
-        size: ขนาดของรูป
-    
-    Returns:
-        Path ของไฟล์ที่บันทึกไว้ หรือ URL ต้นฉบับหากดาวน์โหลดไม่สำเร็จ
-    """
-    if not logo_path:
-        return 'images/no-logo.png'
-    
-    try:
-        # สร้างชื่อไฟล์
-        file_hash = hashlib.md5(logo_path.encode()).hexdigest()[:8]
-        filename = f"provider_{provider_id}_{file_hash}.png"
-        
-        # Path สำหรับบันทึกไฟล์
-        static_dir = Path("static/images/providers")
-        static_dir.mkdir(parents=True, exist_ok=True)
-        file_path = static_dir / filename
-        
-        # ตรวจสอบว่ามีไฟล์อยู่แล้วหรือไม่
-        if file_path.exists():
-            return f'images/providers/{filename}'
-        
-        # ดาวน์โหลดรูปภาพ
-        tmdb_url = f"https://image.tmdb.org/t/p/{size}{logo_path}"
-        response = requests.get(tmdb_url, timeout=30)
-        response.raise_for_status()
-        
-        # บันทึกไฟล์
-        with open(file_path, 'wb') as f:
-            f.write(response.content)
-        
-        print(f"Downloaded provider logo: {filename}")
-        return f'images/providers/{filename}'
-        
-    except Exception as e:
-        print(f"Error downloading provider logo: {e}")
-        # หากดาวน์โหลดไม่สำเร็จ ให้ใช้ URL ต้นฉบับ
-        return get_provider_logo_url(logo_path, size)
-
 def get_provider_logo_url(logo_path: str, size: str = 'w45') -> str:
     """
     สร้าง URL สำหรับ provider logo
@@ -159,46 +129,15 @@ def format_streaming_providers(providers_data: dict) -> dict:
         'has_providers': False
     }
     
-    # จัดรูปแบบ streaming providers
-    if 'streaming' in providers_data:
-        formatted['streaming'] = [
-            {
-                'provider_name': provider.get('provider_name', ''),
-                'logo_path': download_and_save_provider_logo(
-                    provider.get('logo_path', ''), 
-                    provider.get('provider_id', 0)
-                ),
-                'provider_id': provider.get('provider_id', '')
-            }
-            for provider in providers_data['streaming']
-        ]
-    
-    # จัดรูปแบบ rent providers
-    if 'rent' in providers_data:
-        formatted['rent'] = [
-            {
-                'provider_name': provider.get('provider_name', ''),
-                'logo_path': download_and_save_provider_logo(
-                    provider.get('logo_path', ''), 
-                    provider.get('provider_id', 0)
-                ),
-                'provider_id': provider.get('provider_id', '')
-            }
-            for provider in providers_data['rent']
-        ]
-    
-    # จัดรูปแบบ buy providers
-    if 'buy' in providers_data:
-        formatted['buy'] = [
+    # logo มาจาก manifest ในหน่วยความจำ (ไม่มี filesystem หรือ network I/O ระหว่าง render)
+    for provider_type in ('streaming', 'rent', 'buy'):
+        formatted[provider_type] = [
             {
                 'provider_name': provider.get('provider_name', ''),
-                'logo_path': download_and_save_provider_logo(
-                    provider.get('logo_path', ''), 
-                    provider.get('provider_id', 0)
-                ),
-                'provider_id': provider.get('provider_id', '')
+                'provider_id': provider.get('provider_id', ''),
+                **provider_logo_manifest.logo(provider)
             }
-            for provider in providers_data['buy']
+            for provider in providers_data.get(provider_type, [])
         ]
     
     # ตรวจสอบว่ามี providers หรือไม่
@@ -326,3 +265,67 @@ def format_cast(cast_data) -> str:
         return ', '.join(cast_names[:3])  # จำกัด 3 คน
     
     return str(cast_data)
+
+def build_display_fields(movie_data: dict) -> dict:
+    """
+    คำนวณค่าที่จัดรูปแบบแล้วสำหรับบันทึกลงฐานข้อมูลพร้อมกับข้อมูลหนัง
+    
+    Args:
+        movie_data: ข้อมูลหนัง (คำนวณเฉพาะคอลัมน์ที่มีใน movie_data)
+    
+    Returns:
+        dict ของคอลัมน์ display_year, display_genres, display_cast
+    """
+    display = {}
+    if 'year' in movie_data:
+        display['display_year'] = format_year(movie_data['year'])
+    if 'genres' in movie_data:
+        display['display_genres'] = format_genres(movie_data['genres'])
+    if 'cast_data' in movie_data:
+        display['display_cast'] = format_cast(movie_data['cast_data'])
+    return display
+
+def get_display_fields(row: dict) -> dict:
+    """
+    อ่านค่าที่จัดรูปแบบไว้ตอนบันทึก (คำนวณใหม่เฉพาะแถวเก่าที่ยังไม่มีค่า)
+    
+    Args:
+        row: แถวจากตาราง movies
+    
+    Returns:
+        dict {'formatted_year', 'formatted_genres', 'formatted_cast'}
+    """
+    year = row.get('display_year')
+    genres = row.get('display_genres')
+    cast = row.get('display_cast')
+    
+    return {
+        'formatted_year': year if year is not None else format_year(row.get('year', '')),
+        'formatted_genres': genres if genres is not None else format_genres(row.get('genres', [])),
+        'formatted_cast': cast if cast is not None else format_cast(row.get('cast_data', []))
+    }
+
+def build_search_text(movie_data: dict):
+    """
+    สร้างข้อความสำหรับค้นหา (title, original_title, director และชื่อนักแสดง) เป็นตัวพิมพ์เล็ก
+    
+    Args:
+        movie_data: ข้อมูลหนัง (ต้องมีครบทุกคอลัมน์ต้นทาง ไม่เช่นนั้นคืนค่า None)
+    
+    Returns:
+        ข้อความสำหรับคอลัมน์ search_text หรือ None
+    """
+    if not all(field in movie_data for field in ('title', 'original_title', 'director', 'cast_data')):
+        return None
+    
+    cast_data = movie_data['cast_data'] or []
+    if isinstance(cast_data, str):
+        try:
+            import json
+            cast_data = json.loads(cast_data)
+        except:
+            cast_data = []
+    
+    names = [person.get('name', '') for person in cast_data if isinstance(person, dict)]
+    parts = [movie_data['title'], movie_data['original_title'], movie_data['director']] + names
+    return ' '.join(part for part in parts if part).lower()